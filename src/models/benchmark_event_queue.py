@@ -0,0 +1,56 @@
+"""
+Compares throughput of event queue implementations using classic "hold" model:
+the queue is filled up to given depth and then each operation pops the earliest event
+and pushes a new one at popped time + random offset (similar to disease progression offsets).
+Example:
+python -m src.models.benchmark_event_queue --depth 10000000 --operations 1000000
+"""
+import logging
+import random
+import time
+
+import click
+
+from src.models.defaults import default_calendar_bucket_width
+from src.models.enums import Schedulers
+from src.models.event_queue import (EventQueue, CalendarEventQueue)
+
+logger = logging.getLogger(__name__)
+
+
+def _offset(rng):
+    # mixture resembling the model: contractions/progression within days, recoveries within 11-56 days
+    if rng.random() < 0.8:
+        return rng.expovariate(1 / 3.0)
+    return rng.uniform(11.0, 56.0)
+
+
+def hold_benchmark(queue, depth, operations, seed=0):
+    rng = random.Random(seed)
+    for slot in range(depth):
+        queue.push(_offset(rng), slot)
+    start = time.perf_counter()
+    for _ in range(operations):
+        now = queue.peek_time()
+        queue.push(now + _offset(rng), queue.pop())
+    return operations / (time.perf_counter() - start)
+
+
+@click.command()
+@click.option('--depth', type=int, default=1000000)
+@click.option('--operations', type=int, default=1000000)
+@click.option('--bucket-width', type=float, default=default_calendar_bucket_width)
+def main(depth, operations, bucket_width):
+    queues = {
+        Schedulers.Heap: lambda: EventQueue(),
+        Schedulers.Calendar: lambda: CalendarEventQueue(bucket_width=bucket_width)
+    }
+    for scheduler, make_queue in queues.items():
+        rate = hold_benchmark(make_queue(), depth, operations)
+        logger.info(f'{scheduler.value}: depth {depth}, {rate:.0f} pop+push operations/s')
+
+
+if __name__ == '__main__':
+    log_fmt = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    logging.basicConfig(level=logging.INFO, format=log_fmt)
+    main()
@@ -0,0 +1,54 @@
+"""
+Measures per-call cost of scalar random draws used in the hot loop of InfectionModel:
+mocos_helper (one C++ call per number) against BufferedRandom with and without background threads.
+Example:
+python -m src.models.benchmark_random --calls 1000000 --block-size 65536
+"""
+import logging
+import time
+
+import click
+import mocos_helper
+
+from src.models.buffered_random import BufferedRandom
+
+logger = logging.getLogger(__name__)
+
+draws = {
+    'rand': lambda random: random.rand(),
+    'uniform': lambda random: random.uniform(low=2.0, high=5.0),
+    'exponential': lambda random: random.exponential(scale=3.0),
+    'poisson': lambda random: random.poisson(2.5),
+}
+
+
+def per_call_ns(random, draw, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        draw(random)
+    return (time.perf_counter() - start) / calls * 1e9
+
+
+@click.command()
+@click.option('--calls', type=int, default=1000000)
+@click.option('--block-size', type=int, default=1 << 16)
+@click.option('--seed', type=int, default=0)
+def main(calls, block_size, seed):
+    mocos_helper.seed(seed)
+    sources = {
+        'mocos_helper': mocos_helper,
+        'buffered': BufferedRandom(seed, block_size),
+        'buffered, background': BufferedRandom(seed, block_size, background=True),
+    }
+    for name, draw in draws.items():
+        for source, random in sources.items():
+            logger.info(f'{name}: {source} {per_call_ns(random, draw, calls):.0f} ns/call')
+    for random in sources.values():
+        if random is not mocos_helper:
+            random.close()
+
+
+if __name__ == '__main__':
+    log_fmt = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    logging.basicConfig(level=logging.INFO, format=log_fmt)
+    main()
@@ -0,0 +1,69 @@
+"""
+Buffered scalar random numbers for the hot loop of InfectionModel
+"""
+from itertools import chain
+from queue import (Queue, Full)
+from threading import (Event, Thread)
+
+import mocos_helper
+import numpy as np
+
+default_block_size = 1 << 16
+background_blocks = 2
+
+
+class BufferedRandom:
+    """
+    Replacement of mocos_helper scalar draws used by kernels and disease progression (rand, uniform, exponential
+    and poisson). Numbers are drawn with NumPy in blocks of block_size and handed out one by one from Python lists.
+    Uniform and standard exponential numbers come from separate generators spawned from the seed. NumPy fills a block
+    with the same numbers it would draw one by one, so every stream depends on the seed only - neither on the block
+    size nor on whether blocks are made by background threads.
+    With background=True, each stream has a daemon thread keeping up to `background_blocks` blocks ready
+    (NumPy releases the GIL while filling a block). Call close() to stop the threads.
+    """
+    def __init__(self, seed, block_size=default_block_size, background=False):
+        uniform_seed, exponential_seed = np.random.SeedSequence(seed).spawn(2)
+        self._block_size = block_size
+        self._stopped = Event()
+        self._threads = []
+        self._next_uniform = self._stream(np.random.default_rng(uniform_seed).random, background)
+        self._next_exponential = self._stream(np.random.default_rng(exponential_seed).standard_exponential,
+                                              background)
+        self.rand = self._next_uniform
+        # rate differs from call to call, so Poisson numbers cannot be drawn in blocks and inversion of the CDF
+        # in Python is slower than mocos_helper (seeded with the same seed by InfectionModel)
+        self.poisson = mocos_helper.poisson
+
+    def _stream(self, draw, background):
+        """ Returns function giving the next number of an endless stream of blocks made by draw(block_size) """
+        if background:
+            blocks = Queue(maxsize=background_blocks)
+            thread = Thread(target=self._produce, args=(draw, blocks), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+            return chain.from_iterable(iter(blocks.get, None)).__next__
+        return chain.from_iterable(iter(lambda: draw(self._block_size).tolist(), None)).__next__
+
+    def _produce(self, draw, blocks):
+        while not self._stopped.is_set():
+            block = draw(self._block_size).tolist()
+            while not self._stopped.is_set():
+                try:
+                    blocks.put(block, timeout=0.1)
+                    break
+                except Full:
+                    pass
+
+    def close(self) -> None:
+        self._stopped.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def uniform(self, low, high):
+        return low + (high - low) * self._next_uniform()
+
+    def exponential(self, scale):
+        """ Exponential with NumPy's parametrization by scale = 1 / lambda (as mocos_helper.exponential) """
+        return scale * self._next_exponential()
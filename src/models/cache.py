@@ -0,0 +1,81 @@
+"""
+On-disk cache of arrays derived from input files, so that repeated processes do not derive them again.
+Inputs are identified by checksums of their contents (see file_checksum), so cached arrays are invalidated
+once an input file changes.
+"""
+from functools import lru_cache
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+import config
+
+default_cache_dir = os.path.join(config.ROOT_DIR, 'data', 'interim', 'cache')
+
+
+checksum_block_size = 1 << 24
+
+
+def file_checksum(path):
+    """ sha1 of the file contents, read once per process unless the file is modified """
+    stat = os.stat(path)
+    return _checksum(os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+
+
+@lru_cache(maxsize=None)
+def _checksum(path, size, mtime_ns):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(checksum_block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_path(kind, key, cache_dir=default_cache_dir, suffix='.npy'):
+    """
+    Path of the cached array (or directory of arrays with suffix='') of the given kind,
+    key is any JSON-serializable description of the inputs
+    """
+    digest = hashlib.sha1(json.dumps(key, sort_keys=True, default=str).encode()).hexdigest()
+    return os.path.join(cache_dir, f'{kind}_{digest}{suffix}')
+
+
+def load_array(path):
+    """ Cached array or None if it was not stored yet """
+    if not os.path.exists(path):
+        return None
+    return np.load(path)
+
+
+def save_array(path, values) -> None:
+    """ Stores the array atomically, so processes running in parallel never see partially written files """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.npy')
+    with os.fdopen(fd, 'wb') as f:
+        np.save(f, values)
+    os.replace(tmp_path, path)
+
+
+def load_arrays(directory, names):
+    """ Arrays stored by save_arrays as dict of read-only memory-mapped arrays or None if they were not stored yet """
+    if not os.path.isdir(directory):
+        return None
+    return {name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r') for name in names}
+
+
+def save_arrays(directory, arrays) -> None:
+    """ Stores dict of arrays as .npy files of the directory, which appears at once when all of them are written """
+    parent = os.path.dirname(directory)
+    os.makedirs(parent, exist_ok=True)
+    tmp_directory = tempfile.mkdtemp(dir=parent)
+    for name, values in arrays.items():
+        np.save(os.path.join(tmp_directory, f'{name}.npy'), values)
+    try:
+        os.rename(tmp_directory, directory)
+    except OSError:
+        # stored by another process in the meantime
+        shutil.rmtree(tmp_directory)
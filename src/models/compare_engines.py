@@ -0,0 +1,120 @@
+"""
+Compares incidence curves of the exact and the day-step engine run on the same params and seeds.
+Both engines are run with the given params (only engine, experiment id and output directory are overridden),
+daily incidence of every seed is stored in incidence_comparison.csv, summary in incidence_comparison.txt
+and curves are plotted to incidence_comparison.png.
+Example:
+python -m src.models.compare_engines --params-path experiments/params.json --df-individuals-path data/pop.csv \
+    --output-dir /tmp/engines
+"""
+import glob
+import json
+import logging
+import os
+import time
+
+import click
+import matplotlib
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+from src.models.constants import *
+from src.models.enums import Engines
+from src.models.infection_model import InfectionModel
+
+# plots are only saved to files
+matplotlib.use('Agg')
+logger = logging.getLogger(__name__)
+
+
+def run_engine(engine, params, output_dir, df_individuals_path, df_households_path):
+    """ Runs all seeds of params with the engine, returns wall time and contractions of every seed """
+    params = dict(params)
+    params[ENGINE] = engine.value
+    params[OUTPUT_ROOT_DIR] = output_dir
+    params[EXPERIMENT_ID] = f'{params.get(EXPERIMENT_ID, "experiment")}_{engine.value}'
+    params[ENABLE_VISUALIZATION] = False
+    params_path = os.path.join(output_dir, f'params_{engine.value}.json')
+    with open(params_path, 'w') as params_file:
+        json.dump(params, params_file, indent=2)
+    start = time.time()
+    model = InfectionModel(params_path=params_path, df_individuals_path=df_individuals_path,
+                           df_households_path=df_households_path or '')
+    model.run_simulation()
+    elapsed = time.time() - start
+    # run directories are named {params}_{monotonic time}_{random seed param}, so they are ordered as seeds
+    pattern = os.path.join(output_dir, params[EXPERIMENT_ID], '*', 'output_df_potential_contractions.csv')
+    paths = sorted(glob.glob(pattern), key=lambda path: int(os.path.dirname(path).rsplit('_', 2)[1]))
+    contractions = {seed: pd.read_csv(path, na_values='None') for seed, path in zip(seeds(params), paths)}
+    return elapsed, contractions
+
+
+def seeds(params):
+    """ Seeds in the order they are used by InfectionModel.run_simulation """
+    random_seed = params[RANDOM_SEED]
+    if isinstance(random_seed, str):
+        return list(eval(random_seed))
+    return [random_seed]
+
+
+def daily_incidence(contractions, days):
+    return np.histogram(contractions[CONTRACTION_TIME], bins=np.arange(days + 1))[0]
+
+
+def compare(results, output_dir):
+    (exact_time, exact), (day_step_time, day_step) = results[Engines.Exact], results[Engines.DayStep]
+    rows = []
+    summary = [f'wall time: exact {exact_time:.1f}s, day step {day_step_time:.1f}s']
+    fig, ax = plt.subplots(figsize=(10, 6))
+    for seed in sorted(exact.keys() & day_step.keys()):
+        days = int(np.ceil(max(exact[seed][CONTRACTION_TIME].max(), day_step[seed][CONTRACTION_TIME].max()))) + 1
+        exact_curve = daily_incidence(exact[seed], days)
+        day_step_curve = daily_incidence(day_step[seed], days)
+        rows.append(pd.DataFrame({'seed': seed, 'day': np.arange(days), Engines.Exact.value: exact_curve,
+                                  Engines.DayStep.value: day_step_curve}))
+        total_exact, total_day_step = exact_curve.sum(), day_step_curve.sum()
+        summary.append(f'seed {seed}: infections exact {total_exact}, day step {total_day_step} '
+                       f'({(total_day_step - total_exact) / total_exact:+.1%}), '
+                       f'peak day exact {exact_curve.argmax()}, day step {day_step_curve.argmax()}, '
+                       f'L1 distance of daily incidence {np.abs(exact_curve - day_step_curve).sum() / total_exact:.1%}')
+        line, = ax.plot(exact_curve, label=f'exact, seed {seed}')
+        ax.plot(day_step_curve, linestyle='--', color=line.get_color(), label=f'day step, seed {seed}')
+    # single runs differ mostly by chance (engines use different random streams), mean curves show the bias
+    incidence = pd.concat(rows)
+    mean = incidence.groupby('day')[[Engines.Exact.value, Engines.DayStep.value]].mean()
+    exact_mean, day_step_mean = mean[Engines.Exact.value].values, mean[Engines.DayStep.value].values
+    summary.append(f'mean over seeds: infections exact {exact_mean.sum():.0f}, day step {day_step_mean.sum():.0f} '
+                   f'({(day_step_mean.sum() - exact_mean.sum()) / exact_mean.sum():+.1%}), '
+                   f'peak day exact {exact_mean.argmax()}, day step {day_step_mean.argmax()}, '
+                   f'L1 distance of daily incidence {np.abs(exact_mean - day_step_mean).sum() / exact_mean.sum():.1%}')
+    ax.set_xlabel('day')
+    ax.set_ylabel('daily incidence')
+    ax.legend()
+    fig.savefig(os.path.join(output_dir, 'incidence_comparison.png'))
+    plt.close(fig)
+    incidence.to_csv(os.path.join(output_dir, 'incidence_comparison.csv'), index=False)
+    with open(os.path.join(output_dir, 'incidence_comparison.txt'), 'w') as summary_file:
+        summary_file.write('\n'.join(summary) + '\n')
+    for line in summary:
+        logger.info(line)
+
+
+@click.command()
+@click.option('--params-path', type=click.Path(exists=True))
+@click.option('--df-individuals-path', type=click.Path(exists=True))
+@click.option('--df-households-path', type=click.Path())
+@click.option('--output-dir', type=click.Path())
+def main(params_path, df_individuals_path, output_dir, df_households_path=None):
+    with open(params_path) as params_file:
+        params = json.load(params_file)
+    os.makedirs(output_dir, exist_ok=True)
+    results = {engine: run_engine(engine, params, output_dir, df_individuals_path, df_households_path)
+               for engine in (Engines.Exact, Engines.DayStep)}
+    compare(results, output_dir)
+
+
+if __name__ == '__main__':
+    log_fmt = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    logging.basicConfig(level=logging.INFO, format=log_fmt)
+    main()
@@ -57,6 +57,31 @@ SOCIAL_COMPETENCE = 'social_competence'
 REUSE_EXPECTED_CASE_SEVERITIES = 'reuse_expected_case_severities'
 REUSE_TIME_DISTRIBUTION_REALIZATIONS = 'reuse_time_distribution_realizations'
 OLD_IMPLEMENTATION_FOR_HOUSEHOLD_KERNEL = 'old_implementation_for_household_kernel'
+QUEUE_COMPACTION_THRESHOLD = 'queue_compaction_threshold'
+SCHEDULER = 'scheduler'
+HEAP = 'heap'
+CALENDAR = 'calendar'
+CALENDAR_BUCKET_WIDTH = 'calendar_bucket_width'
+LAZY_PROGRESSION = 'lazy_progression'
+PRUNE_DOMINATED_CONTRACTIONS = 'prune_dominated_contractions'
+ENGINE = 'engine'
+EXACT = 'exact'
+DAY_STEP = 'day_step'
+TIME_STEP = 'time_step'
+RANDOM_BUFFER_SIZE = 'random_buffer_size'
+RANDOM_BUFFER_BACKGROUND = 'random_buffer_background'
+LAZY_EXPECTED_CASE_SEVERITIES = 'lazy_expected_case_severities'
+COUNTER_BASED_RANDOM = 'counter_based_random'
+POPULATION_CACHE = 'population_cache'
+HOUSEHOLDS_CACHE = 'households_cache'
+CACHE_DIR = 'cache_dir'
+HOUSEHOLD_CONTIGUOUS_INDICES = 'household_contiguous_indices'
+POPULATION_COLUMNS = 'population_columns'
+POPULATION_FILTER = 'population_filter'
+COLUMN = 'column'
+VALUES = 'values'
+MIN_VALUE = 'min'
+MAX_VALUE = 'max'
 
 R_OUT_SCHEDULE = 'r_out_schedule'
 OVERRIDE_R_FRACTION = 'override_r_fraction'
@@ -84,6 +109,7 @@ FROM_FILE = 'from_file'
 
 DETECTION = 'detection'
 QUARANTINE = 'quarantine'
+QUARANTINE_FOLLOWED_DETECTION = 'quarantine_followed_detection'
 
 AVERAGE_INFECTIVITY_TIME_CONSTANT_KERNEL = 'average_infectivity_time_constant_kernel'
 SAVE_EXPECTED_SEVERITY = 'save_expected_severity'
@@ -136,7 +162,6 @@ TIME = 'time'
 TYPE = 'type'
 INITIATED_BY = 'initiated_by'
 INITIATED_THROUGH = 'initiated_through'
-ISSUED_TIME = 'issued_time'
 
 FUNCTION = 'function'
 MULTIPLIER = 'multiplier'
@@ -0,0 +1,392 @@
+"""
+Approximate day-step (tau-leaping) simulation engine
+"""
+from heapq import (heapify, heappush, heappop)
+
+import numpy as np
+
+from .constants import *
+from .states_and_functions import *
+
+_case_columns = (TMINUS1, T0, T1, T2, TDEATH, TRECOVERY, TDETECTION)
+
+
+class DayStepEngine:
+    """
+    Runs one simulation of InfectionModel in fixed steps of `time_step` days instead of event by event.
+    Within a step all cases are handled at once with NumPy:
+    - every infectious person gets Poisson number of contacts (constant, constant age and friendship kernels)
+      proportional to the part of its infectious period that falls into the step, healthy inhabitants
+      of households of infectious people are infected with probability 1 - exp(-household infection pressure),
+    - contacts are thinned with fear / R_out schedule and blocked by quarantine as they are at the beginning
+      of the step,
+    - disease progression of new cases is drawn at once with the same distributions as in the exact engine,
+      transitions (and counters updated by them) follow from progression times.
+    People infected within a step (including initial conditions and imports, which are taken from the event queue
+    of InfectionModel) start spreading the disease in the next step, so the bias is bounded by the step length.
+    Results are stored in the same structures (and later in the same output files) as in the exact engine.
+    """
+    def __init__(self, model, seed):
+        self._model = model
+        self._params = model._params
+        self._rng = np.random.default_rng(seed)
+        self._time_step = self._params[TIME_STEP]
+        size = model._population_size
+        self._population = model._population.indices
+
+        # households index of the model (members of household h are members[offsets[h]:offsets[h + 1]])
+        households = model._households
+        self._household = households.household
+        self._household_size = households.sizes()
+        self._household_offsets = households.offsets
+        self._household_members = households.members
+
+        self._severity = model._expected_case_severity
+        self._death_probability = np.array([self._params[DEATH_PROBABILITY][s] for s in case_severities])
+
+        self._age = model._population.age.astype(np.int64)
+        self._age_group = None
+        if not model._disable_constant_age_kernel:
+            self._age_group = np.full(size, -1, dtype=np.int64)
+            for age, group in model._constant_age_helper_age_dict.items():
+                self._age_group[self._population[self._age[self._population] == age]] = group
+            self._age_group_members = {group: np.asarray(members, dtype=np.int64)
+                                       for group, members in model._constant_age_individuals.items()}
+        self._social_activity = None
+        if not model._disable_friendship_kernel:
+            self._social_activity = model._population.social_competence
+
+        self._samplers = {t: model.numpy_sampler(t) for t in (T0, T1, T2, TDEATH)}
+
+        self._cases = {column: np.empty(0) for column in _case_columns}
+        self._cases[PERSON_INDEX] = np.empty(0, dtype=np.int64)
+        self._case_row = np.full(size, -1, dtype=np.int64)
+
+    def _draw(self, t, n):
+        return self._samplers[t](self._rng, n)
+
+    def _acceptance(self, kernel):
+        """ Probability that contact through the kernel is not abandoned, see InfectionModel.quick_return_condition """
+        model = self._model
+        if kernel == CONSTANT and model._r_out_schedule is not None:
+            fraction = model._r_out_schedule.fraction_at(model._global_time - model._max_time_offset)
+            if fraction is not None:
+                return fraction
+        return model.fear(kernel)
+
+    def _progression(self, persons, times, infectious):
+        """ Vectorized InfectionModel.generate_disease_progression, returns case columns """
+        n = len(persons)
+        rng = self._rng
+        severity = self._severity[persons]
+        unknown = severity < 0
+        if unknown.any():
+            severity[unknown] = self._model._draw_case_severities(persons[unknown], self._age[persons[unknown]])
+        severe = (severity == SEVERE_CASE) | (severity == CRITICAL_CASE)
+        realizations = self._model._progression_realizations
+        if realizations is None:
+            rv_t0 = self._draw(T0, n)
+            rv_t2 = self._draw(T2, n)
+            rv_t1 = self._draw(T1, n)
+            death = rng.random(n)
+            rv_tdeath = self._draw(TDEATH, n)
+            recovery_offset = np.where(severe, rng.uniform(42.0 - 14.0, 42.0 + 14.0, n),
+                                       rng.uniform(14.0 - 3.0, 14.0 + 3.0, n))
+            detection = np.zeros(n)
+            detection[~severe] = rng.random(np.count_nonzero(~severe))
+        else:
+            rv_t0, rv_t1, rv_t2, rv_tdeath, recovery, death, detection = realizations.take(persons)
+            recovery_offset = np.where(severe, 42.0 - 14.0 + 2 * 14.0 * recovery, 14.0 - 3.0 + 2 * 3.0 * recovery)
+        t0 = np.where(infectious, times, times + rv_t0)
+        tminus1 = np.where(infectious, times - rv_t0, times)
+        t2 = np.where(severe, t0 + rv_t2, np.nan)
+        t1 = t0 + rv_t1
+        t1[t1 >= t2] = np.nan
+        dies = death <= self._death_probability[severity]
+        tdeath = np.where(dies, t0 + rv_tdeath, np.nan)
+        trecovery = np.where(dies, np.nan, t0 + recovery_offset)
+        detected = self._params[TURN_ON_DETECTION] & (severe | (detection <= self._params[DETECTION_MILD_PROBA]))
+        tdetection = np.where(detected, np.where(severe, t2, t0 + 2), np.nan)
+        return {PERSON_INDEX: persons, TMINUS1: tminus1, T0: t0, T1: t1, T2: t2, TDEATH: tdeath,
+                TRECOVERY: trecovery, TDETECTION: tdetection}
+
+    def _add_cases(self, persons, times, infectious):
+        model = self._model
+        model._infection_status[persons] = CONTRACTION_STATE
+        model._detection_status[persons] = NOT_DETECTED_STATE
+        new_cases = self._progression(persons, times, infectious)
+        model._progression_times.set_progressions(persons, np.column_stack([new_cases[c] for c in _case_columns]))
+        first_row = len(self._cases[PERSON_INDEX])
+        for column, values in new_cases.items():
+            self._cases[column] = np.concatenate((self._cases[column], values))
+        self._case_row[persons] = np.arange(first_row, first_row + len(persons))
+
+    def _external_infections(self, t_end):
+        """
+        Initial conditions and imports that happen before t_end. People made immune by initial conditions are
+        recovered right away, infections are returned as (persons, times, infectious, kernels)
+        """
+        model = self._model
+        queue = model.event_queue
+        pool = model._event_pool
+        infections = []
+        while not queue.empty() and queue.peek_time() < t_end:
+            slot = queue.pop()
+            time, person_id, type_, source, kernel = (pool.time[slot], pool.person[slot], pool.type[slot],
+                                                      pool.source[slot], pool.kernel[slot])
+            pool.release(slot)
+            if kernel == IMPORT_INTENSITY_CODE:
+                model._schedule_next_import()
+            if source >= 0:
+                new_status = state_transitions[type_][model._infection_status[person_id]]
+                if type_ == TRECOVERY_CODE and new_status is not None:
+                    model._infection_status[person_id] = new_status
+                    model._immune_people += 1
+                continue
+            new_status = external_infection_transitions[type_][model._infection_status[person_id]]
+            if new_status is not None:
+                model._infection_status[person_id] = new_status
+                infections.append((person_id, time, new_status == INFECTIOUS_STATE, kernel))
+        if not infections:
+            return None
+        persons, times, infectious, kernel_codes = zip(*infections)
+        return (np.array(persons, dtype=np.int64), np.array(times), np.array(infectious, dtype=bool),
+                np.array(kernel_codes, dtype=np.uint8))
+
+    def _household_infections(self, start, overlap):
+        gamma = self._model.gamma(HOUSEHOLD)
+        cases = self._cases[PERSON_INDEX]
+        households = self._household[cases]
+        sizes = self._household_size[households]
+        spreading = np.flatnonzero((overlap > 0) & (sizes > 1))
+        if gamma == 0 or len(spreading) == 0:
+            return None
+        spreading = spreading[np.argsort(households[spreading], kind='stable')]
+        households = households[spreading]
+        # contraction time of every other inhabitant is exponential with rate gamma / (size - 1)
+        pressure = gamma / (sizes[spreading] - 1) * overlap[spreading]
+        infected_households, first = np.unique(households, return_index=True)
+        last = np.append(first[1:], len(households)) - 1
+        cumulative = np.cumsum(pressure)
+        household_pressure = np.add.reduceat(pressure, first)
+        offset = cumulative[first] - pressure[first]
+
+        counts = self._household_size[infected_households]
+        segment = np.repeat(np.arange(len(infected_households)), counts)
+        position = np.arange(len(segment)) - np.repeat(np.cumsum(counts) - counts, counts)
+        members = self._household_members[self._household_offsets[infected_households][segment] + position]
+        healthy = self._model._infection_status[members] == HEALTHY_STATE
+        members, segment = members[healthy], segment[healthy]
+        infected = self._rng.random(len(members)) < -np.expm1(-household_pressure[segment])
+        members, segment = members[infected], segment[infected]
+        # every infection is attributed to one of the spreading inhabitants proportionally to its pressure
+        draw = offset[segment] + self._rng.random(len(members)) * household_pressure[segment]
+        rows = spreading[np.minimum(np.searchsorted(cumulative, draw, side='right'), last[segment])]
+        times = start[rows] + self._rng.random(len(rows)) * overlap[rows]
+        return members, cases[rows], times, np.full(len(rows), HOUSEHOLD_CODE, dtype=np.uint8)
+
+    def _contact_infections(self, kernel, kernel_code, start, overlap, spreading):
+        """ Infections through kernels drawing Poisson number of contacts of every spreading case """
+        model = self._model
+        rates = model.gamma(kernel) * overlap
+        rates[~spreading] = 0.0
+        if kernel == FRIENDSHIP:
+            rates *= self._social_activity[self._cases[PERSON_INDEX]]
+        rows = np.repeat(np.arange(len(rates)), self._rng.poisson(rates))
+        if len(rows) == 0:
+            return None
+        sources = self._cases[PERSON_INDEX][rows]
+        if kernel == CONSTANT:
+            targets = self._population[self._rng.integers(0, len(self._population), len(rows))]
+        elif kernel == CONSTANT_AGE:
+            targets = np.empty(len(rows), dtype=np.int64)
+            groups = self._age_group[sources]
+            for group, members in self._age_group_members.items():
+                in_group = groups == group
+                targets[in_group] = members[self._rng.integers(0, len(members), np.count_nonzero(in_group))]
+        else:
+            sampler = model._social_activity_sampler
+            gender_of = model._population.gender_of
+            targets = np.array([sampler.gen(int(self._age[source]), gender_of(source)) for source in sources.tolist()],
+                               dtype=np.int64)
+        infected = ((targets != sources)
+                    & (model._infection_status[targets] == HEALTHY_STATE)
+                    & (model._quarantine_status[targets] == NO_QUARANTINE_STATE)
+                    & (self._rng.random(len(rows)) <= self._acceptance(kernel)))
+        rows, targets = rows[infected], targets[infected]
+        times = start[rows] + self._rng.random(len(rows)) * overlap[rows]
+        return targets, self._cases[PERSON_INDEX][rows], times, np.full(len(rows), kernel_code, dtype=np.uint8)
+
+    def _transmissions(self, t, t_end):
+        """ Infections caused by the cases within [t, t_end) as (targets, sources, times, kernels) """
+        model = self._model
+        cases = self._cases
+        start = np.fmax(cases[T0], t)
+        end_of_activity = np.fmin(cases[TDEATH], cases[TRECOVERY])
+        # household infections are possible until hospitalization, other kernels only until staying home
+        household_end = np.fmin(np.fmin(cases[T2], end_of_activity), t_end)
+        household_overlap = np.clip(household_end - start, 0.0, None)
+        contact_end = np.fmin(np.fmin(np.where(np.isnan(cases[T1]), cases[T2], cases[T1]), end_of_activity), t_end)
+        contact_overlap = np.clip(contact_end - start, 0.0, None)
+        spreading = model._quarantine_status[cases[PERSON_INDEX]] == NO_QUARANTINE_STATE
+
+        infections = [self._household_infections(start, household_overlap),
+                      self._contact_infections(CONSTANT, CONSTANT_CODE, start, contact_overlap, spreading)]
+        if self._social_activity is not None:
+            infections.append(self._contact_infections(FRIENDSHIP, FRIENDSHIP_CODE, start, contact_overlap,
+                                                       spreading))
+        if self._age_group is not None:
+            spreading_age = spreading & (self._age_group[cases[PERSON_INDEX]] >= 0)
+            infections.append(self._contact_infections(CONSTANT_AGE, CONSTANT_AGE_CODE, start, contact_overlap,
+                                                       spreading_age))
+        infections = [infection for infection in infections if infection is not None and len(infection[0])]
+        if not infections:
+            return None
+        targets, sources, times, kernel_codes = (np.concatenate(column) for column in zip(*infections))
+        # a person can be infected only once - by the earliest contraction
+        order = np.argsort(times, kind='stable')
+        _, first = np.unique(targets[order], return_index=True)
+        order = order[np.sort(first)]
+        return targets[order], sources[order], times[order], kernel_codes[order]
+
+    def _log_infections(self, sources, targets, times, kernel_codes):
+        model = self._model
+        order = np.argsort(times, kind='stable')
+        sources, targets, times, kernel_codes = sources[order], targets[order], times[order], kernel_codes[order]
+        model._infection_log.extend(sources, targets, times, kernel_codes)
+        model._affected_people += len(targets)
+        serial_interval = self._params[SERIAL_INTERVAL]
+        measured = (sources >= 0) & (times >= serial_interval[MIN_TIME]) & (times < serial_interval[MAX_TIME])
+        if measured.any():
+            source_tminus1 = self._cases[TMINUS1][self._case_row[sources[measured]]]
+            model.serial_intervals.extend((times[measured] - source_tminus1).tolist())
+
+    def _detect(self, rows, t_end):
+        """ Processes detections of given cases in time order, with quarantine of their households """
+        model = self._model
+        cases = self._cases
+        queue = [(cases[TDETECTION][row], row) for row in rows.tolist()]
+        heapify(queue)
+        while queue:
+            time, row = heappop(queue)
+            person_id = cases[PERSON_INDEX][row]
+            if model._detection_status[person_id] != NOT_DETECTED_STATE:
+                continue
+            model._detection_status[person_id] = DETECTED_STATE
+            model._detected_people += 1
+            model._invalidate_fear()
+            model._global_time = time
+            model.update_max_time_offset()
+            household = self._household[person_id]
+            inhabitants = self._household_members[self._household_offsets[household]:
+                                                  self._household_offsets[household + 1]]
+            for inhabitant in inhabitants.tolist():
+                if model._quarantine_status[inhabitant] != NO_QUARANTINE_STATE:
+                    continue
+                inhabitant_status = model._infection_status[inhabitant]
+                if inhabitant_status == DEATH_STATE:
+                    continue
+                model._quarantine_status[inhabitant] = QUARANTINE_STATE
+                model._quarantined_people += 1
+                model._progression_times.set(inhabitant, QUARANTINE, time)
+                if inhabitant_status == INFECTIOUS_STATE or inhabitant_status == STAY_HOME_STATE:
+                    inhabitant_row = self._case_row[inhabitant]
+                    if np.isnan(cases[TDETECTION][inhabitant_row]):
+                        new_detection_time = time + 2.0
+                        cases[TDETECTION][inhabitant_row] = new_detection_time
+                        model._progression_times.set(inhabitant, TDETECTION, new_detection_time)
+                        if new_detection_time < t_end:
+                            heappush(queue, (new_detection_time, inhabitant_row))
+
+    def _progress(self, t_end, since):
+        """ Applies transitions of cases happening within [since, t_end) (since is given per case) """
+        model = self._model
+        cases = self._cases
+        persons = cases[PERSON_INDEX]
+        critical = self._severity[persons] == CRITICAL_CASE
+        t2 = cases[T2]
+
+        def _within(times):
+            return (times >= since) & (times < t_end)
+
+        end_of_activity = np.fmin(cases[TDEATH], cases[TRECOVERY])
+        model._active_people += np.count_nonzero(_within(cases[T0]))
+        model._icu_needed += np.count_nonzero(_within(t2) & (t2 < end_of_activity) & critical)
+        for column in (TDEATH, TRECOVERY):
+            leaving = _within(cases[column])
+            model._active_people -= np.count_nonzero(leaving)
+            model._icu_needed -= np.count_nonzero(leaving & critical & (t2 < cases[column]))
+            if column == TDEATH:
+                model._deaths += np.count_nonzero(leaving)
+                model._invalidate_fear()
+            else:
+                model._immune_people += np.count_nonzero(leaving)
+        model._infection_status[persons] = np.select(
+            [cases[TDEATH] < t_end, cases[TRECOVERY] < t_end, t2 < t_end, cases[T1] < t_end, cases[T0] < t_end],
+            [DEATH_STATE, RECOVERED_STATE, HOSPITAL_STATE, STAY_HOME_STATE, INFECTIOUS_STATE],
+            CONTRACTION_STATE)
+
+        tdetection = cases[TDETECTION]
+        detecting = _within(tdetection) & ~(cases[TRECOVERY] <= tdetection)
+        detecting &= model._detection_status[persons] == NOT_DETECTED_STATE
+        if detecting.any():
+            self._detect(np.flatnonzero(detecting), t_end)
+
+    def _compact(self, t_end) -> None:
+        """ Forgets cases without any pending progression event """
+        cases = self._cases
+        latest = cases[T0]
+        for column in (T1, T2, TDEATH, TRECOVERY, TDETECTION):
+            latest = np.fmax(latest, cases[column])
+        pending = latest >= t_end
+        if pending.all():
+            return
+        self._case_row[cases[PERSON_INDEX][~pending]] = -1
+        for column in cases:
+            cases[column] = cases[column][pending]
+        self._case_row[cases[PERSON_INDEX]] = np.arange(np.count_nonzero(pending))
+
+    def _stop_value(self):
+        threshold_type = self._params[STOP_SIMULATION_THRESHOLD_TYPE]
+        if threshold_type == PREVALENCE:
+            return self._model.affected_people
+        return self._model.detected_people
+
+    def run(self) -> int:
+        """ Runs the simulation until nothing is pending or one of stop conditions is met, returns number of steps """
+        model = self._model
+        t = model._global_time
+        steps = 0
+        while len(self._cases[PERSON_INDEX]) > 0 or not model.event_queue.empty():
+            if self._stop_value() >= model.stop_simulation_threshold:
+                break
+            if t > model._max_time + model._max_time_offset:
+                break
+            t_end = t + self._time_step
+            model._log_progress(t)
+            model._global_time = t
+            n_old_cases = len(self._cases[PERSON_INDEX])
+
+            infections = []
+            transmissions = self._transmissions(t, t_end)
+            if transmissions is not None:
+                targets, sources, times, kernel_codes = transmissions
+                infections.append((sources, targets, times, kernel_codes))
+                self._add_cases(targets, times, np.zeros(len(targets), dtype=bool))
+            # after transmissions, so imported cases start spreading in the next step as well
+            external = self._external_infections(t_end)
+            if external is not None:
+                persons, times, infectious, kernel_codes = external
+                self._add_cases(persons, times, infectious)
+                infections.append((np.full(len(persons), -1, dtype=np.int64), persons, times, kernel_codes))
+            if infections:
+                self._log_infections(*(np.concatenate(column) for column in zip(*infections)))
+
+            since = np.full(len(self._cases[PERSON_INDEX]), t)
+            since[n_old_cases:] = -np.inf
+            self._progress(t_end, since)
+            self._compact(t_end)
+            t = t_end
+            steps += 1
+        model._global_time = t
+        return steps
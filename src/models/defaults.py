@@ -127,6 +127,25 @@ default_constant_age_setup = None
 
 default_inter_age_contacts = False
 
+default_queue_compaction_threshold = 0.5
+default_scheduler = Schedulers.Heap.value
+default_calendar_bucket_width = 0.25
+default_lazy_progression = False
+default_prune_dominated_contractions = False
+default_engine = Engines.Exact.value
+default_time_step = 1.0
+default_random_buffer_size = None
+default_random_buffer_background = False
+default_lazy_expected_case_severities = False
+default_counter_based_random = False
+default_population_cache = False
+default_households_cache = False
+# None for data/interim/cache of the repository (see cache.py)
+default_cache_directory = None
+default_household_contiguous_indices = False
+default_population_columns = None
+default_population_filter = None
+
 defaults = {
     INITIAL_CONDITIONS: default_initial_conditions,
     STOP_SIMULATION_THRESHOLD: default_stop_simulation_threshold,
@@ -173,6 +192,23 @@ defaults = {
     REUSE_TIME_DISTRIBUTION_REALIZATIONS: default_reuse_time_distribution_realizations,
     OLD_IMPLEMENTATION_FOR_HOUSEHOLD_KERNEL: default_old_implementation_for_household_kernel,
     CONSTANT_AGE_SETUP: default_constant_age_setup,
+    QUEUE_COMPACTION_THRESHOLD: default_queue_compaction_threshold,
+    SCHEDULER: default_scheduler,
+    CALENDAR_BUCKET_WIDTH: default_calendar_bucket_width,
+    LAZY_PROGRESSION: default_lazy_progression,
+    PRUNE_DOMINATED_CONTRACTIONS: default_prune_dominated_contractions,
+    ENGINE: default_engine,
+    TIME_STEP: default_time_step,
+    RANDOM_BUFFER_SIZE: default_random_buffer_size,
+    RANDOM_BUFFER_BACKGROUND: default_random_buffer_background,
+    LAZY_EXPECTED_CASE_SEVERITIES: default_lazy_expected_case_severities,
+    COUNTER_BASED_RANDOM: default_counter_based_random,
+    POPULATION_CACHE: default_population_cache,
+    HOUSEHOLDS_CACHE: default_households_cache,
+    CACHE_DIR: default_cache_directory,
+    HOUSEHOLD_CONTIGUOUS_INDICES: default_household_contiguous_indices,
+    POPULATION_COLUMNS: default_population_columns,
+    POPULATION_FILTER: default_population_filter,
 }
 
 default_age_induced_fatality_rates = [(0, 20, 0.002), (20, 40, 0.002), (40, 50, 0.004), (50, 60, 0.013),
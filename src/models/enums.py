@@ -108,6 +108,26 @@ class FearFunctions(EnumWithPublicValue2MemberMap):
     FearTanhTime = 'fear_tanh_time'
 
 
+class Schedulers(EnumWithPublicValue2MemberMap):
+    """
+    Event queue implementations:
+    - Heap - binary heap over all pending events
+    - Calendar - events bucketed by time slices of calendar_bucket_width days, same processing order as Heap
+    """
+    Heap = HEAP
+    Calendar = CALENDAR
+
+
+class Engines(EnumWithPublicValue2MemberMap):
+    """
+    Simulation engines:
+    - Exact - events are processed one by one in time order
+    - DayStep - approximate, all cases are advanced together in steps of time_step days
+    """
+    Exact = EXACT
+    DayStep = DAY_STEP
+
+
 class SupportedDistributions(EnumWithPublicValue2MemberMap):
     Lognormal = LOGNORMAL
     Exponential = EXPONENTIAL
@@ -0,0 +1,66 @@
+"""
+Packed storage of pending events
+"""
+from array import array
+
+from .states_and_functions import (Event, event_types, kernels)
+
+default_pool_capacity = 1 << 16
+
+
+class EventPool:
+    """
+    Struct-of-arrays storage of events: float64 time, int32 person id, int8 event type code,
+    int32 id of the person that initiated the event (-1 if none) and uint8 code of the kernel.
+    Event queue holds slot indices only, slots are recycled once the event is processed or dropped.
+    """
+    def __init__(self, capacity=default_pool_capacity):
+        self._capacity = capacity
+        self.clear()
+
+    def __len__(self):
+        return self._next - len(self._free)
+
+    def _grow(self):
+        extension = self._capacity
+        self.time.extend(array('d', bytes(8 * extension)))
+        self.person.extend(array('i', bytes(4 * extension)))
+        self.type.extend(array('b', bytes(extension)))
+        self.source.extend(array('i', bytes(4 * extension)))
+        self.kernel.extend(array('B', bytes(extension)))
+        self._capacity += extension
+
+    def allocate(self, time, person_id, type_, initiated_by, initiated_through) -> int:
+        if self._free:
+            slot = self._free.pop()
+        else:
+            slot = self._next
+            self._next += 1
+            if slot == self._capacity:
+                self._grow()
+        self.time[slot] = time
+        self.person[slot] = person_id
+        self.type[slot] = type_
+        self.source[slot] = -1 if initiated_by is None else initiated_by
+        self.kernel[slot] = initiated_through
+        return slot
+
+    def release(self, slot) -> None:
+        """ Makes the slot reusable, stored values are kept until the slot is allocated again """
+        self._free.append(slot)
+
+    def get(self, slot) -> Event:
+        """ Decodes the record, useful for logging and debugging """
+        source = self.source[slot]
+        return Event(self.time[slot], self.person[slot], event_types[self.type[slot]],
+                     None if source < 0 else source, kernels[self.kernel[slot]])
+
+    def clear(self) -> None:
+        capacity = self._capacity
+        self.time = array('d', bytes(8 * capacity))
+        self.person = array('i', bytes(4 * capacity))
+        self.type = array('b', bytes(capacity))
+        self.source = array('i', bytes(4 * capacity))
+        self.kernel = array('B', bytes(capacity))
+        self._next = 0
+        self._free = []
@@ -0,0 +1,354 @@
+"""
+Event queues used by InfectionModel to schedule events in time order
+"""
+from array import array
+from heapq import (heapify, heappush, heappop)
+from itertools import (chain, islice)
+from math import (floor, inf)
+from struct import Struct
+
+from .defaults import (default_queue_compaction_threshold, default_calendar_bucket_width)
+
+min_size_for_compaction = 1024
+
+slot_bits = 32
+sequence_bits = 40
+slot_mask = (1 << slot_bits) - 1
+sign_bit = 1 << 63
+all_bits = (1 << 64) - 1
+_double = Struct('>d')
+
+
+def event_key(time, sequence, slot):
+    """
+    Single int ordered as (time, sequence) holding the slot in its lowest bits. Bits of non-negative doubles
+    are ordered as the doubles, bits of negative ones are flipped, so that every time is ordered correctly.
+    """
+    bits = int.from_bytes(_double.pack(time), 'big')
+    bits = bits | sign_bit if time >= 0 else bits ^ all_bits
+    return (bits << sequence_bits | sequence) << slot_bits | slot
+
+
+def key_time(key):
+    bits = key >> (sequence_bits + slot_bits)
+    bits = bits ^ sign_bit if bits & sign_bit else bits ^ all_bits
+    return _double.unpack(bits.to_bytes(8, 'big'))[0]
+
+
+class EventQueue:
+    """
+    Binary heap of events ordered by time and sequence number. Sequence number is increasing with every push,
+    so events scheduled at the same time are processed in the order they were pushed (FIFO).
+    Payloads are slots (ints 0 <= slot < 2**32, e.g. of EventPool) and every heap entry is a single int packing
+    time, sequence and slot (see event_key), which takes about a third of the memory of a tuple of them
+    and is compared faster. The queue is owned by single InfectionModel instance and does not use any locks.
+
+    Events can be pushed on behalf of an owner (person id, a non-negative int). Owner and its generation
+    (the validity token) are kept in typed arrays indexed by slot and `invalidate(owner)` turns all pending events
+    of that owner into stale entries. Stale entries are dropped on pop and the storage is rebuilt once they make up
+    more than `compaction_threshold` of its size. Slots of dropped entries are passed to `release` callback (if given).
+    Events can also depend on a source (e.g. the infecting person), whose generation is the second token
+    and `invalidate_source(source)` makes them stale as well. The number of such events is not tracked, so they are
+    counted by len and compaction threshold until they reach the head of the queue (empty() drops them there).
+    """
+    def __init__(self, compaction_threshold=default_queue_compaction_threshold, release=None):
+        self.compaction_threshold = compaction_threshold
+        self._release = release
+        self.clear()
+
+    def __len__(self):
+        return self._size - self._dead
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __iter__(self):
+        """ Iterates over slots of pending valid events (in no particular order) """
+        return (key & slot_mask for key in self._entries() if not self._is_stale(key & slot_mask))
+
+    def empty(self) -> bool:
+        while self._size > self._dead and self._is_stale(self._peek_entry() & slot_mask):
+            self._drop(self._pop_entry() & slot_mask)
+        return self._size == self._dead
+
+    def _is_stale(self, slot) -> bool:
+        owner = self._owner[slot]
+        if owner >= 0 and self._token[slot] != self._generation[owner]:
+            return True
+        source = self._source[slot]
+        return source >= 0 and self._source_token[slot] != self._source_generation[source]
+
+    def _drop(self, slot) -> None:
+        """ Accounts for the stale entry of the slot removed from the storage """
+        self._size -= 1
+        owner = self._owner[slot]
+        if owner >= 0 and self._token[slot] != self._generation[owner]:
+            self._dead -= 1
+        elif owner >= 0:
+            # stale because of its source, still counted as pending event of the owner
+            self._live[owner] -= 1
+        self.dropped += 1
+        if self._release is not None:
+            self._release(slot)
+
+    # storage specific part - overridden by other schedulers
+    def _clear_storage(self) -> None:
+        self._heap = []
+
+    def _push_entry(self, key, time) -> None:
+        heappush(self._heap, key)
+
+    def _pop_entry(self):
+        return heappop(self._heap)
+
+    def _peek_entry(self):
+        return self._heap[0]
+
+    def _entries(self):
+        return self._heap
+
+    def _keep(self, keys) -> None:
+        """ Keeps only the given entries """
+        self._heap[:] = keys
+        heapify(self._heap)
+
+    def reserve(self, n: int) -> int:
+        """
+        Reserves n consecutive sequence numbers and returns the first of them.
+        Events pushed later with a reserved sequence number are ordered as if they were pushed now.
+        """
+        first = self._next_sequence
+        self._next_sequence += n
+        return first
+
+    def _grow(self, values, size, fill) -> None:
+        values.extend(array(values.typecode, [fill]) * max(size - len(values), len(values)))
+
+    def push(self, time: float, slot: int, owner=None, sequence=None, source=None) -> None:
+        if slot >= len(self._owner):
+            self._grow(self._owner, slot + 1, -1)
+            self._grow(self._token, slot + 1, 0)
+            self._grow(self._source, slot + 1, -1)
+            self._grow(self._source_token, slot + 1, 0)
+        if source is None:
+            self._source[slot] = -1
+        else:
+            if source >= len(self._source_generation):
+                self._grow(self._source_generation, source + 1, 0)
+            self._source[slot] = source
+            self._source_token[slot] = self._source_generation[source]
+        if owner is None:
+            self._owner[slot] = -1
+        else:
+            if owner >= len(self._generation):
+                self._grow(self._generation, owner + 1, 0)
+                self._grow(self._live, owner + 1, 0)
+            self._owner[slot] = owner
+            self._token[slot] = self._generation[owner]
+            self._live[owner] += 1
+        if sequence is None:
+            sequence = self._next_sequence
+            self._next_sequence += 1
+        self._size += 1
+        self._push_entry(event_key(time, sequence, slot), time)
+
+    def pop(self) -> int:
+        """ Removes and returns slot of the earliest valid event, stale events on the way are dropped """
+        while True:
+            slot = self._pop_entry() & slot_mask
+            owner = self._owner[slot]
+            source = self._source[slot]
+            if (owner >= 0 and self._token[slot] != self._generation[owner]) or \
+                    (source >= 0 and self._source_token[slot] != self._source_generation[source]):
+                self._drop(slot)
+                continue
+            self._size -= 1
+            if owner >= 0:
+                self._live[owner] -= 1
+            return slot
+
+    def peek_time(self) -> float:
+        while self._is_stale(self._peek_entry() & slot_mask):
+            self._drop(self._pop_entry() & slot_mask)
+        return key_time(self._peek_entry())
+
+    def invalidate(self, owner) -> None:
+        """ Marks all pending events of the owner as stale """
+        if owner >= len(self._generation):
+            return
+        self._generation[owner] += 1
+        self._dead += self._live[owner]
+        self._live[owner] = 0
+        if self.compaction_threshold is not None and self._size >= min_size_for_compaction:
+            if self._dead > self.compaction_threshold * self._size:
+                self.compact()
+
+    def invalidate_source(self, source) -> None:
+        """ Marks all pending events depending on the source as stale """
+        if source < len(self._source_generation):
+            self._source_generation[source] += 1
+
+    def compact(self) -> None:
+        """ Rebuilds the storage in place without stale entries """
+        valid = []
+        for key in self._entries():
+            slot = key & slot_mask
+            if self._is_stale(slot):
+                self._drop(slot)
+            else:
+                valid.append(key)
+        self._keep(valid)
+
+    def clear(self) -> None:
+        self._clear_storage()
+        self._next_sequence = 0
+        self._size = 0
+        # owner and source (-1 if none) and their generations at push time, indexed by slot
+        self._owner = array('i')
+        self._token = array('i')
+        self._source = array('i')
+        self._source_token = array('i')
+        # generation and number of pending valid events, indexed by owner
+        self._generation = array('i')
+        self._live = array('i')
+        # generation indexed by source
+        self._source_generation = array('i')
+        self._dead = 0
+        self.dropped = 0
+
+
+class CalendarEventQueue(EventQueue):
+    """
+    Calendar queue (R. Brown, 1988) - a ring of buckets covering `bucket_width` long time slices.
+    Bucket of time t is stored in ring[bucket_id & mask], events of later turns of the ring (years) wait there
+    unsorted until their turn. Push into a future bucket is a plain append, events of the current bucket are taken
+    out of the ring once, sorted, and popped from the front of that sorted list. Pushes into the current bucket
+    (or before it) go to a small heap merged with the sorted list on pop. The ring doubles (up to `max_ring_size`)
+    when events are pushed further than one turn ahead and a full turn without events jumps directly to the earliest
+    pending one.
+    Events are ordered by (time, sequence) within and across buckets, so processing order is exactly the same
+    as in EventQueue.
+
+    Hold model of benchmark_event_queue (1M operations, bucket width 0.25 day) measured 146k (heap) and 184k
+    (calendar) pop+push operations/s at depth 2M, and 235k and 250k at depth 100k. Storage alone is faster
+    (256k and 350k at depth 2M); the rest is validity token bookkeeping, which both queues share.
+    """
+    initial_ring_size = 64
+    max_ring_size = 1 << 16
+
+    def __init__(self, compaction_threshold=default_queue_compaction_threshold,
+                 bucket_width=default_calendar_bucket_width, release=None):
+        self._width = bucket_width
+        self._inverse_width = 1.0 / bucket_width
+        super().__init__(compaction_threshold, release)
+
+    def _clear_storage(self) -> None:
+        self._ring = [[] for _ in range(self.initial_ring_size)]
+        self._mask = self.initial_ring_size - 1
+        # sorted keys of the current bucket (the ones before _head are already popped)
+        # and a heap of keys pushed into the current bucket after it was sorted
+        self._current = []
+        self._head = 0
+        self._late = []
+        self._bucket_id = inf
+
+    def _bucket_of(self, time) -> int:
+        """ Bucket id b such that b * width <= time < (b + 1) * width """
+        bucket_id = floor(time * self._inverse_width)
+        if time < bucket_id * self._width:
+            return bucket_id - 1
+        if time >= (bucket_id + 1) * self._width:
+            return bucket_id + 1
+        return bucket_id
+
+    def _push_entry(self, key, time) -> None:
+        # inlined _bucket_of
+        bucket_id = floor(time * self._inverse_width)
+        if time < bucket_id * self._width:
+            bucket_id -= 1
+        elif time >= (bucket_id + 1) * self._width:
+            bucket_id += 1
+        if bucket_id > self._bucket_id:
+            if bucket_id - self._bucket_id > self._mask and self._mask + 1 < self.max_ring_size:
+                self._grow_ring(bucket_id - self._bucket_id)
+            self._ring[bucket_id & self._mask].append(key)
+        elif self._head < len(self._current) or self._late:
+            heappush(self._late, key)
+        else:
+            # current bucket is exhausted, so the ring can start right before this bucket
+            self._bucket_id = bucket_id - 1
+            self._ring[bucket_id & self._mask].append(key)
+
+    def _pop_entry(self):
+        current, head = self._current, self._head
+        if head < len(current):
+            if self._late and self._late[0] < current[head]:
+                return heappop(self._late)
+            self._head = head + 1
+            return current[head]
+        if self._late:
+            return heappop(self._late)
+        self._next_bucket()
+        self._head = 1
+        return self._current[0]
+
+    def _peek_entry(self):
+        current, head = self._current, self._head
+        if head < len(current):
+            if self._late and self._late[0] < current[head]:
+                return self._late[0]
+            return current[head]
+        if self._late:
+            return self._late[0]
+        self._next_bucket()
+        return self._current[0]
+
+    def _next_bucket(self) -> None:
+        """ Makes the earliest non-empty bucket current, there must be some pending entry in the ring """
+        first = self._bucket_id + 1
+        for bucket_id in range(first, first + self._mask + 1):
+            if self._take(bucket_id):
+                return
+        # no events within a full turn of the ring
+        earliest = min(min(keys) for keys in self._ring if keys)
+        self._take(self._bucket_of(key_time(earliest)))
+
+    def _take(self, bucket_id) -> bool:
+        keys = self._ring[bucket_id & self._mask]
+        if not keys:
+            return False
+        end = event_key((bucket_id + 1) * self._width, 0, 0)
+        current = [key for key in keys if key < end]
+        if not current:
+            return False
+        if len(current) < len(keys):
+            keys[:] = [key for key in keys if key >= end]
+        else:
+            keys.clear()
+        current.sort()
+        self._current = current
+        self._head = 0
+        self._bucket_id = bucket_id
+        return True
+
+    def _grow_ring(self, span) -> None:
+        size = self._mask + 1
+        while size <= span and size < self.max_ring_size:
+            size *= 2
+        keys = [key for bucket in self._ring for key in bucket]
+        self._ring = [[] for _ in range(size)]
+        self._mask = size - 1
+        for key in keys:
+            self._ring[self._bucket_of(key_time(key)) & self._mask].append(key)
+
+    def _entries(self):
+        return chain(islice(self._current, self._head, None), self._late, *self._ring)
+
+    def _keep(self, keys) -> None:
+        keys = set(keys)
+        self._current = [key for key in islice(self._current, self._head, None) if key in keys]
+        self._head = 0
+        self._late = [key for key in self._late if key in keys]
+        heapify(self._late)
+        for bucket in self._ring:
+            bucket[:] = [key for key in bucket if key in keys]
@@ -0,0 +1,105 @@
+"""
+Households of the population as compressed sparse row index
+"""
+import ast
+
+import numpy as np
+import pandas as pd
+
+from .cache import (load_arrays, save_arrays)
+from .constants import (CAPACITY, HOUSEHOLD_ID, ID)
+
+arrays = ('ids', 'offsets', 'members', 'household')
+
+
+class Households:
+    """
+    Households numbered 0, 1, ... in the order of their ids: members of household h are
+    members[offsets[h]:offsets[h + 1]] (in the order of the population csv), ids[h] is its id in the input data
+    and household[person_id] is the household of the person (-1 for indices not used by the population).
+    Arrays can be memory-mapped (see load), pure Python reads (household_of, inhabitants, capacity) go through
+    memoryviews, which return ints much faster than indexing NumPy arrays.
+    """
+    def __init__(self, ids, offsets, members, household):
+        self.ids = ids
+        self.offsets = offsets
+        self.members = members
+        self.household = household
+        self._offsets = memoryview(np.ascontiguousarray(offsets))
+        self._members = memoryview(np.ascontiguousarray(members))
+        self._household = memoryview(np.ascontiguousarray(household))
+
+    @classmethod
+    def from_population(cls, person_ids, household_ids, population_size):
+        """ Households of people with the given household ids (columns of the population csv) """
+        ids, households = np.unique(household_ids, return_inverse=True)
+        members = np.asarray(person_ids)[np.argsort(households, kind='stable')].astype(np.int32)
+        return cls(ids, cls._offsets_of(np.bincount(households)), members,
+                   cls._household_of(person_ids, households, population_size))
+
+    @classmethod
+    def from_csv(cls, path, population_size, indices_of=None):
+        """
+        Households of csv with household id and list of its inhabitants (as in input_df_households.csv),
+        indices_of maps person ids of the csv to person indices (see Population.indices_of)
+        """
+        df = pd.read_csv(path, index_col=HOUSEHOLD_ID, converters={ID: ast.literal_eval})
+        sizes = df[ID].apply(len).values
+        members = np.fromiter((person_id for inhabitants in df[ID] for person_id in inhabitants), dtype=np.int64,
+                              count=sizes.sum())
+        if indices_of is not None:
+            members = indices_of(members)
+        members = members.astype(np.int32)
+        return cls(df.index.values, cls._offsets_of(sizes), members,
+                   cls._household_of(members, np.repeat(np.arange(len(df)), sizes), population_size))
+
+    @staticmethod
+    def _offsets_of(sizes):
+        offsets = np.zeros(len(sizes) + 1, dtype=np.int64)
+        np.cumsum(sizes, out=offsets[1:])
+        return offsets
+
+    @staticmethod
+    def _household_of(person_ids, households, population_size):
+        household = np.full(population_size, -1, dtype=np.int32)
+        household[person_ids] = households
+        return household
+
+    @classmethod
+    def load(cls, directory):
+        """ Households stored by save (with memory-mapped arrays) or None if they were not stored yet """
+        stored = load_arrays(directory, arrays)
+        if stored is None:
+            return None
+        return cls(**stored)
+
+    def save(self, directory) -> None:
+        save_arrays(directory, {name: getattr(self, name) for name in arrays})
+
+    def __len__(self):
+        return len(self.ids)
+
+    def sizes(self):
+        return np.diff(self.offsets)
+
+    def household_of(self, person_id):
+        return self._household[person_id]
+
+    def inhabitants(self, household):
+        """ List of people living in the household """
+        return self._members[self._offsets[household]:self._offsets[household + 1]].tolist()
+
+    def capacity(self, household):
+        return self._offsets[household + 1] - self._offsets[household]
+
+    def to_data_frame(self, ids=None):
+        """
+        Households as data frame of input_df_households.csv,
+        with person ids from ids (array indexed by person index) instead of person indices if it is given
+        """
+        offsets = self.offsets
+        members = np.asarray(self.members, dtype=np.int64)
+        if ids is not None:
+            members = np.asarray(ids, dtype=np.int64)[members]
+        inhabitants = [members[offsets[h]:offsets[h + 1]].tolist() for h in range(len(self))]
+        return pd.DataFrame({ID: inhabitants, CAPACITY: self.sizes()}, index=pd.Index(self.ids, name=HOUSEHOLD_ID))
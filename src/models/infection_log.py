@@ -0,0 +1,103 @@
+"""
+Append-only columnar log of infections
+"""
+from array import array
+from bisect import bisect_right
+
+import numpy as np
+import pandas as pd
+
+from .constants import (SOURCE, TARGET, CONTRACTION_TIME, KERNEL)
+from .states_and_functions import kernels
+
+default_chunk_size = 1 << 16
+
+_kernel_names = np.array(kernels, dtype=object)
+
+
+class InfectionLog:
+    """
+    Infections in the order they happened: int32 source (-1 if none), int32 target, float64 contraction time
+    and uint8 kernel code (index in `kernels`), 17 bytes per infection.
+    Columns are kept in chunks of `chunk_size` records, so appending never copies more than one chunk.
+    Infections are logged at the current simulation time, hence contraction times are non-decreasing.
+    """
+    def __init__(self, chunk_size=default_chunk_size):
+        self._chunk_size = chunk_size
+        self.clear()
+
+    def __len__(self):
+        return self._size
+
+    def _new_chunk(self) -> None:
+        self._source_chunks.append(array('i'))
+        self._target_chunks.append(array('i'))
+        self._time_chunks.append(array('d'))
+        self._kernel_chunks.append(array('B'))
+
+    def append(self, source, target, time, kernel_code) -> None:
+        if self._size % self._chunk_size == 0:
+            self._new_chunk()
+        self._source_chunks[-1].append(-1 if source is None else source)
+        self._target_chunks[-1].append(target)
+        self._time_chunks[-1].append(time)
+        self._kernel_chunks[-1].append(kernel_code)
+        self._size += 1
+
+    def extend(self, sources, targets, times, kernel_codes) -> None:
+        """ Appends infections given as NumPy arrays (source -1 if none) """
+        done = 0
+        while done < len(targets):
+            if self._size % self._chunk_size == 0:
+                self._new_chunk()
+            part = slice(done, min(len(targets), done + self._chunk_size - len(self._time_chunks[-1])))
+            self._source_chunks[-1].frombytes(np.asarray(sources[part], dtype=np.int32).tobytes())
+            self._target_chunks[-1].frombytes(np.asarray(targets[part], dtype=np.int32).tobytes())
+            self._time_chunks[-1].frombytes(np.asarray(times[part], dtype=np.float64).tobytes())
+            self._kernel_chunks[-1].frombytes(np.asarray(kernel_codes[part], dtype=np.uint8).tobytes())
+            self._size += part.stop - done
+            done = part.stop
+
+    def count_until(self, time) -> int:
+        """ Number of infections with contraction time <= time """
+        count = 0
+        for chunk in self._time_chunks:
+            if chunk[-1] <= time:
+                count += len(chunk)
+            else:
+                return count + bisect_right(chunk, time)
+        return count
+
+    @staticmethod
+    def _column(chunks, dtype):
+        if not chunks:
+            return np.empty(0, dtype=dtype)
+        return np.concatenate([np.frombuffer(chunk, dtype=dtype) for chunk in chunks])
+
+    def to_frame(self, until=None, ids=None) -> pd.DataFrame:
+        """
+        DataFrame with source, target, contraction time and kernel name columns (source is empty for
+        infections without source). If `until` is given only infections contracted until that time are included.
+        If ids (array indexed by person index) is given, person ids from it are used instead of person indices.
+        """
+        size = self._size if until is None else self.count_until(until)
+        source = self._column(self._source_chunks, np.int32)[:size]
+        target = self._column(self._target_chunks, np.int32)[:size]
+        if ids is not None:
+            source = np.where(source < 0, -1, ids[source])
+            target = ids[target]
+        sources = pd.array(source, dtype='Int64')
+        sources[source < 0] = pd.NA
+        return pd.DataFrame({
+            SOURCE: sources,
+            TARGET: target,
+            CONTRACTION_TIME: self._column(self._time_chunks, np.float64)[:size],
+            KERNEL: _kernel_names[self._column(self._kernel_chunks, np.uint8)[:size]]
+        })
+
+    def clear(self) -> None:
+        self._source_chunks = []
+        self._target_chunks = []
+        self._time_chunks = []
+        self._kernel_chunks = []
+        self._size = 0
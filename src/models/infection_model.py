@@ -1,13 +1,13 @@
 """
 This is mostly based on references/infection_alg.pdf
 """
-import ast
 from functools import (lru_cache, partial)
 import json
 import logging
 import mocos_helper
 #import random
 import time
+from bisect import bisect_right
 from collections import defaultdict
 import pickle
 import psutil
@@ -16,12 +16,25 @@ from math import log
 
 from git import Repo
 import pandas as pd
-import scipy.optimize
 import scipy.stats
 
 from src.models.schemas import *
 from src.models.defaults import *
 from src.models.states_and_functions import *
+from src.models.event_queue import (EventQueue, CalendarEventQueue)
+from src.models.event_pool import EventPool
+from src.models.progression_times import ProgressionTimes
+from src.models.progression_realizations import ProgressionRealizations
+from src.models.infection_log import InfectionLog
+from src.models.r_out_schedule import ROutSchedule
+from src.models.buffered_random import BufferedRandom
+from src.models.cache import (cache_path, default_cache_dir, file_checksum, load_array, save_array)
+from src.models.households import Households
+from src.models.population import (Population, read_population)
+from src.models.population_hdf5 import is_hdf5_population
+from src.models.person_random import (CONTACTS_STREAM, CONTRACTION_STREAM, IMPORT_STREAM, PROGRESSION_STREAM,
+                                      PersonStreams, person_uniform, person_uniforms, sample_few, time_bits)
+from src.models.day_step_engine import DayStepEngine
 from src.visualization.visualize import Visualize
 
 
@@ -29,9 +42,6 @@ import click
 
 from dotenv import find_dotenv, load_dotenv
 
-from queue import (PriorityQueue)
-q = PriorityQueue()
-
 
 class InfectionModel:
     def __init__(self, params_path: str, df_individuals_path: str, df_households_path: str = '') -> None:
@@ -55,15 +65,10 @@ class InfectionModel:
         self._max_time = None
         self._vis = None
         self._max_time_offset = 0.0
+        # drawn for every seed or, with reuse_expected_case_severities, at the first seed only
         self._expected_case_severity = None
-        self._df_individuals = None
-        self._df_households = None
-        #self._individuals_gender = None
-        self._individuals_age = None
-        self._individuals_household_id = None
-        self._individuals_indices = None
-        self._households_capacities = None
-        self._households_inhabitants = None
+        self._population = None
+        self._households = None
         self._init_for_stats = None
 
         self._affected_people = 0
@@ -79,11 +84,36 @@ class InfectionModel:
         self._infection_status = None
         self._detection_status = None
         self._quarantine_status = None
-        self._expected_case_severity = None
-        if self._params[REUSE_EXPECTED_CASE_SEVERITIES]:
-            self._expected_case_severity = self.draw_expected_case_severity()
-        self._infections_dict = None
-        self._progression_times_dict = None
+        # seed of per-person severity draws with lazy_expected_case_severities
+        self._lazy_severity_seed = None
+        self._severity_cdfs = self._age_induced_severity_cdfs()
+        self._infection_log = None
+        self._progression_times = None
+        # with reuse_time_distribution_realizations, drawn at the first seed and kept for the following ones
+        self._progression_realizations = None
+        self._progression_chains = None
+        self._earliest_certain_contraction = None
+        self._pruned_contractions = 0
+        self._imports_scheduled = 0
+        self._event_pool = EventPool()
+        if self._params[SCHEDULER] == Schedulers.Calendar:
+            self.event_queue = CalendarEventQueue(self._params[QUEUE_COMPACTION_THRESHOLD],
+                                                  self._params[CALENDAR_BUCKET_WIDTH],
+                                                  release=self._event_pool.release)
+        else:
+            self.event_queue = EventQueue(self._params[QUEUE_COMPACTION_THRESHOLD],
+                                          release=self._event_pool.release)
+        event_handlers = {
+            TMINUS1_CODE: self._handle_tminus1,
+            T0_CODE: self._handle_t0,
+            T1_CODE: self._handle_t1,
+            T2_CODE: self._handle_t2,
+            TDEATH_CODE: self._handle_tdeath,
+            TRECOVERY_CODE: self._handle_trecovery,
+            TDETECTION_CODE: self._handle_tdetection
+        }
+        # handlers of events caused by disease progression or contraction, indexed by event type code
+        self._event_handlers = tuple(event_handlers[code] for code in range(len(event_types)))
 
         t0_f, t0_args, t0_kwargs = self.setup_random_distribution(T0)
         self.rv_t0 = lambda: t0_f(*t0_args, **t0_kwargs)
@@ -104,6 +134,8 @@ class InfectionModel:
         self.fear_scale = dict()
         self.fear_loc = dict()
         self.fear_limit_value = dict()
+        self.fear_time_dependent = dict()
+        self._fear_cache = dict()
 
         self.serial_intervals = []
 
@@ -116,6 +148,18 @@ class InfectionModel:
         self._constant_age_individuals = defaultdict(list)
         self._setup_constant_age_kernel()
 
+        # scalar draws of kernels and disease progression, see _set_up_random
+        self._random = mocos_helper
+        self._person_streams = None
+        self._person_samplers = None
+
+        self._r_out_schedule = None
+        if len(self._params[R_OUT_SCHEDULE]) > 0:
+            self._r_out_schedule = ROutSchedule(self._params[R_OUT_SCHEDULE])
+        # schedule times are known upfront only if zero time is not moved by detections
+        self._r_out_schedule_sampled = (self._r_out_schedule is not None
+                                        and not self._params[MOVE_ZERO_TIME_ACCORDING_TO_DETECTED])
+
     def _setup_constant_age_kernel(self):
         if self._params[CONSTANT_AGE_SETUP] is None:
             self._disable_constant_age_kernel = True
@@ -132,134 +176,272 @@ class InfectionModel:
                 for i, age in enumerate(self._params[CONSTANT_AGE_SETUP][AGE]):
                     self._constant_age_helper_age_dict[age] = i
         for age, individual_list_key in self._constant_age_helper_age_dict.items():
-            self._constant_age_individuals[individual_list_key].extend([
-                k for k, v in self._individuals_age_dct.items() if v==age
-            ])
+            population = self._population
+            self._constant_age_individuals[individual_list_key].extend(
+                population.indices[population.rows(population.age) == age].tolist())
 
     def get_detection_status_(self, person_id):
-        return self._detection_status.get(person_id, default_detection_status)
+        state = self._detection_status[person_id]
+        return default_detection_status if state == NO_DETECTION_STATE else detection_statuses[state]
 
     def get_quarantine_status_(self, person_id):
-        return self._quarantine_status.get(person_id, default_quarantine_status)
+        return quarantine_statuses[self._quarantine_status[person_id]]
 
     def get_infection_status(self, person_id):
-        return self._infection_status.get(person_id, InfectionStatus.Healthy.value)
+        return infection_statuses[self._infection_status[person_id]]
+
+    def _new_state_array(self, state=0):
+        """ int8 array holding state codes of all people, indexed by person index """
+        return np.full(self._population_size, state, dtype=np.int8)
+
+    def _states_to_dict(self, states, statuses, person_indices):
+        """ Statuses of the people keyed by person ids of the csv """
+        person_ids = self._population.to_external(person_indices)
+        return {int(person_id): statuses[state] for person_id, state in zip(person_ids, states[person_indices])}
+
+    @property
+    def infection_status(self):
+        """ Infection status (value of InfectionStatus) of everybody affected by the epidemic """
+        return self._states_to_dict(self._infection_status, infection_statuses,
+                                    np.flatnonzero(self._infection_status != HEALTHY_STATE))
+
+    @property
+    def detection_status(self):
+        """ Detection status (value of DetectionStatus) of everybody infected during the simulation """
+        return self._states_to_dict(self._detection_status, detection_statuses,
+                                    np.flatnonzero(self._detection_status != NO_DETECTION_STATE))
+
+    @property
+    def quarantine_status(self):
+        """ Quarantine status (value of QuarantineStatus) of everybody in quarantine """
+        return self._states_to_dict(self._quarantine_status, quarantine_statuses,
+                                    np.flatnonzero(self._quarantine_status != NO_QUARANTINE_STATE))
 
     @staticmethod
     def parse_random_seed(random_seed):
         mocos_helper.seed(random_seed)
 
+    def _set_up_random(self, random_seed) -> None:
+        """
+        With random_buffer_size, rand/uniform/exponential/poisson draws come from BufferedRandom.
+        With counter_based_random, kernels and disease progression draw from counter-based streams of people instead,
+        see _stream.
+        """
+        self._close_random()
+        if self._params[RANDOM_BUFFER_SIZE]:
+            self._random = BufferedRandom(random_seed, self._params[RANDOM_BUFFER_SIZE],
+                                          self._params[RANDOM_BUFFER_BACKGROUND])
+        self._person_streams = None
+        if self._params[COUNTER_BASED_RANDOM]:
+            self._person_streams = PersonStreams(random_seed)
+            self._person_samplers = {t: self.numpy_sampler(t) for t in (T0, T1, T2, TDEATH)}
+
+    def _close_random(self) -> None:
+        if self._random is not mocos_helper:
+            self._random.close()
+        self._random = mocos_helper
+
+    def _stream(self, person_id, purpose, first=0, second=0, third=0):
+        """
+        Source of random numbers of the person for the purpose: self._random or, with counter_based_random,
+        the counter-based stream keyed by seed, person id of the csv, purpose, first, second and third. Then the draws
+        do not depend on the order of events, so reordered or batched executions can reproduce the trajectory exactly
+        (initial conditions and people met through the friendship kernel still come from mocos_helper).
+        """
+        if self._person_streams is None:
+            return self._random
+        return self._person_streams.stream(self._population.id_of(person_id), purpose, first, second, third)
+
+    def _sample_few(self, random, population, size, excluded):
+        """
+        mocos_helper.nonreplace_sample_few or, with counter_based_random, its counterpart drawing from random.
+        size is capped at the number of other people, which small (e.g. regional, see population_filter) populations
+        can run out of
+        """
+        if self._person_streams is None:
+            return mocos_helper.nonreplace_sample_few(population, min(size, len(population) - 1), excluded)
+        return sample_few(random, population, size, excluded)
+
     def _set_up_data_frames(self) -> None:
         """
-        The purpose of this method is to set up two dataframes.
-        One is self._df_individuals that stores features for the population
-        Second is self._df_households that stores list of people idx per household
-        building df_households is time consuming, therefore we try to reuse previously computed df_households
+        The purpose of this method is to set up self._population that stores features for the population
+        and self._households index of people per household (see _set_up_households).
+        With population_cache, columns of the population are memory-mapped from their binary copy
+        (see population_cache) instead of parsing the csv, HDF5/JLD2 populations (e.g. of the Julia engine) are
+        memory-mapped the same way (see population_hdf5). With household_contiguous_indices, people get person
+        indices ordered by household (see Population) and person ids of the csv are used in inputs and outputs only.
+        population_columns and population_filter select columns and households to load (see read_population),
+        people of a filtered population are always relabelled, so per-person arrays fit them rather than the whole csv.
         :return:
         """
-        logger.info('Set up data frames: Reading population csv...')
-        self._df_individuals = pd.read_csv(self.df_individuals_path)
-        self._df_individuals.index = self._df_individuals.idx
-        self._individuals_age = self._df_individuals[AGE].values
-        self._individuals_age_dct = self._df_individuals[AGE].to_dict()
-        self._individuals_gender_dct = self._df_individuals[GENDER].to_dict()
-        self._individuals_household_id = self._df_individuals[HOUSEHOLD_ID].to_dict()
-        self._individuals_indices = self._df_individuals.index.values
-        if SOCIAL_COMPETENCE in self._df_individuals.columns:
+        if is_hdf5_population(self.df_individuals_path):
+            logger.info('Set up data frames: Loading population columns from HDF5...')
+        elif self._params[POPULATION_CACHE]:
+            logger.info('Set up data frames: Loading cached population columns...')
+        else:
+            logger.info('Set up data frames: Reading population csv...')
+        columns = read_population(self.df_individuals_path, self._params[POPULATION_COLUMNS],
+                                  self._params[POPULATION_FILTER], cached=self._params[POPULATION_CACHE],
+                                  cache_dir=self._cache_dir)
+        relabel = self._params[HOUSEHOLD_CONTIGUOUS_INDICES] or self._params[POPULATION_FILTER] is not None
+        self._population = Population(columns, relabel=relabel)
+        # person ids are used as indices of per-person state arrays
+        self._population_size = self._population.size
+        population = self._population
+        if population.social_competence is not None:
             if self._params[TRANSMISSION_PROBABILITIES][FRIENDSHIP] == 0:
                 logger.info('Friendship = 0.0 - Disable friendship kernel...')
                 self._disable_friendship_kernel = True
             else:
                 logger.info('Set up data frames: Social competence and loading social activity sampler...')
-                self._social_activity_scores = self._df_individuals[SOCIAL_COMPETENCE].to_dict()
-
+                # mocos_helper accepts 64-bit integers only, cached columns are downcast
                 self._social_activity_sampler = mocos_helper.AgeDependentFriendSampler(
-                    self._individuals_indices,
-                    self._individuals_age,
-                    self._df_individuals[GENDER].values,
-                    self._df_individuals[SOCIAL_COMPETENCE].values
+                    population.indices,
+                    population.rows(population.age).astype(np.int64),
+                    population.rows(population.gender).astype(np.int64),
+                    population.rows(population.social_competence)
                 )
                 self._disable_friendship_kernel = False
         else:
             logger.info('Social competence missing - Disable friendship kernel...')
             self._disable_friendship_kernel = True
-        logger.info('Set up data frames: Building households df...')
+        logger.info('Set up data frames: Building households index...')
+        self._set_up_households()
+
+    @property
+    def _cache_dir(self):
+        return self._params[CACHE_DIR] or default_cache_dir
 
-        if os.path.exists(self.df_households_path):
-            self._df_households = pd.read_csv(self.df_households_path, index_col=HOUSEHOLD_ID,
-                                              converters={ID: ast.literal_eval})
+    def _set_up_households(self) -> None:
+        """
+        Households index is built from csv at df_households_path (with lists of people idx per household) if it exists
+        and the population is not filtered, and from household ids of the population otherwise (then the csv is written
+        for later runs, unless the population is filtered).
+        With households_cache, the index is cached in cache_dir as binary arrays (memory-mapped on load),
+        so neither the csv nor the population is grouped again by later processes.
+        """
+        households_csv = os.path.exists(self.df_households_path) and self._params[POPULATION_FILTER] is None
+        path = None
+        if self._params[HOUSEHOLDS_CACHE]:
+            key = [file_checksum(self.df_individuals_path),
+                   file_checksum(self.df_households_path) if households_csv else None,
+                   self._params[HOUSEHOLD_CONTIGUOUS_INDICES], self._params[POPULATION_FILTER]]
+            path = cache_path('households', key, self._cache_dir, suffix='')
+            self._households = Households.load(path)
+            if self._households is not None:
+                logger.info(f'Households loaded from {path}')
+                return
+        if households_csv:
+            self._households = Households.from_csv(self.df_households_path, self._population_size,
+                                                   self._population.indices_of)
         else:
-            self._df_households = pd.DataFrame({ID: self._df_individuals.groupby(HOUSEHOLD_ID)[ID].apply(list)})
-            os.makedirs(os.path.dirname(self.df_households_path), exist_ok=True)
-            self._df_households.to_csv(self.df_households_path)
-        self._df_households[CAPACITY] = self._df_households[ID].apply(lambda x: len(x))
-        d = self._df_households.to_dict()
-        self._households_inhabitants = d[ID] #self._df_households[ID]
-        self._households_capacities = d[CAPACITY] #self._df_households[CAPACITY]
-        if not self._params[LOG_OUTPUTS]:
-            self._df_households = None
-            self._df_individuals = None
+            population = self._population
+            self._households = Households.from_population(population.indices, population.rows(population.household_id),
+                                                          population.size)
+            if self._params[POPULATION_FILTER] is None:
+                os.makedirs(os.path.dirname(self.df_households_path), exist_ok=True)
+                self._households.to_data_frame(population.ids).to_csv(self.df_households_path)
+        if path is not None:
+            self._households.save(path)
+
+    def append_event(self, time, person_id, type_, initiated_by, initiated_through, owner=None,
+                     source=None) -> None:
+        """
+        Stores the event in the event pool and schedules it. type_ and initiated_through are integer codes
+        (see event_types and kernels in states_and_functions).
+        Owner is the person whose state makes the event meaningful - all pending events of a person
+        are invalidated (and dropped by the queue) once the person is infected, dies or recovers.
+        Source is the infecting person of a contraction - its events are invalidated once it leaves active states
+        (goes to hospital, dies or recovers), as they could not infect anybody anymore
+        """
+        slot = self._event_pool.allocate(time, person_id, type_, initiated_by, initiated_through)
+        self.event_queue.push(time, slot, owner, source=source)
 
-    @staticmethod
-    def append_event(event: Event) -> None:
-        q.put(event)
+    def append_contraction_event(self, contraction_time, person_id, initiated_by, initiated_through) -> None:
+        """
+        Schedules TMINUS1 event of person_id caused by initiated_by through the given kernel (code).
+        With prune_dominated_contractions, the event is not scheduled at all when the person already has
+        a pending contraction that is certain to happen earlier. Certain contractions are the household ones
+        (they are never thinned by quick_return_condition nor blocked by quarantine) that happen before death
+        of the infecting person, so the infecting person is still active at contraction time.
+        """
+        if self._params[PRUNE_DOMINATED_CONTRACTIONS]:
+            earliest = self._earliest_certain_contraction.get(person_id)
+            if earliest is not None and earliest < contraction_time:
+                self._pruned_contractions += 1
+                return
+            # before start time infecting person can still be made immune by initial conditions
+            if initiated_through == HOUSEHOLD_CODE and self._global_time > self._params[START_TIME]:
+                tdeath = self._progression_times.get(initiated_by, TDEATH)
+                if tdeath is None or contraction_time < tdeath:
+                    self._earliest_certain_contraction[person_id] = contraction_time
+        self.append_event(contraction_time, person_id, TMINUS1_CODE, initiated_by, initiated_through,
+                          owner=person_id, source=initiated_by)
+
+    @property
+    def pending_events(self):
+        """ Decoded events that are still waiting in the queue """
+        return [self._event_pool.get(slot) for slot in self.event_queue]
 
     def _fill_queue_based_on_auxiliary_functions(self) -> None:
-        # TODO: THIS IS NOT WORKING WHEN CAP = INF, let's fix it
-        #  (one possible way to fix it: generate say first N events and a followup "filling EVENT"
-        #  on time T(N) of N-th event - at T(N) generate N more events and enqueue next portion.
-        #  Alternatively add just one event of type AUXILIARY_FUNCTION/IMPORT_INTENSITY
-        #  that will then draw time of next event of that type
         """
         The purpose of this method is to mark some people of the population as sick according to provided function.
         Possible functions: see possible values of ImportIntensityFunctions enum
         Outcome of the function can be adjusted by overriding default parameters:
         multiplier, rate, cap, infectious_probability.
+        i-th imported case happens at time t such that function(t) = i. Only the first import is scheduled here,
+        every import event schedules the next one (see _schedule_next_import), so cap can be infinite.
         :return:
         """
-        def _generate_event_times(func, rate, multiplier, cap, root_buffer=100, root_guess=0) -> list:
-            """
-            Here a naive way of generating event times is proposed.
-            The idea is to generate N events
-            :param func: currently two functions are supported: exponential a*exp(r*t) and polynomial a*r^t
-            :param rate: a parameter that is making the slope more steep
-            :param multiplier: a parameter that scales the time down
-            :param cap: the maximum amount of cases generated and added to queue list
-            :param root_buffer: one-directional range to find roots in
-            :param root_guess: guess on first solution (i=1)
-            :return:
-            """
-            root_min = root_guess - root_buffer
-            root_max = root_guess + root_buffer
-            time_events_ = []
-
-            def bisect_fun(x, integer):
-                return func(x, rate=rate, multiplier=multiplier) - integer
-
-            for i in range(1, 1 + cap):
-                bisect_fun = partial(bisect_fun, integer=i)
-                root = scipy.optimize.bisect(bisect_fun, root_min, root_max)
-                time_events_.append(root)
-                root_min = root
-                root_max = root + root_buffer
-            return time_events_
-
+        self._imports_scheduled = 0
         import_intensity = self._params[IMPORT_INTENSITY]
         f_choice = ImportIntensityFunctions(import_intensity[FUNCTION])
-        if f_choice == ImportIntensityFunctions.NoImport:
+        if f_choice == ImportIntensityFunctions.NoImport or import_intensity[CAP] == 0:
+            return
+        growth = import_intensity[RATE]
+        if f_choice == ImportIntensityFunctions.Polynomial:
+            growth -= 1
+        if import_intensity[MULTIPLIER] <= 0 or growth <= 0:
+            raise ValueError(f'import intensity function has to be increasing: {import_intensity}')
+        self._schedule_next_import()
+
+    def _schedule_next_import(self) -> None:
+        import_intensity = self._params[IMPORT_INTENSITY]
+        if self._imports_scheduled >= import_intensity[CAP]:
             return
-        func = import_intensity_functions[f_choice]
-        multiplier = import_intensity[MULTIPLIER]
-        rate = import_intensity[RATE]
-        cap = import_intensity[CAP]
-        infectious_prob = import_intensity[INFECTIOUS]
-        event_times = _generate_event_times(func=func, rate=rate, multiplier=multiplier, cap=cap)
-        for event_time in event_times:
-            person_id = self._individuals_indices[mocos_helper.randint(0, len(self._individuals_indices))]
-            t_state = TMINUS1
-            if mocos_helper.rand() < infectious_prob:
-                t_state = T0
-            self.append_event(Event(event_time, person_id, t_state, None, IMPORT_INTENSITY, self.global_time))
+        self._imports_scheduled += 1
+        inverse = import_intensity_inverse_functions[ImportIntensityFunctions(import_intensity[FUNCTION])]
+        event_time = inverse(self._imports_scheduled, rate=import_intensity[RATE],
+                             multiplier=import_intensity[MULTIPLIER])
+        if self._person_streams is None:
+            random = self._random
+            person_id = self._population.indices[mocos_helper.randint(0, len(self._population) - 1)]
+        else:
+            # keyed by the number of the import instead of a person
+            random = self._person_streams.stream(self._imports_scheduled, IMPORT_STREAM)
+            person_id = self._population.indices[random.integers(len(self._population))]
+        t_state = TMINUS1_CODE
+        if random.rand() < import_intensity[INFECTIOUS]:
+            t_state = T0_CODE
+        # not owned by the person - the chain of imports has to go on even if the person is infected in the meantime
+        self.append_event(event_time, person_id, t_state, None, IMPORT_INTENSITY_CODE)
+
+    def _initial_conditions_in_population(self, initial_conditions):
+        """
+        Pairs of person index and initial condition of schema v1. People missing from the population are an error,
+        unless the population is filtered (see population_filter) - then they are skipped.
+        """
+        person_indices = self._population.indices_of([condition[PERSON_INDEX] for condition in initial_conditions])
+        for person_idx, initial_condition in zip(person_indices.tolist(), initial_conditions):
+            if person_idx >= 0:
+                yield person_idx, initial_condition
+                continue
+            err_msg = f'person {initial_condition[PERSON_INDEX]} of initial conditions is not in the population'
+            if self._params[POPULATION_FILTER] is None:
+                logger.error(err_msg)
+                raise ValueError(err_msg)
+            # people outside of the region of a filtered population
+            logger.warning(f'{err_msg}, skipped')
 
     def _fill_queue_based_on_initial_conditions(self):
         """
@@ -272,27 +454,26 @@ class InfectionModel:
         """
         def _assign_t_state(status):
             if status == CONTRACTION:
-                return TMINUS1
+                return TMINUS1_CODE
             if status == INFECTIOUS:
-                return T0
+                return T0_CODE
             if status == IMMUNE:
-                return TRECOVERY
+                return TRECOVERY_CODE
             raise ValueError(f'invalid initial infection status {status}')
 
         initial_conditions = self._params[INITIAL_CONDITIONS]
         if isinstance(initial_conditions, list):  # schema v1
-            for initial_condition in initial_conditions:
-                person_idx = initial_condition[PERSON_INDEX]
+            for person_idx, initial_condition in self._initial_conditions_in_population(initial_conditions):
                 t_state = _assign_t_state(initial_condition[INFECTION_STATUS])
                 if EXPECTED_CASE_SEVERITY in initial_condition:
-                    self._expected_case_severity[person_idx] = initial_condition[EXPECTED_CASE_SEVERITY]
-                self.append_event(Event(initial_condition[CONTRACTION_TIME], person_idx, t_state, None,
-                                        INITIAL_CONDITIONS, self.global_time))
+                    self._expected_case_severity[person_idx] = case_severity_codes[
+                        initial_condition[EXPECTED_CASE_SEVERITY]]
+                self.append_event(initial_condition[CONTRACTION_TIME], person_idx, t_state, None,
+                                  INITIAL_CONDITIONS_CODE)
         elif isinstance(initial_conditions, dict):  # schema v2
             if initial_conditions[SELECTION_ALGORITHM] == InitialConditionSelectionAlgorithms.RandomSelection.value:
                 # initially all indices can be drawn
-                #choice_set = self._individuals_indices# self._df_individuals.index.values
-                choice_set = list(self._individuals_indices)
+                choice_set = list(self._population.indices)
                 for infection_status, cardinality in initial_conditions[CARDINALITIES].items():
                     if cardinality > 0:
                         if cardinality < 1:
@@ -310,10 +491,9 @@ class InfectionModel:
                         t_state = _assign_t_state(infection_status)
                         for row in selected_rows:
                             whom = None
-                            if t_state == TRECOVERY:
+                            if t_state == TRECOVERY_CODE:
                                 whom = row
-                            self.append_event(Event(self.global_time, row, t_state, whom, INITIAL_CONDITIONS,
-                                                    self.global_time))
+                            self.append_event(self.global_time, row, t_state, whom, INITIAL_CONDITIONS_CODE)
             else:
                 err_msg = f'Unsupported selection algorithm provided {initial_conditions[SELECTION_ALGORITHM]}'
                 logger.error(err_msg)
@@ -329,7 +509,8 @@ class InfectionModel:
 
     @property
     def df_individuals(self):
-        return self._df_individuals
+        """ Population as data frame (made on demand, the model keeps self._population only) """
+        return self._population.to_data_frame()
 
     @property
     def stop_simulation_threshold(self):
@@ -363,26 +544,105 @@ class InfectionModel:
     def deaths(self):
         return self._deaths
 
-    def draw_expected_case_severity(self):
+    @property
+    def expected_case_severity(self):
+        """ Expected case severity (value of ExpectedCaseSeverity) of everybody """
+        return self._states_to_dict(self._expected_case_severity, case_severities,
+                                    np.flatnonzero(self._expected_case_severity >= 0))
+
+    def _age_induced_severity_distributions(self):
+        """ Yields (min age, max age, weights of case_severity_distribution keys) of every age cohort """
         case_severity_dict = self.case_severity_distribution
-        keys = list(case_severity_dict.keys())
-        d = {}
         for age_min, age_max, fatality_prob in default_age_induced_fatality_rates:
-            cond_lb = self._individuals_age >= age_min
-            cond_ub = self._individuals_age < age_max
-            cond = np.logical_and(cond_lb, cond_ub)
-            if np.count_nonzero(cond) == 0:
-                continue
             age_induced_severity_distribution = dict()
             age_induced_severity_distribution[CRITICAL] = fatality_prob/self._params[DEATH_PROBABILITY][CRITICAL]
             for x in case_severity_dict:
                 if x != CRITICAL:
                     age_induced_severity_distribution[x] = case_severity_dict[x] / (1 - case_severity_dict[CRITICAL]) * (1 - age_induced_severity_distribution[CRITICAL])
-            realizations = mocos_helper.sample_with_replacement_shuffled((age_induced_severity_distribution[x] for x in case_severity_dict), len(self._individuals_indices[cond]))
-            values = [keys[r] for r in realizations]
-            df = pd.DataFrame(values, index=self._individuals_indices[cond])
-            d = {**d, **df.to_dict()[0]}
-        return d
+            yield age_min, age_max, [age_induced_severity_distribution[x] for x in case_severity_dict]
+
+    def draw_expected_case_severity(self):
+        """ int8 array of expected case severity codes (indices in case_severities) indexed by person index """
+        codes = np.array([case_severity_codes[x] for x in self.case_severity_distribution], dtype=np.int8)
+        severity = np.full(self._population_size, -1, dtype=np.int8)
+        ages = self._population.rows(self._population.age)
+        for age_min, age_max, weights in self._age_induced_severity_distributions():
+            cond = (ages >= age_min) & (ages < age_max)
+            cohort = self._population.indices[cond]
+            if len(cohort) == 0:
+                continue
+            realizations = mocos_helper.sample_with_replacement_shuffled(weights, len(cohort))
+            severity[cohort] = codes[np.fromiter(realizations, dtype=np.int64, count=len(cohort))]
+        return severity
+
+    def _age_induced_severity_cdfs(self):
+        """ (min age, max age, inner bounds of the cumulative distribution, severity codes) of every age cohort """
+        codes = tuple(case_severity_codes[x] for x in self.case_severity_distribution)
+        cdfs = []
+        for age_min, age_max, weights in self._age_induced_severity_distributions():
+            cdf = np.cumsum(weights) / np.sum(weights)
+            cdfs.append((age_min, age_max, cdf[:-1].tolist(), codes))
+        return cdfs
+
+    def _draw_case_severity(self, person_id):
+        """
+        Draws expected case severity of the person from its own random stream (lazy_expected_case_severities),
+        so the result does not depend on when and after whom the person got infected
+        """
+        age = self._population.age_of(person_id)
+        u = person_uniform(self._lazy_severity_seed, self._population.id_of(person_id))
+        severity = -1
+        for age_min, age_max, cdf, codes in self._severity_cdfs:
+            if age_min <= age < age_max:
+                severity = codes[bisect_right(cdf, u)]
+                break
+        self._expected_case_severity[person_id] = severity
+        return severity
+
+    def _draw_case_severities(self, person_ids, ages):
+        """ _draw_case_severity for arrays of people and their ages, returns severity codes """
+        u = person_uniforms(self._lazy_severity_seed, self._population.to_external(person_ids))
+        severity = np.full(len(person_ids), -1, dtype=np.int8)
+        for age_min, age_max, cdf, codes in self._severity_cdfs:
+            cohort = (ages >= age_min) & (ages < age_max)
+            severity[cohort] = np.asarray(codes, dtype=np.int8)[np.searchsorted(cdf, u[cohort], side='right')]
+        self._expected_case_severity[person_ids] = severity
+        return severity
+
+    def _new_expected_case_severity(self, seed):
+        """ Severities of a simulation run with the seed, drawn up front or on demand """
+        if self._params[LAZY_EXPECTED_CASE_SEVERITIES]:
+            self._lazy_severity_seed = seed
+            return np.full(self._population_size, -1, dtype=np.int8)
+        if self._params[REUSE_EXPECTED_CASE_SEVERITIES]:
+            severity = self._reused_expected_case_severity(seed)
+            self.parse_random_seed(seed)
+            return severity
+        return self.draw_expected_case_severity()
+
+    def _reused_expected_case_severity(self, seed):
+        """
+        Severities drawn with the given seed, stored in the on-disk cache keyed by population file, severity
+        distribution and seed, so other processes simulating the same population skip the draw
+        """
+        key = {
+            'population': file_checksum(self.df_individuals_path),
+            HOUSEHOLD_CONTIGUOUS_INDICES: self._params[HOUSEHOLD_CONTIGUOUS_INDICES],
+            POPULATION_FILTER: self._params[POPULATION_FILTER],
+            CASE_SEVERITY_DISTRIBUTION: self.case_severity_distribution,
+            DEATH_PROBABILITY: self._params[DEATH_PROBABILITY],
+            'age_induced_fatality_rates': default_age_induced_fatality_rates,
+            RANDOM_SEED: seed,
+        }
+        path = cache_path(EXPECTED_CASE_SEVERITY, key, self._cache_dir)
+        severity = load_array(path)
+        if severity is None or len(severity) != self._population_size:
+            mocos_helper.seed(seed)
+            severity = self.draw_expected_case_severity()
+            save_array(path, severity)
+        else:
+            logger.info(f'Expected case severities loaded from {path}')
+        return severity
 
     def setup_random_distribution(self, t):
         params = self.disease_progression[t]
@@ -422,6 +682,11 @@ class InfectionModel:
 
         raise ValueError(f'Sampling from distribution {distribution} is not yet supported but we can quickly add it')
 
+    def numpy_sampler(self, t):
+        """ NumPy counterpart of setup_random_distribution(t), called as sampler(rng, size) """
+        f, args, kwargs = self.setup_random_distribution(t)
+        return partial(numpy_samplers[f], **kwargs)
+
     def add_potential_contractions_from_transport_kernel(self, person_id):
         pass
 
@@ -429,8 +694,8 @@ class InfectionModel:
         fear_factors = self._params[FEAR_FACTORS]
         fear_factor = fear_factor_schema.validate(fear_factors.get(kernel_id, fear_factors.get(DEFAULT, None)))
         if not fear_factor:
-            return fear_functions[FearFunctions.FearDisabled], 0, 0, 0, 0, 0
-        f = fear_functions[FearFunctions(fear_factor[FEAR_FUNCTION])]
+            return scalar_fear_functions[FearFunctions.FearDisabled], 0, 0, 0, 0, 0
+        f = scalar_fear_functions[FearFunctions(fear_factor[FEAR_FUNCTION])]
         limit_value = fear_factor[LIMIT_VALUE]
         scale = fear_factor[SCALE_FACTOR]
         loc = fear_factor[LOC_FACTOR]
@@ -438,154 +703,238 @@ class InfectionModel:
         weights_detected = fear_factor[DETECTED_MULTIPLIER]
         return f, weights_detected, weights_deaths, scale, loc, limit_value
 
+    def _fear_time(self):
+        time = self._global_time
+        if self._params[MOVE_ZERO_TIME_ACCORDING_TO_DETECTED]:
+            if self._max_time_offset != np.inf:
+                time -= self._max_time_offset
+            else:
+                time = -np.inf
+        return time
+
+    def _invalidate_fear(self) -> None:
+        """ Has to be called whenever the number of detected people or deaths changes """
+        self._fear_cache.clear()
+
     def fear(self, kernel_id) -> float:
+        """
+        Fear factor of the kernel. Values are cached per kernel until _invalidate_fear is called,
+        values of time dependent fear functions also until the (shifted) simulation time changes.
+        """
+        cached = self._fear_cache.get(kernel_id)
+        if cached is not None and (cached[0] is None or cached[0] == self._fear_time()):
+            return cached[1]
         if kernel_id not in self.fear_fun:
             res = self.set_up_internal_fear(kernel_id)
             (self.fear_fun[kernel_id], self.fear_weights_detected[kernel_id],
              self.fear_weights_deaths[kernel_id], self.fear_scale[kernel_id],
              self.fear_loc[kernel_id],  self.fear_limit_value[kernel_id]) = res
+            self.fear_time_dependent[kernel_id] = res[0] in time_dependent_fear_functions
         detected = self.detected_people
         deaths = self.deaths
-        time = self._global_time
-        if self._params[MOVE_ZERO_TIME_ACCORDING_TO_DETECTED]:
-            if self._max_time_offset != np.inf:
-                time -= self._max_time_offset
-            else:
-                time = -np.inf
+        time = self._fear_time()
 
-        return self.fear_fun[kernel_id](detected, deaths, time, self.fear_weights_detected[kernel_id],
-                                        self.fear_weights_deaths[kernel_id], self.fear_loc[kernel_id],
-                                        self.fear_scale[kernel_id], self.fear_limit_value[kernel_id])
+        value = self.fear_fun[kernel_id](detected, deaths, time, self.fear_weights_detected[kernel_id],
+                                         self.fear_weights_deaths[kernel_id], self.fear_loc[kernel_id],
+                                         self.fear_scale[kernel_id], self.fear_limit_value[kernel_id])
+        self._fear_cache[kernel_id] = (time if self.fear_time_dependent[kernel_id] else None, value)
+        return value
 
     def gamma(self, kernel_id):
         return self._params[TRANSMISSION_PROBABILITIES][kernel_id]
 
     def household_kernel_old_implementation(self, person_id):
-        prog_times = self._progression_times_dict[person_id]
-        start = prog_times[T0]
-        end = prog_times[T2] or prog_times[TRECOVERY]
+        prog_times = self._progression_times
+        start = prog_times.get(person_id, T0)
+        end = prog_times.get(person_id, T2) or prog_times.get(person_id, TRECOVERY)
         total_infection_rate = (end - start) * self.gamma('household')
-        infected = mocos_helper.poisson(total_infection_rate)
+        random = self._stream(person_id, CONTACTS_STREAM, HOUSEHOLD_CODE)
+        infected = random.poisson(total_infection_rate)
         if infected == 0:
            return
-        household_id = self._individuals_household_id[person_id]
-        inhabitants = self._households_inhabitants[household_id]
-        possible_choices = [i for i in inhabitants if i != person_id]
-        for choice_idx in mocos_helper.sample_idxes_with_replacement_uniform(len(possible_choices), infected):
+        households = self._households
+        possible_choices = [i for i in households.inhabitants(households.household_of(person_id)) if i != person_id]
+        if self._person_streams is None:
+            choice_idxes = mocos_helper.sample_idxes_with_replacement_uniform(len(possible_choices), infected)
+        else:
+            choice_idxes = random.integers(len(possible_choices), size=infected).tolist()
+        for choice_idx in choice_idxes:
             person_idx = possible_choices[choice_idx]
-            if self.get_infection_status(person_idx) == InfectionStatus.Healthy:
-                contraction_time = mocos_helper.uniform(low=start, high=end)
-                self.append_event(Event(contraction_time, person_idx, TMINUS1, person_id, HOUSEHOLD, self.global_time))
+            if self._infection_status[person_idx] == HEALTHY_STATE:
+                contraction_time = random.uniform(low=start, high=end)
+                self.append_contraction_event(contraction_time, person_idx, person_id, HOUSEHOLD_CODE)
 
     def add_potential_contractions_from_household_kernel(self, person_id):
         if self._params[OLD_IMPLEMENTATION_FOR_HOUSEHOLD_KERNEL]:
             self.household_kernel_old_implementation(person_id)
             return
-        prog_times = self._progression_times_dict[person_id]
-        start = prog_times[T0]
-        end = prog_times[T2] or prog_times[TRECOVERY]
-        household_id = self._individuals_household_id[person_id]
-        inhabitants = self._households_inhabitants[household_id]
-        possible_choices = [i for i in inhabitants if i != person_id]
+        prog_times = self._progression_times
+        start = prog_times.get(person_id, T0)
+        end = prog_times.get(person_id, T2) or prog_times.get(person_id, TRECOVERY)
+        households = self._households
+        possible_choices = [i for i in households.inhabitants(households.household_of(person_id)) if i != person_id]
+        random = self._stream(person_id, CONTACTS_STREAM, HOUSEHOLD_CODE)
 
         for person_idx in possible_choices:
-            if self.get_infection_status(person_idx) == InfectionStatus.Healthy:
+            if self._infection_status[person_idx] == HEALTHY_STATE:
                 scale = len(possible_choices) / self.gamma('household')
-                contraction_time = start + mocos_helper.exponential(scale=scale)
+                contraction_time = start + random.exponential(scale=scale)
 
                 if contraction_time >= end:
                     continue
 
-                self.append_event(Event(contraction_time, person_idx, TMINUS1, person_id, HOUSEHOLD, self.global_time))
+                self.append_contraction_event(contraction_time, person_idx, person_id, HOUSEHOLD_CODE)
 
     def add_potential_contractions_from_constant_kernel(self, person_id):
-        """ Constant kernel draws a number of infections based on base gamma and enqueue randomly selected events """
-        prog_times = self._progression_times_dict[person_id]
-        start = prog_times[T0]
-        end = prog_times[T1]
+        """
+        Constant kernel draws a number of infections based on base gamma and enqueue randomly selected events.
+        If r_out_schedule overlaps the infectious period (and zero time is fixed), infections are drawn from the rate
+        reduced by the schedule, so contacts that would be abandoned by quick_return_condition are never enqueued.
+        """
+        prog_times = self._progression_times
+        start = prog_times.get(person_id, T0)
+        end = prog_times.get(person_id, T1)
         if end is None:
-            end = prog_times[T2]
-        total_infection_rate = (end - start) * self.gamma('constant')
-        infected = mocos_helper.poisson(total_infection_rate)
+            end = prog_times.get(person_id, T2)
+        segments = None
+        if self._r_out_schedule_sampled:
+            segments = self._r_out_schedule.segments(start, end)
+        if segments is None:
+            total_infection_rate = (end - start) * self.gamma('constant')
+        else:
+            total_infection_rate = segments[1] * self.gamma('constant')
+        random = self._stream(person_id, CONTACTS_STREAM, CONSTANT_CODE)
+        infected = random.poisson(total_infection_rate)
         if infected == 0:
             return
 
-        selected_rows = mocos_helper.nonreplace_sample_few(self._individuals_indices,
-                                                           infected, person_id)
+        selected_rows = self._sample_few(random, self._population.indices, infected, person_id)
 
         for person_idx in selected_rows:
-            if self.get_infection_status(person_idx) == InfectionStatus.Healthy:
-                contraction_time = mocos_helper.uniform(low=start, high=end)
-                self.append_event(Event(contraction_time, person_idx, TMINUS1, person_id, CONSTANT, self.global_time))
+            if self._infection_status[person_idx] == HEALTHY_STATE:
+                if segments is None:
+                    contraction_time = random.uniform(low=start, high=end)
+                else:
+                    contraction_time = ROutSchedule.sample(*segments, random=random)
+                self.append_contraction_event(contraction_time, person_idx, person_id, CONSTANT_CODE)
 
     def add_potential_contractions_from_constant_age_kernel(self, person_id):
         if self._disable_constant_age_kernel is True:
             return
-        age = self._individuals_age_dct[person_id]
+        age = self._population.age_of(person_id)
         if age not in self._constant_age_helper_age_dict:
             return
-        prog_times = self._progression_times_dict[person_id]
-        start = prog_times[T0]
-        end = prog_times[T1]
+        prog_times = self._progression_times
+        start = prog_times.get(person_id, T0)
+        end = prog_times.get(person_id, T1)
         if end is None:
-            end = prog_times[T2]
+            end = prog_times.get(person_id, T2)
         total_infection_rate = (end - start) * self.gamma('constant_age')
 
-        infected = mocos_helper.poisson(total_infection_rate)
+        random = self._stream(person_id, CONTACTS_STREAM, CONSTANT_AGE_CODE)
+        infected = random.poisson(total_infection_rate)
         if infected == 0:
             return
 
-        selected_rows = mocos_helper.nonreplace_sample_few(
+        selected_rows = self._sample_few(
+            random,
             self._constant_age_individuals[self._constant_age_helper_age_dict[age]],
             infected,
             person_id
         )
 
         for person_idx in selected_rows:
-            if self.get_infection_status(person_idx) == InfectionStatus.Healthy:
-                contraction_time = mocos_helper.uniform(low=start, high=end)
-                self.append_event(Event(contraction_time, person_idx, TMINUS1, person_id, CONSTANT_AGE, self.global_time))
+            if self._infection_status[person_idx] == HEALTHY_STATE:
+                contraction_time = random.uniform(low=start, high=end)
+                self.append_contraction_event(contraction_time, person_idx, person_id, CONSTANT_AGE_CODE)
 
     def add_potential_contractions_from_friendship_kernel(self, person_id):
         if self._disable_friendship_kernel is True:
             return
-        prog_times = self._progression_times_dict[person_id]
-        start = prog_times[T0]
-        end = prog_times[T1]
+        prog_times = self._progression_times
+        start = prog_times.get(person_id, T0)
+        end = prog_times.get(person_id, T1)
         if end is None:
-            end = prog_times[T2]
+            end = prog_times.get(person_id, T2)
         total_infection_rate = (end - start) * self.gamma('friendship')
-        no_infected = mocos_helper.poisson(total_infection_rate * self._social_activity_scores[person_id])
+        random = self._stream(person_id, CONTACTS_STREAM, FRIENDSHIP_CODE)
+        no_infected = random.poisson(total_infection_rate * self._population.social_competence_of(person_id))
         # Add a constant multiplicand above?
 
-        age = self._individuals_age_dct[person_id]
-        gender = self._individuals_gender_dct[person_id]
+        age = self._population.age_of(person_id)
+        gender = self._population.gender_of(person_id)
         for _ in range(no_infected):
             infected_idx = self._social_activity_sampler.gen(age, gender)
-            if self.get_infection_status(infected_idx) == InfectionStatus.Healthy:
-                contraction_time = mocos_helper.uniform(low=start, high=end)
-                self.append_event(Event(contraction_time, infected_idx, TMINUS1, person_id, FRIENDSHIP, self.global_time))
+            if self._infection_status[infected_idx] == HEALTHY_STATE:
+                contraction_time = random.uniform(low=start, high=end)
+                self.append_contraction_event(contraction_time, infected_idx, person_id, FRIENDSHIP_CODE)
 
 
     def handle_t0(self, person_id):
         self._active_people += 1
-        if self.get_infection_status(person_id) in [
-            InfectionStatus.Healthy,
-            InfectionStatus.Contraction
-        ]:
-            self._infection_status[person_id] = InfectionStatus.Infectious.value
+        status = self._infection_status[person_id]
+        if status == HEALTHY_STATE or status == CONTRACTION_STATE:
+            self._infection_status[person_id] = INFECTIOUS_STATE
         else:
             raise AssertionError(f'Unexpected state detected: {self.get_infection_status(person_id)}'
                                  f'person_id: {person_id}')
 
-        household_id = self._individuals_household_id[person_id]  # self._df_individuals.loc[person_id, HOUSEHOLD_ID]
-        capacity = self._households_capacities[household_id]  # self._df_households.loc[household_id][ID]
-        if capacity > 1:
+        households = self._households
+        if households.capacity(households.household_of(person_id)) > 1:
             self.add_potential_contractions_from_household_kernel(person_id)
         self.add_potential_contractions_from_constant_kernel(person_id)
         self.add_potential_contractions_from_friendship_kernel(person_id)
         self.add_potential_contractions_from_constant_age_kernel(person_id)
 
+    def _progression_offsets(self, person_id):
+        """
+        Random parts of disease progression of the person: t0 - tminus1, t1 - t0, t2 - t0 (None unless the case is
+        severe or critical), tdeath - t0 (None unless the person dies), trecovery - t0 (None if the person dies)
+        and whether the case can be detected (mild and asymptomatic ones with detection_mild_proba).
+        They are drawn in the order generate_disease_progression always drew them (from the stream of the person with
+        counter_based_random) or, with reuse_time_distribution_realizations, taken from the draws made once
+        for every person.
+        """
+        severity = self._expected_case_severity[person_id]
+        if severity < 0:
+            severity = self._draw_case_severity(person_id)
+        severe = is_severe_case[severity]
+        realizations = self._progression_realizations
+        if realizations is None:
+            random = self._stream(person_id, PROGRESSION_STREAM)
+            if self._person_streams is None:
+                rv_t0, rv_t1, rv_t2, rv_tdeath = self.rv_t0, self.rv_t1, self.rv_t2, self.rv_tdeath
+            else:
+                samplers = self._person_samplers
+                rv_t0, rv_t1, rv_t2, rv_tdeath = (partial(samplers[t], random, None) for t in (T0, T1, T2, TDEATH))
+            rv_t0 = rv_t0()
+            rv_t2 = rv_t2() if severe else None
+            rv_t1 = rv_t1()
+            rv_trecovery = None
+            if random.rand() <= self._params[DEATH_PROBABILITY][case_severities[severity]]:
+                rv_tdeath = rv_tdeath()
+            else:
+                rv_tdeath = None
+                if severe:
+                    rv_trecovery = random.uniform(42.0 - 14.0, 42.0 + 14.0)
+                else:
+                    rv_trecovery = random.uniform(14.0 - 3.0, 14.0 + 3.0)  # TODO: this should not be hardcoded!
+            detected = severe or random.rand() <= self._params[DETECTION_MILD_PROBA]
+            return rv_t0, rv_t1, rv_t2, rv_tdeath, rv_trecovery, detected
+
+        rv_t0, rv_t1, rv_t2, rv_tdeath, recovery, death, detection = realizations.get(person_id)
+        if not severe:
+            rv_t2 = None
+        rv_trecovery = None
+        if death > self._params[DEATH_PROBABILITY][case_severities[severity]]:
+            rv_tdeath = None
+            if severe:
+                rv_trecovery = 42.0 - 14.0 + 2 * 14.0 * recovery
+            else:
+                rv_trecovery = 14.0 - 3.0 + 2 * 3.0 * recovery
+        detected = severe or detection <= self._params[DETECTION_MILD_PROBA]
+        return rv_t0, rv_t1, rv_t2, rv_tdeath, rv_trecovery, detected
+
     def generate_disease_progression(self, person_id, event_time: float,
                                      initial_infection_status: str) -> None:
         """Returns list of disease progression events
@@ -622,28 +971,27 @@ class InfectionModel:
           B - discard all times that are larger than tdeath
 
         """
+        progression_events = []  # (time, type, initiated_through, owned by person) in order of scheduling
+        rv_t0, rv_t1, rv_t2, rv_tdeath, rv_trecovery, detected = self._progression_offsets(person_id)
         if initial_infection_status == InfectionStatus.Contraction:
             tminus1 = event_time
-            t0 = tminus1 + self.rv_t0()
-            self.append_event(Event(t0, person_id, T0, person_id, DISEASE_PROGRESSION, tminus1))
-            self._infection_status[person_id] = initial_infection_status
+            t0 = tminus1 + rv_t0
+            progression_events.append((t0, T0_CODE, DISEASE_PROGRESSION_CODE, True))
+            self._infection_status[person_id] = CONTRACTION_STATE
         elif initial_infection_status == InfectionStatus.Infectious:
             t0 = event_time
             # tminus1 does not to be defined, but for completeness let's calculate it
-            tminus1 = t0 - self.rv_t0()
+            tminus1 = t0 - rv_t0
         else:
             raise ValueError(f'invalid initial infection status {initial_infection_status}')
         t2 = None
-        if self._expected_case_severity[person_id] in [
-            ExpectedCaseSeverity.Severe,
-            ExpectedCaseSeverity.Critical
-        ]:
-            t2 = t0 + self.rv_t2()
-            self.append_event(Event(t2, person_id, T2, person_id, DISEASE_PROGRESSION, t0))
-
-        t1 = t0 + self.rv_t1()
+        if rv_t2 is not None:
+            t2 = t0 + rv_t2
+            progression_events.append((t2, T2_CODE, DISEASE_PROGRESSION_CODE, True))
+
+        t1 = t0 + rv_t1
         if not t2 or t1 < t2:
-            self.append_event(Event(t1, person_id, T1, person_id, DISEASE_PROGRESSION, t0))
+            progression_events.append((t1, T1_CODE, DISEASE_PROGRESSION_CODE, True))
         else:
             # if t2 < t1 then we reset t1 to avoid misleading in data exported from the simulation
             t1 = None
@@ -651,67 +999,79 @@ class InfectionModel:
         tdetection = None
         trecovery = None
         tdeath = None
-        if mocos_helper.rand() <= self._params[DEATH_PROBABILITY][self._expected_case_severity[person_id]]:
-            tdeath = t0 + self.rv_tdeath()
-            self.append_event(Event(tdeath, person_id, TDEATH, person_id, DISEASE_PROGRESSION, t0))
+        if rv_tdeath is not None:
+            tdeath = t0 + rv_tdeath
+            progression_events.append((tdeath, TDEATH_CODE, DISEASE_PROGRESSION_CODE, True))
         else:
-            if self._expected_case_severity[person_id] in [
-                ExpectedCaseSeverity.Mild,
-                ExpectedCaseSeverity.Asymptomatic
-            ]:
-                trecovery = t0 + mocos_helper.uniform(14.0 - 3.0, 14.0 + 3.0)  # TODO: this should not be hardcoded!
-            else:
-                trecovery = t0 + mocos_helper.uniform(42.0 - 14.0, 42.0 + 14.0)
-            self.append_event(Event(trecovery, person_id, TRECOVERY, person_id, DISEASE_PROGRESSION, t0))
+            trecovery = t0 + rv_trecovery
+            progression_events.append((trecovery, TRECOVERY_CODE, DISEASE_PROGRESSION_CODE, True))
 
         """ Following is for checking whther tdetection should be picked up"""
-        calculate_tdetection = self._params[TURN_ON_DETECTION]
-        if self._expected_case_severity[person_id] in [
-            ExpectedCaseSeverity.Mild,
-            ExpectedCaseSeverity.Asymptomatic
-        ]:
-            if mocos_helper.rand() > self._params[DETECTION_MILD_PROBA]:
-                calculate_tdetection = False
-        if calculate_tdetection:
+        if self._params[TURN_ON_DETECTION] and detected:
             """ If t2 is defined (severe/critical), then use this time; if not; use some offset from t0 """
             tdetection = t2 or t0 + 2  # TODO: this should not be hardcoded
-            ev = Event(tdetection, person_id, TDETECTION, person_id, DETECTION, t0)
-            self.append_event(ev)
+            progression_events.append((tdetection, TDETECTION_CODE, DETECTION_CODE, False))
 
-        self._progression_times_dict[person_id] = {ID: person_id, TMINUS1: tminus1, T0: t0, T1: t1, T2: t2,
-                                                   TDEATH: tdeath, TRECOVERY: trecovery, TDETECTION: tdetection}
+        self._progression_times.set_progression(person_id, tminus1, t0, t1, t2, tdeath, trecovery, tdetection)
+
+        if self._params[LAZY_PROGRESSION]:
+            self._chain_progression_events(person_id, progression_events)
+        else:
+            for time, type_, initiated_through, owned in progression_events:
+                self.append_event(time, person_id, type_, person_id, initiated_through,
+                                  owner=person_id if owned else None)
 
         if initial_infection_status == InfectionStatus.Infectious:
             self.handle_t0(person_id)
 
+    def _chain_progression_events(self, person_id, progression_events):
+        """
+        Lazy progression - only the next milestone of the person is kept in the event queue,
+        the rest is stored (latest first) and scheduled one by one by _schedule_next_progression_event.
+        Sequence numbers are reserved now, so the processing order is the same as if all events were queued at once.
+        """
+        first_sequence = self.event_queue.reserve(len(progression_events))
+        self._progression_chains[person_id] = sorted(
+            ((time, first_sequence + i, type_, initiated_through, owned)
+             for i, (time, type_, initiated_through, owned) in enumerate(progression_events)),
+            reverse=True)
+        self._schedule_next_progression_event(person_id)
+
+    def _schedule_next_progression_event(self, person_id):
+        chain = self._progression_chains.get(person_id)
+        if chain is None:
+            return
+        # events owned by the person would have been invalidated by death or recovery
+        status = self._infection_status[person_id]
+        terminated = status == DEATH_STATE or status == RECOVERED_STATE
+        while chain:
+            time, sequence, type_, initiated_through, owned = chain.pop()
+            if owned and terminated:
+                continue
+            slot = self._event_pool.allocate(time, person_id, type_, person_id, initiated_through)
+            self.event_queue.push(time, slot, person_id if owned else None, sequence)
+            break
+        if not chain:
+            del self._progression_chains[person_id]
+
     @property
     def df_infections(self):
-        return pd.DataFrame.from_dict(self._infections_dict, orient='index')
+        return self._infection_log.to_frame(ids=self._population.ids)
 
     @property
     def df_progression_times(self):
-        return pd.DataFrame.from_dict(self._progression_times_dict, orient='index')
+        return self._progression_times.to_frame(ids=self._population.ids)
 
     def save_progression_times(self, path):
-        with open(path, "w") as f:
-            f.write('idx,tminus1,t0,t1,t2,tdeath,trecovery,tdetection,quarantine\n')
-            for elem in self._progression_times_dict.values():
-                str = f'{elem.get(ID, None)},{elem.get(TMINUS1, None)},{elem.get(T0, None)},'\
-                      f'{elem.get(T1, None)},{elem.get(T2, None)},{elem.get(TDEATH, None)},'\
-                      f'{elem.get(TRECOVERY, None)},{elem.get(TDETECTION, None)},{elem.get(QUARANTINE, None)}\n'
-                f.write(str)
+        self.df_progression_times.to_csv(path, index=False, na_rep='None')
 
     def save_potential_contractions(self, path):
-        with open(path, "w") as f:
-            f.write('source_id,target_id,contraction_time,kernel\n')
-            for elem in self._infections_dict.values():
-                if elem.get(CONTRACTION_TIME) <= self._global_time: # skiping events that were not realized yet
-                    str = f'{elem.get(SOURCE, None)},{elem.get(TARGET, None)},{elem.get(CONTRACTION_TIME, None)},'\
-                          f'{elem.get(KERNEL, None)}\n'
-                    f.write(str)
+        # skiping events that were not realized yet
+        self._infection_log.to_frame(until=self._global_time, ids=self._population.ids).to_csv(
+            path, index=False, na_rep='None')
 
     def prevalance_at(self, time):
-        return len([1 for elem in self._infections_dict.values() if elem.get(CONTRACTION_TIME, np.inf) <= time])
+        return self._infection_log.count_until(time)
 
     def mean_day_increase_until(self, time):
         mean_increase = 0.0
@@ -747,10 +1107,10 @@ class InfectionModel:
     def _save_population_parameters(self, simulation_output_dir):
         run_id = f'{int(time.monotonic() * 1e9)}_{self._params[RANDOM_SEED]}'
         if self._params[SAVE_EXPECTED_SEVERITY]:
-            self.store_parameter(simulation_output_dir, self._expected_case_severity, 'expected_case_severity.pkl')
-        self.store_parameter(simulation_output_dir, self._infection_status, 'infection_status.pkl')
-        self.store_parameter(simulation_output_dir, self._detection_status, 'detection_status.pkl')
-        self.store_parameter(simulation_output_dir, self._quarantine_status, 'quarantine_status.pkl')
+            self.store_parameter(simulation_output_dir, self.expected_case_severity, 'expected_case_severity.pkl')
+        self.store_parameter(simulation_output_dir, self.infection_status, 'infection_status.pkl')
+        self.store_parameter(simulation_output_dir, self.detection_status, 'detection_status.pkl')
+        self.store_parameter(simulation_output_dir, self.quarantine_status, 'quarantine_status.pkl')
 
     def _save_dir(self, prefix=''):
         underscore_if_prefix = '_' if len(prefix) > 0 else ''
@@ -789,7 +1149,7 @@ class InfectionModel:
             household_input_path = os.path.join(self._params[OUTPUT_ROOT_DIR], self._params[EXPERIMENT_ID],
                                                 'input_df_households.csv')
             if not os.path.exists(household_input_path):
-                self._df_households.to_csv(household_input_path)
+                self._households.to_data_frame(self._population.ids).to_csv(household_input_path)
         repo = Repo(config.ROOT_DIR)
         git_active_branch_log = os.path.join(simulation_output_dir, 'git_active_branch_log.txt')
         with open(git_active_branch_log, 'w') as f:
@@ -815,39 +1175,35 @@ class InfectionModel:
                     self._max_time_offset = self._global_time
                     self._init_for_stats = self._active_people
 
-    def quick_return_condition(self, initiated_through):
-        """ Checks if event of type 'initiated_through' should be abandoned given current situation """
+    def quick_return_condition(self, initiated_through, random=None):
+        """
+        Checks if event of type 'initiated_through' should be abandoned given current situation,
+        random is the source of random numbers (self._random by default)
+        """
         if initiated_through == HOUSEHOLD:
             return False
+        if random is None:
+            random = self._random
 
-        r = mocos_helper.rand()
-        if initiated_through == CONSTANT and len(self._params[R_OUT_SCHEDULE]) > 0:
-            t = self._global_time - self._max_time_offset
-            for s in self._params[R_OUT_SCHEDULE]:
-                if s[MIN_TIME] <= t <= s[MAX_TIME]:
-                    if r > s[OVERRIDE_R_FRACTION]:
-                        return True
-                    else:
-                        return False
+        if initiated_through == CONSTANT and self._r_out_schedule is not None:
+            fraction = self._r_out_schedule.fraction_at(self._global_time - self._max_time_offset)
+            if fraction is not None:
+                # sampled contraction times are already drawn from the rate reduced by the schedule
+                return not self._r_out_schedule_sampled and random.rand() > fraction
 
-        if r > self.fear(initiated_through):
-            return True
-        return False
+        return random.rand() > self.fear(initiated_through)
 
     def add_new_infection(self, person_id, infection_status,
                           initiated_by, initiated_through):
-        self._detection_status[person_id] = DetectionStatus.NotDetected.value
+        self.event_queue.invalidate(person_id)
+        self._earliest_certain_contraction.pop(person_id, None)
+        self._detection_status[person_id] = NOT_DETECTED_STATE
 
-        self._infections_dict[len(self._infections_dict)] = {
-            SOURCE: initiated_by,
-            TARGET: person_id,
-            CONTRACTION_TIME: self.global_time,
-            KERNEL: initiated_through
-        }
+        self._infection_log.append(initiated_by, person_id, self.global_time, initiated_through)
         if self.global_time >= self._params[SERIAL_INTERVAL][MIN_TIME]:
             if self.global_time < self._params[SERIAL_INTERVAL][MAX_TIME]:
                 if initiated_by is not None:
-                    serial_interval = self.global_time - self._progression_times_dict[initiated_by][TMINUS1]
+                    serial_interval = self.global_time - self._progression_times.get(initiated_by, TMINUS1)
                     self.serial_intervals.append(serial_interval)
 
         self._affected_people += 1
@@ -856,10 +1212,102 @@ class InfectionModel:
                                           self.global_time,
                                           infection_status)
 
-    # 'Event', [TIME, PERSON_INDEX, TYPE, INITIATED_BY, INITIATED_THROUGH, ISSUED_TIME])
-    def process_event(self, event) -> bool:
-        type_ = getattr(event, TYPE)
-        time = getattr(event, TIME)
+    def _handle_tminus1(self, person_id, initiated_by, initiated_through) -> None:
+        # check if this action is still valid first
+        initiated_inf_status = self._infection_status[initiated_by]
+        if is_active_state[initiated_inf_status]:
+            # contraction time tells apart repeated contacts of the same people through the same kernel
+            random = self._stream(person_id, CONTRACTION_STREAM, initiated_through,
+                                  self._population.id_of(initiated_by), time_bits(self.global_time))
+            if self.quick_return_condition(kernels[initiated_through], random):
+                return
+
+            if state_transitions[TMINUS1_CODE][self._infection_status[person_id]] is not None:
+                new_infection = False
+                # TODO below is a spaghetti code that should be sorted out! SORRY!
+                if initiated_through != HOUSEHOLD_CODE:
+                    if initiated_inf_status != STAY_HOME_STATE:
+                        new_infection = True
+                    if self._quarantine_status[initiated_by] == QUARANTINE_STATE:
+                        new_infection = False
+                    if self._quarantine_status[person_id] == QUARANTINE_STATE:
+                        new_infection = False
+                else:  # HOUSEHOLD kernel:
+                    new_infection = True
+                if new_infection:
+                    self.add_new_infection(person_id, InfectionStatus.Contraction.value,
+                                           initiated_by, initiated_through)
+
+    def _handle_t0(self, person_id, initiated_by, initiated_through) -> None:
+        if state_transitions[T0_CODE][self._infection_status[person_id]] is not None:
+            self.handle_t0(person_id)
+
+    def _handle_t1(self, person_id, initiated_by, initiated_through) -> None:
+        new_status = state_transitions[T1_CODE][self._infection_status[person_id]]
+        if new_status is not None:
+            self._infection_status[person_id] = new_status
+
+    def _handle_t2(self, person_id, initiated_by, initiated_through) -> None:
+        new_status = state_transitions[T2_CODE][self._infection_status[person_id]]
+        if new_status is not None:
+            self._infection_status[person_id] = new_status
+            self.event_queue.invalidate_source(person_id)
+            if self._expected_case_severity[person_id] == CRITICAL_CASE:
+                self._icu_needed += 1
+
+    def _handle_tdeath(self, person_id, initiated_by, initiated_through) -> None:
+        new_status = state_transitions[TDEATH_CODE][self._infection_status[person_id]]
+        if new_status is not None:
+            self._deaths += 1
+            self._invalidate_fear()
+            if self._expected_case_severity[person_id] == CRITICAL_CASE:
+                if self._progression_times.get(person_id, T2) < self.global_time:
+                    self._icu_needed -= 1
+            self._active_people -= 1
+            self._infection_status[person_id] = new_status
+            self.event_queue.invalidate(person_id)
+            self.event_queue.invalidate_source(person_id)
+
+    def _handle_trecovery(self, person_id, initiated_by, initiated_through) -> None:
+        # TRECOVERY is exclusive with regards to TDEATH (when this comment was added)
+        new_status = state_transitions[TRECOVERY_CODE][self._infection_status[person_id]]
+        if new_status is not None:
+            if initiated_through != INITIAL_CONDITIONS_CODE:
+                self._active_people -= 1
+                if self._expected_case_severity[person_id] == CRITICAL_CASE:
+                    if self._progression_times.get(person_id, T2) < self.global_time:
+                        self._icu_needed -= 1
+            self._infection_status[person_id] = new_status
+            self._immune_people += 1
+            self.event_queue.invalidate(person_id)
+            self.event_queue.invalidate_source(person_id)
+
+    def _handle_tdetection(self, person_id, initiated_by, initiated_through) -> None:
+        if state_transitions[TDETECTION_CODE][self._infection_status[person_id]] is None:
+            return
+        if self._detection_status[person_id] == NOT_DETECTED_STATE:
+            self._detection_status[person_id] = DETECTED_STATE
+            self._detected_people += 1
+            self._invalidate_fear()
+            self.update_max_time_offset()
+            households = self._households
+            for inhabitant in households.inhabitants(households.household_of(person_id)):
+                if self._quarantine_status[inhabitant] == NO_QUARANTINE_STATE:
+                    inhabitant_status = self._infection_status[inhabitant]
+                    if inhabitant_status != DEATH_STATE:
+                        self._quarantine_status[inhabitant] = QUARANTINE_STATE
+                        self._quarantined_people += 1
+                        self._progression_times.set(inhabitant, QUARANTINE, self.global_time)
+                        if inhabitant_status == INFECTIOUS_STATE or inhabitant_status == STAY_HOME_STATE:
+                            # TODO: this has to be implemented better, just a temporary solution:
+                            if self._progression_times.get(inhabitant, TDETECTION) is None:
+                                new_detection_time = self.global_time + 2.0
+                                self._progression_times.set(inhabitant, TDETECTION, new_detection_time)
+                                self.append_event(new_detection_time, inhabitant, TDETECTION_CODE,
+                                                  person_id, QUARANTINE_FOLLOWED_DETECTION_CODE)
+
+    def _log_progress(self, time) -> None:
+        """ Logs the state of the epidemic once per log_time_freq days """
         if int(time / self._params[LOG_TIME_FREQ]) != int(self._global_time / self._params[LOG_TIME_FREQ]):
             memory_use = ps.memory_info().rss / 1024 / 1024
             fearC = self.fear(CONSTANT)
@@ -879,156 +1327,92 @@ class InfectionModel:
                          f'\tFearC: {fearC}'
                          f'\tFearH: {fearH}'
                          f'\tPhysical memory use: {memory_use:.2f} MB')
+
+    def process_event(self, slot) -> bool:
+        """ Processes event stored in the given slot of the event pool """
+        event_pool = self._event_pool
+        time = event_pool.time[slot]
+        self._log_progress(time)
         self._global_time = time
         if self._global_time > self._max_time + self._max_time_offset:
             return False
-        person_id = getattr(event, PERSON_INDEX)
-        initiated_by = getattr(event, INITIATED_BY)
-        initiated_through = getattr(event, INITIATED_THROUGH)
-
-        # TODO the remaining attribute will be useful when we will take into account for backtracing
-        # issued_time = getattr(event, ISSUED_TIME)
-        if initiated_by is None and initiated_through != DISEASE_PROGRESSION:
-            if self.get_infection_status(person_id) == InfectionStatus.Healthy:
-                if type_ == TMINUS1:
-                    self.add_new_infection(person_id, InfectionStatus.Contraction.value,
-                                           initiated_by, initiated_through)
-                elif type_ == T0:
-                    self.add_new_infection(person_id, InfectionStatus.Infectious.value,
-                                           initiated_by, initiated_through)
-        elif type_ == TMINUS1:
-            # check if this action is still valid first
-            try:
-                initiated_inf_status = self._infection_status[initiated_by]
-            except KeyError:
-                logging.error(f'infection status should not be blank for infection! key: {initiated_by}')
-            if initiated_inf_status in active_states:
-                if self.quick_return_condition(initiated_through):
-                    return True
-
-                current_status = self.get_infection_status(person_id)
-                if current_status == InfectionStatus.Healthy:
-                    new_infection = False
-                    # TODO below is a spaghetti code that should be sorted out! SORRY!
-                    if initiated_through != HOUSEHOLD:
-                        if initiated_inf_status != InfectionStatus.StayHome:
-                            new_infection = True
-                        if self.get_quarantine_status_(initiated_by) == QuarantineStatus.Quarantine:
-                            new_infection = False
-                        if self.get_quarantine_status_(person_id) == QuarantineStatus.Quarantine:
-                            new_infection = False
-                    else:  # HOUSEHOLD kernel:
-                        new_infection = True
-                    if new_infection:
-                        self.add_new_infection(person_id, InfectionStatus.Contraction.value,
-                                               initiated_by, initiated_through)
-        elif type_ == T0:
-            if self.get_infection_status(person_id) == InfectionStatus.Contraction:
-                self.handle_t0(person_id)
-        elif type_ == T1:
-            if self.get_infection_status(person_id) == InfectionStatus.Infectious:
-                self._infection_status[person_id] = InfectionStatus.StayHome.value
-        elif type_ == T2:
-            if self.get_infection_status(person_id) in [
-                InfectionStatus.StayHome,
-                InfectionStatus.Infectious
-            ]:
-                self._infection_status[person_id] = InfectionStatus.Hospital.value
-                if self._expected_case_severity[person_id] == ExpectedCaseSeverity.Critical:
-                    self._icu_needed += 1
-        elif type_ == TDEATH:
-            if self.get_infection_status(person_id) not in [
-                InfectionStatus.Death,
-                InfectionStatus.Recovered
-            ]:
-                self._deaths += 1
-                if self._expected_case_severity[person_id] == ExpectedCaseSeverity.Critical:
-                    if self._progression_times_dict[person_id][T2] < self.global_time:
-                        self._icu_needed -= 1
-                self._active_people -= 1
-                self._infection_status[person_id] = InfectionStatus.Death.value
-
-        elif type_ == TRECOVERY: # TRECOVERY is exclusive with regards to TDEATH (when this comment was added)
-            if self.get_infection_status(person_id) not in [
-                InfectionStatus.Recovered,
-                InfectionStatus.Death
-            ]:
-                if initiated_through != INITIAL_CONDITIONS:
-                    self._active_people -= 1
-                    if self._expected_case_severity[person_id] == ExpectedCaseSeverity.Critical:
-                        if self._progression_times_dict[person_id][T2] < self.global_time:
-                            self._icu_needed -= 1
-                self._infection_status[person_id] = InfectionStatus.Recovered
-                self._immune_people += 1
-        elif type_ == TDETECTION:
-            if self.get_infection_status(person_id) not in [
-                InfectionStatus.Recovered,
-                InfectionStatus.Healthy
-            ]:
-                if self.get_detection_status_(person_id) == DetectionStatus.NotDetected:
-                    self._detection_status[person_id] = DetectionStatus.Detected.value
-                    self._detected_people += 1
-                    self.update_max_time_offset()
-                    household_id = self._individuals_household_id[person_id]
-                    for inhabitant in self._households_inhabitants[household_id]:
-                        if self.get_quarantine_status_(inhabitant) == QuarantineStatus.NoQuarantine:
-                            if self.get_infection_status(inhabitant) != InfectionStatus.Death:
-                                self._quarantine_status[inhabitant] = QuarantineStatus.Quarantine.value
-                                self._quarantined_people += 1
-                                if inhabitant not in self._progression_times_dict:
-                                    self._progression_times_dict[inhabitant] = {}
-                                self._progression_times_dict[inhabitant][QUARANTINE] = self.global_time
-                                if self.get_infection_status(inhabitant) in [InfectionStatus.Infectious,
-                                                                             InfectionStatus.StayHome]:
-                                    # TODO: this has to be implemented better, just a temporary solution:
-                                    if self._progression_times_dict[inhabitant].get(TDETECTION, None) is None:
-                                        new_detection_time = self.global_time + 2.0
-                                        self._progression_times_dict[inhabitant][TDETECTION] = new_detection_time
-                                        ev = Event(new_detection_time, inhabitant, TDETECTION,
-                                                                person_id, 'quarantine_followed_detection',
-                                                                self.global_time)
-                                        self.append_event(ev)
+        type_ = event_pool.type[slot]
+        person_id = event_pool.person[slot]
+        initiated_by = event_pool.source[slot]
+        initiated_through = event_pool.kernel[slot]
+        event_pool.release(slot)
+
+        if initiated_by < 0 and initiated_through != DISEASE_PROGRESSION_CODE:
+            new_status = external_infection_transitions[type_][self._infection_status[person_id]]
+            if new_status is not None:
+                self.add_new_infection(person_id, infection_statuses[new_status], None, initiated_through)
+            if initiated_through == IMPORT_INTENSITY_CODE:
+                self._schedule_next_import()
         else:
-            raise ValueError(f'unexpected status of event: {event}')
+            self._event_handlers[type_](person_id, initiated_by, initiated_through)
 
+        if self._params[LAZY_PROGRESSION]:
+            if initiated_through == DISEASE_PROGRESSION_CODE or initiated_through == DETECTION_CODE:
+                self._schedule_next_progression_event(person_id)
         return True
 
+    def _threshold_value(self):
+        """ Number of people checked against stop_simulation_threshold """
+        threshold_type = self._params[STOP_SIMULATION_THRESHOLD_TYPE]
+        if threshold_type == PREVALENCE:
+            return self.affected_people
+        if threshold_type == DETECTIONS:
+            return self.detected_people
+        return None
+
+    def _run_events(self):
+        """ Processes events of the queue until it is empty or the outbreak reaches stop_simulation_threshold """
+        threshold_type = self._params[STOP_SIMULATION_THRESHOLD_TYPE]
+        value_to_be_checked = None
+        start = time.time()
+        times_mean = 0.0
+        i = 0
+        while not self.event_queue.empty():
+            event_start = time.time()
+            value_to_be_checked = self._threshold_value()
+            if value_to_be_checked is None:
+                logging.error(f"we have an error here")
+            if value_to_be_checked >= self.stop_simulation_threshold:
+                logging.info(
+                    f"The outbreak reached a high number {self.stop_simulation_threshold} ({threshold_type})")
+                break
+            slot = self.event_queue.pop()
+            if not self.process_event(slot):
+                logging.info(f"Processing event {self._event_pool.get(slot)} returned False")
+                break
+            event_end = time.time()
+            elapsed = event_end - event_start
+            times_mean = ( times_mean * i + elapsed ) / (i + 1)
+            i += 1
+
+        end = time.time()
+        print(f'Sim runtime {end - start}, event proc. avg time: {times_mean}, '
+              f'events/s: {i / (end - start) if end > start else 0.0:.0f}, '
+              f'stale events dropped: {self.event_queue.dropped}, '
+              f'dominated contractions pruned: {self._pruned_contractions}')
+        return value_to_be_checked
+
+    def _run_day_steps(self, seed):
+        """ Runs the simulation of the seed with the day-step engine (see DayStepEngine) """
+        start = time.time()
+        steps = DayStepEngine(self, seed).run()
+        print(f'Sim runtime {time.time() - start}, day steps: {steps}')
+        return self._threshold_value()
+
     def run_simulation(self):
-        def _inner_loop(iter):
-            threshold_type = self._params[STOP_SIMULATION_THRESHOLD_TYPE]
-            value_to_be_checked = None
-            start = time.time()
-            times_mean = 0.0
-            i = 0
-            while not q.empty():
-                event_start = time.time()
-                if threshold_type == PREVALENCE:
-                    value_to_be_checked = self.affected_people
-                elif threshold_type == DETECTIONS:
-                    value_to_be_checked = self.detected_people
-                if value_to_be_checked is None:
-                    logging.error(f"we have an error here")
-                if value_to_be_checked >= self.stop_simulation_threshold:
-                    logging.info(
-                        f"The outbreak reached a high number {self.stop_simulation_threshold} ({threshold_type})")
-                    break
-                event = q.get()
-                if not self.process_event(event):
-                    logging.info(f"Processing event {event} returned False")
-                    q.task_done()
-                    break
-                q.task_done()
-                event_end = time.time()
-                elapsed = event_end - event_start
-                times_mean = ( times_mean * i + elapsed ) / (i + 1)
-                i += 1
-
-            end = time.time()
-            print(f'Sim runtime {end - start}, event proc. avg time: {times_mean}')
-            # cleaning up priority queue:
-            while not q.empty():
-                q.get_nowait()
-                q.task_done()
+        def _inner_loop(iter, seed):
+            if self._params[ENGINE] == Engines.DayStep:
+                value_to_be_checked = self._run_day_steps(seed)
+            else:
+                value_to_be_checked = self._run_events()
+            # cleaning up event queue:
+            self.event_queue.clear()
+            self._event_pool.clear()
             simulation_output_dir = self._save_dir()
             self.save_progression_times(os.path.join(simulation_output_dir, 'output_df_progression_times.csv'))
             self.save_potential_contractions(os.path.join(simulation_output_dir, 'output_df_potential_contractions.csv'))
@@ -1056,62 +1440,74 @@ class InfectionModel:
                           'Prevalence_150days;Prevalence_180days;Prevalence_360days;'\
                           'increase_10;increase_20;increase_30;increase_40;increase_50;increase_100;increase_150'
         output_log += '\n'
-        for i, seed in enumerate(seeds):
-            runs += 1
-            self.parse_random_seed(seed)
-            self.setup_simulation()
-            logger.info('Filling queue based on initial conditions...')
-            self._fill_queue_based_on_initial_conditions()
-
-            logger.info('Filling queue based on auxiliary functions...')
-            self._fill_queue_based_on_auxiliary_functions()
-            logger.info('Initialization step is done!')
-            outbreak = _inner_loop(i + 1)
-            last_processed_time = self._global_time
-
-            c = self._params[TRANSMISSION_PROBABILITIES][CONSTANT]
-            c_norm = c * self._params[AVERAGE_INFECTIVITY_TIME_CONSTANT_KERNEL]
-            subcritical = self._active_people < self._init_for_stats / 2 # at 200 days
-
-            bandtime = self.band_time
-            #if bandtime:
-            #    return 0
-            fear_ = self.fear(CONSTANT)
-            detection_rate = self._params[DETECTION_MILD_PROBA]
-            affected = self.affected_people
-            detected = self.detected_people
-            deceased = self.deaths
-            quarantined = self.quarantined_people
-            incidents_per_last_day = self.prevalance_at(self._global_time) - self.prevalance_at(self._global_time - 1)
-            hospitalized = self._icu_needed
-            zero_time_offset = self._max_time_offset
-            immune = self._immune_people
-            output_add = f'{last_processed_time };{affected};{detected};{deceased};{quarantined};{c};{c_norm};'\
-                         f'{self._init_for_stats};{bandtime};{subcritical};{runs};{fear_};{detection_rate};'\
-                         f'{incidents_per_last_day};{outbreak};{hospitalized};{zero_time_offset};{immune}'
-
-            if self._params[ENABLE_ADDITIONAL_LOGS]:
-                prev30 = self.prevalance_at(30)
-                prev60 = self.prevalance_at(60)
-                prev90 = self.prevalance_at(90)
-                prev120 = self.prevalance_at(120)
-                prev150 = self.prevalance_at(150)
-                prev180 = self.prevalance_at(180)
-                prev360 = self.prevalance_at(360)
-                mean_increase_at_10 = self.mean_day_increase_until(10)
-                mean_increase_at_20 = self.mean_day_increase_until(20)
-                mean_increase_at_30 = self.mean_day_increase_until(30)
-                mean_increase_at_40 = self.mean_day_increase_until(40)
-                mean_increase_at_50 = self.mean_day_increase_until(50)
-                mean_increase_at_100 = self.mean_day_increase_until(100)
-                mean_increase_at_150 = self.mean_day_increase_until(150)
-                output_add += f'{prev30};{prev60};{prev90};{prev120};{prev150};{prev180};{prev360};'\
-                              f'{mean_increase_at_10};{mean_increase_at_20};{mean_increase_at_30};'\
-                              f'{mean_increase_at_40};{mean_increase_at_50};{mean_increase_at_100};'\
-                              f'{mean_increase_at_150}'
-            output_add += '\n'
-            logger.info(output_add)
-            output_log = f'{output_log}{output_add}'
+        try:
+            for i, seed in enumerate(seeds):
+                runs += 1
+                self.parse_random_seed(seed)
+                self._set_up_random(seed)
+                if not self._params[REUSE_EXPECTED_CASE_SEVERITIES] or self._expected_case_severity is None:
+                    self._expected_case_severity = self._new_expected_case_severity(seed)
+                if self._params[REUSE_TIME_DISTRIBUTION_REALIZATIONS] and self._progression_realizations is None:
+                    logger.info('Drawing disease progression of every person...')
+                    self._progression_realizations = ProgressionRealizations(
+                        self._population_size, {t: self.numpy_sampler(t) for t in (T0, T1, T2, TDEATH)}, seed)
+                self.setup_simulation()
+                logger.info('Filling queue based on initial conditions...')
+                self._fill_queue_based_on_initial_conditions()
+
+                logger.info('Filling queue based on auxiliary functions...')
+                self._fill_queue_based_on_auxiliary_functions()
+                logger.info('Initialization step is done!')
+                outbreak = _inner_loop(i + 1, seed)
+                last_processed_time = self._global_time
+
+                c = self._params[TRANSMISSION_PROBABILITIES][CONSTANT]
+                c_norm = c * self._params[AVERAGE_INFECTIVITY_TIME_CONSTANT_KERNEL]
+                subcritical = self._active_people < self._init_for_stats / 2 # at 200 days
+
+                bandtime = self.band_time
+                #if bandtime:
+                #    return 0
+                fear_ = self.fear(CONSTANT)
+                detection_rate = self._params[DETECTION_MILD_PROBA]
+                affected = self.affected_people
+                detected = self.detected_people
+                deceased = self.deaths
+                quarantined = self.quarantined_people
+                incidents_per_last_day = \
+                    self.prevalance_at(self._global_time) - self.prevalance_at(self._global_time - 1)
+                hospitalized = self._icu_needed
+                zero_time_offset = self._max_time_offset
+                immune = self._immune_people
+                output_add = f'{last_processed_time };{affected};{detected};{deceased};{quarantined};{c};{c_norm};'\
+                             f'{self._init_for_stats};{bandtime};{subcritical};{runs};{fear_};{detection_rate};'\
+                             f'{incidents_per_last_day};{outbreak};{hospitalized};{zero_time_offset};{immune}'
+
+                if self._params[ENABLE_ADDITIONAL_LOGS]:
+                    prev30 = self.prevalance_at(30)
+                    prev60 = self.prevalance_at(60)
+                    prev90 = self.prevalance_at(90)
+                    prev120 = self.prevalance_at(120)
+                    prev150 = self.prevalance_at(150)
+                    prev180 = self.prevalance_at(180)
+                    prev360 = self.prevalance_at(360)
+                    mean_increase_at_10 = self.mean_day_increase_until(10)
+                    mean_increase_at_20 = self.mean_day_increase_until(20)
+                    mean_increase_at_30 = self.mean_day_increase_until(30)
+                    mean_increase_at_40 = self.mean_day_increase_until(40)
+                    mean_increase_at_50 = self.mean_day_increase_until(50)
+                    mean_increase_at_100 = self.mean_day_increase_until(100)
+                    mean_increase_at_150 = self.mean_day_increase_until(150)
+                    output_add += f'{prev30};{prev60};{prev90};{prev120};{prev150};{prev180};{prev360};'\
+                                  f'{mean_increase_at_10};{mean_increase_at_20};{mean_increase_at_30};'\
+                                  f'{mean_increase_at_40};{mean_increase_at_50};{mean_increase_at_100};'\
+                                  f'{mean_increase_at_150}'
+                output_add += '\n'
+                logger.info(output_add)
+                output_log = f'{output_log}{output_add}'
+        finally:
+            # stops background threads of BufferedRandom
+            self._close_random()
         logger.info(output_log)
         simulation_output_dir = self._save_dir('aggregated_results')
         output_log_file = os.path.join(simulation_output_dir, 'results.txt')
@@ -1139,27 +1535,29 @@ class InfectionModel:
         if self._params[MOVE_ZERO_TIME_ACCORDING_TO_DETECTED]:
             self._max_time_offset = np.inf
         self._fear_factor = {}
-        self._infection_status = {}
-        self._infections_dict = {}
-        self._progression_times_dict = {}
+        self._fear_cache.clear()
+        self._infection_status = self._new_state_array(HEALTHY_STATE)
+        self._infection_log = InfectionLog()
+        self._progression_times = ProgressionTimes(self._population_size)
+        self._progression_chains = {}
+        self._earliest_certain_contraction = {}
+        self._pruned_contractions = 0
         self._per_day_increases = {}
 
         self._global_time = self._params[START_TIME]
         self._max_time = self._params[MAX_TIME]
 
-        if not self._params[REUSE_EXPECTED_CASE_SEVERITIES]:
-            self._expected_case_severity = self.draw_expected_case_severity()
-
         self._last_affected = None
         self.band_time = None
-        self._quarantine_status = {}
-        self._detection_status = {}
+        self._quarantine_status = self._new_state_array(NO_QUARANTINE_STATE)
+        self._detection_status = self._new_state_array(NO_DETECTION_STATE)
         if self._params[ENABLE_VISUALIZATION]:
-            self._vis = Visualize(self._params, self.df_individuals,
+            self._vis = Visualize(self._params, self._population,
                                   self._expected_case_severity, logger)
 
 
 logger = logging.getLogger(__name__)
+ps = psutil.Process(os.getpid())
 
 @click.command()
 @click.option('--params-path', type=click.Path(exists=True))
@@ -1173,12 +1571,9 @@ def runner(params_path, df_individuals_path, run_simulation, df_households_path=
     im.run_simulation()
 
 
-# TODO: think about separate thread/process to generate random numbers, facilitate sampling
 if __name__ == '__main__':
     log_fmt = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     logging.basicConfig(level=logging.INFO, format=log_fmt)
-    pid = os.getpid()
-    ps = psutil.Process(pid)
     pd.set_option('display.max_columns', None)
     #fire.Fire(InfectionModel)
 
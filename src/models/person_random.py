@@ -0,0 +1,100 @@
+"""
+Deterministic per-person random numbers
+"""
+from struct import Struct
+
+import numpy as np
+
+_mask = (1 << 64) - 1
+_golden_gamma = 0x9E3779B97F4A7C15
+_mix_multipliers = (0xBF58476D1CE4E5B9, 0x94D049BB133111EB)
+_double = Struct('<d')
+
+
+def _splitmix64(x):
+    x = (x + _golden_gamma) & _mask
+    x = ((x ^ (x >> 30)) * _mix_multipliers[0]) & _mask
+    x = ((x ^ (x >> 27)) * _mix_multipliers[1]) & _mask
+    return x ^ (x >> 31)
+
+
+def _splitmix64_array(x):
+    x = x + np.uint64(_golden_gamma)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(_mix_multipliers[0])
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(_mix_multipliers[1])
+    return x ^ (x >> np.uint64(31))
+
+
+def person_uniform(seed, person_id):
+    """
+    Uniform number in [0, 1) of the person for the seed: SplitMix64 hash of the person index keyed by the seed,
+    so it does not depend on which people were drawn before and in which order
+    """
+    return (_splitmix64(_splitmix64(seed & _mask) ^ person_id) >> 11) * 2.0 ** -53
+
+
+def person_uniforms(seed, person_ids):
+    """ person_uniform of every person in the array """
+    key = np.uint64(_splitmix64(seed & _mask))
+    with np.errstate(over='ignore'):
+        bits = _splitmix64_array(np.asarray(person_ids).astype(np.uint64) ^ key)
+    return (bits >> np.uint64(11)) * 2.0 ** -53
+
+
+# purposes of counter-based streams of a person
+PROGRESSION_STREAM = 0
+CONTACTS_STREAM = 1
+CONTRACTION_STREAM = 2
+IMPORT_STREAM = 3
+
+
+def time_bits(time):
+    """ Bits of the time (as float64) to key a stream with, e.g. to tell apart events of the same people and kernel """
+    return int.from_bytes(_double.pack(time), 'little')
+
+
+class PersonGenerator(np.random.Generator):
+    """ NumPy generator with rand() of mocos_helper, so it can replace it in kernels and disease progression """
+    rand = np.random.Generator.random
+
+
+class PersonStreams:
+    """
+    Counter-based (Philox) random streams keyed by seed, person index, purpose and up to three further integers
+    (e.g. kernel, infecting person and time bits of the event, first below 2**32, the others below 2**64).
+    Numbers of a stream depend on its key only, so draws of one person do not change when other people are processed
+    before, after or in another batch.
+    A single Philox bit generator is rewound to the key of the requested stream (much faster than creating a new one),
+    so the returned generator is valid until the next call of stream.
+    """
+    def __init__(self, seed):
+        self._bit_generator = np.random.Philox(0)
+        self._generator = PersonGenerator(self._bit_generator)
+        self._state = self._bit_generator.state
+        self._state['state']['key'][0] = seed & _mask
+
+    def stream(self, person_id, purpose, first=0, second=0, third=0):
+        state = self._state
+        state['state']['key'][1] = person_id
+        state['state']['counter'][:] = (0, third, second, purpose << 32 | first)
+        state['buffer_pos'] = len(state['buffer'])
+        state['has_uint32'] = 0
+        self._bit_generator.state = state
+        return self._generator
+
+
+def sample_few(random, population, size, excluded):
+    """
+    Counterpart of mocos_helper.nonreplace_sample_few drawing from the given generator: size distinct elements
+    of population other than excluded (which belongs to population), all of them if there are not enough
+    """
+    if size >= len(population) - 1:
+        return [int(element) for element in population if element != excluded]
+    chosen = set()
+    selected = []
+    while len(selected) < size:
+        element = int(population[random.integers(len(population))])
+        if element != excluded and element not in chosen:
+            chosen.add(element)
+            selected.append(element)
+    return selected
@@ -0,0 +1,177 @@
+"""
+Attributes of people of the population as typed NumPy columns
+"""
+import numpy as np
+import pandas as pd
+
+from .constants import (AGE, COLUMN, GENDER, HOUSEHOLD_ID, ID, MAX_VALUE, MIN_VALUE, SOCIAL_COMPETENCE, VALUES)
+from .cache import default_cache_dir
+from .population_cache import load_population
+from .population_hdf5 import (is_hdf5_population, load_hdf5_population)
+
+required_columns = (ID, AGE, GENDER, HOUSEHOLD_ID)
+chunk_size = 1 << 20
+
+
+def row_mask(values, population_filter):
+    """ Mask of values among `values` of population_filter and between its `min` and `max` (inclusive) """
+    mask = np.ones(len(values), dtype=bool)
+    if VALUES in population_filter:
+        mask &= np.isin(values, population_filter[VALUES])
+    if MIN_VALUE in population_filter:
+        mask &= values >= population_filter[MIN_VALUE]
+    if MAX_VALUE in population_filter:
+        mask &= values <= population_filter[MAX_VALUE]
+    return mask
+
+
+def read_population(path, columns=None, population_filter=None, cached=False, cache_dir=default_cache_dir):
+    """
+    Columns of the population csv (or of its binary copy with cached=True, see population_cache) as dict of arrays
+    in the order of csv rows. HDF5/JLD2 files (see population_hdf5) are read directly, whether cached or not.
+    columns limits them to the given ones besides those needed by Population.
+    population_filter (see row_mask) keeps people whose value of its `column` matches and everybody living with them,
+    so households are never split. Then the csv is read in chunks, so the whole file is never held in memory.
+    """
+    names = None
+    if columns is not None:
+        names = list(dict.fromkeys([*required_columns, *columns]))
+    if cached or is_hdf5_population(path):
+        stored = load_hdf5_population(path) if is_hdf5_population(path) else load_population(path, cache_dir)
+        rows = None
+        if population_filter is not None:
+            matching = row_mask(stored[population_filter[COLUMN]], population_filter)
+            rows = np.flatnonzero(np.isin(stored[HOUSEHOLD_ID], np.unique(stored[HOUSEHOLD_ID][matching])))
+        return {name: stored[name] if rows is None else stored[name][rows] for name in names or stored}
+    if population_filter is None:
+        df = pd.read_csv(path, usecols=names)
+        return {name: df[name].values for name in df.columns}
+    column = population_filter[COLUMN]
+    households = None
+    if column != HOUSEHOLD_ID:
+        # households with anybody matching the filter
+        households = np.unique(np.concatenate([
+            chunk[HOUSEHOLD_ID].values[row_mask(chunk[column].values, population_filter)]
+            for chunk in pd.read_csv(path, usecols=[HOUSEHOLD_ID, column], chunksize=chunk_size)]))
+    chunks = []
+    for chunk in pd.read_csv(path, usecols=names, chunksize=chunk_size):
+        if households is None:
+            chunks.append(chunk[row_mask(chunk[HOUSEHOLD_ID].values, population_filter)])
+        else:
+            chunks.append(chunk[np.isin(chunk[HOUSEHOLD_ID].values, households)])
+    df = pd.concat(chunks)
+    return {name: df[name].values for name in df.columns}
+
+
+class Population:
+    """
+    Immutable population read from columns of the population csv (or their cached copy, see population_cache).
+    indices are person indices in the order of the csv rows and size is the number of per-person state slots
+    (largest person index + 1). Columns age, gender, household_id and social_competence (None unless the csv has it)
+    are read-only arrays indexed by person index, with 0 at indices not used by the population. They keep the dtypes
+    of the input, so cached columns stay downcast and memory-mapped whenever person indices are 0, 1, ... in order.
+    Methods *_of read single values through memoryviews, which return Python numbers much faster than indexing
+    NumPy arrays.
+    With relabel=True, people get dense person indices 0, 1, ... ordered by household and age, so members
+    of a household are contiguous in per-person arrays. Person ids of the csv are kept in ids (indexed by person index)
+    and to_external/id_of/indices_of map between them. Otherwise ids is None and person index is the csv id.
+    """
+    def __init__(self, columns, relabel=False):
+        """ columns maps names of csv columns to arrays of their values in the order of csv rows """
+        indices = np.asarray(columns[ID], dtype=np.int64)
+        external = None
+        if relabel:
+            external = indices
+            order = np.lexsort((np.asarray(columns[AGE]), np.asarray(columns[HOUSEHOLD_ID])))
+            indices = np.empty(len(order), dtype=np.int64)
+            indices[order] = np.arange(len(order))
+        self.size = int(indices.max()) + 1
+        self._in_order = len(indices) == self.size and bool((indices == np.arange(self.size)).all())
+        self.indices = self._read_only(indices)
+        self.age = self._column(columns[AGE])
+        self.gender = self._column(columns[GENDER])
+        self.household_id = self._column(columns[HOUSEHOLD_ID])
+        self.social_competence = None
+        if SOCIAL_COMPETENCE in columns:
+            self.social_competence = self._column(columns[SOCIAL_COMPETENCE])
+            self._social_competence = memoryview(np.ascontiguousarray(self.social_competence))
+        self._age = memoryview(np.ascontiguousarray(self.age))
+        self._gender = memoryview(np.ascontiguousarray(self.gender))
+        self.ids = None
+        self._internal = None
+        if external is not None:
+            self.ids = self._column(external)
+            self._ids = memoryview(np.ascontiguousarray(self.ids))
+
+    def _column(self, values):
+        """ Read-only array of the values (in the order of csv rows) indexed by person index """
+        values = np.asarray(values)
+        if not self._in_order:
+            column = np.zeros(self.size, dtype=values.dtype)
+            column[self.indices] = values
+            values = column
+        return self._read_only(values)
+
+    @staticmethod
+    def _read_only(values):
+        values = values.view()
+        values.setflags(write=False)
+        return values
+
+    @classmethod
+    def from_data_frame(cls, df):
+        return cls({name: df[name].values for name in df.columns})
+
+    def __len__(self):
+        return len(self.indices)
+
+    def rows(self, column):
+        """ Values of the column in the order of csv rows (aligned with indices) """
+        if self._in_order:
+            return column
+        return column[self.indices]
+
+    def age_of(self, person_id):
+        return self._age[person_id]
+
+    def gender_of(self, person_id):
+        return self._gender[person_id]
+
+    def social_competence_of(self, person_id):
+        return self._social_competence[person_id]
+
+    def id_of(self, person_id):
+        """ Person id of the csv of the person index """
+        if self.ids is None:
+            return person_id
+        return self._ids[person_id]
+
+    def to_external(self, person_ids):
+        """ Person ids of the csv of array of person indices """
+        if self.ids is None:
+            return person_ids
+        return self.ids[person_ids]
+
+    def indices_of(self, ids):
+        """ Person indices of array of person ids of the csv (-1 for ids not in the population) """
+        ids = np.asarray(ids, dtype=np.int64)
+        if self.ids is None and self._in_order:
+            return np.where((0 <= ids) & (ids < self.size), ids, -1)
+        if self._internal is None:
+            # built from ids present in the population, so holes of a sparse id range map to -1
+            if self.ids is None:
+                self._internal = np.full(self.size, -1, dtype=np.int64)
+                self._internal[self.indices] = self.indices
+            else:
+                self._internal = np.full(int(self.ids.max()) + 1, -1, dtype=np.int64)
+                self._internal[self.ids] = np.arange(self.size)
+        known = (0 <= ids) & (ids < len(self._internal))
+        return np.where(known, self._internal[np.where(known, ids, 0)], -1)
+
+    def to_data_frame(self):
+        """ Population as data frame of the csv indexed by person index """
+        columns = {ID: self.to_external(self.indices), AGE: self.rows(self.age), GENDER: self.rows(self.gender),
+                   HOUSEHOLD_ID: self.rows(self.household_id)}
+        if self.social_competence is not None:
+            columns[SOCIAL_COMPETENCE] = self.rows(self.social_competence)
+        return pd.DataFrame(columns, index=pd.Index(columns[ID], name=ID))
@@ -0,0 +1,100 @@
+"""
+Binary columnar cache of population csv files, so that starting a model does not parse the csv again.
+Every column is stored as .npy file with the smallest integer dtype holding its values and memory-mapped on load.
+Cached columns are found by checksum of the csv, so they are invalidated once the csv changes.
+
+Population can be converted ahead of time:
+    python -m src.models.population_cache data/processed/population.csv
+"""
+import json
+import logging
+import os
+import shutil
+import tempfile
+
+import click
+import numpy as np
+import pandas as pd
+
+from src.models.cache import (default_cache_dir, file_checksum)
+
+logger = logging.getLogger(__name__)
+
+chunk_size = 1 << 20
+columns_file = 'columns.json'
+integer_dtypes = (np.uint8, np.int8, np.uint16, np.int16, np.uint32, np.int32)
+
+
+def population_cache_dir(csv_path, cache_dir=default_cache_dir):
+    return os.path.join(cache_dir, f'population_{file_checksum(csv_path)}')
+
+
+def downcast(values):
+    """ Integer values in the smallest integer dtype holding them, other values as they are """
+    if values.dtype.kind not in 'iub' or len(values) == 0:
+        return values
+    low, high = values.min(), values.max()
+    for dtype in integer_dtypes:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return values.astype(dtype)
+    return values
+
+
+def column_values(column):
+    """
+    Values of the csv column as NumPy array, text as fixed-width unicode (missing values as '') instead of
+    Python objects, which cannot be memory-mapped
+    """
+    if pd.api.types.is_numeric_dtype(column) or pd.api.types.is_bool_dtype(column):
+        return column.values
+    return column.fillna('').to_numpy(dtype=str)
+
+
+def convert_population(csv_path, cache_dir=default_cache_dir):
+    """
+    Stores columns of the population csv in the cache (unless they are there already) and returns their directory.
+    The csv is read in chunks, so memory peaks at the size of the columns rather than of the parsed data frame.
+    """
+    directory = population_cache_dir(csv_path, cache_dir)
+    if os.path.exists(os.path.join(directory, columns_file)):
+        return directory
+    logger.info(f'Converting population {csv_path} to binary columns in {directory}')
+    chunks = {}
+    for chunk in pd.read_csv(csv_path, chunksize=chunk_size):
+        for name in chunk.columns:
+            chunks.setdefault(name, []).append(downcast(column_values(chunk[name])))
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_directory = tempfile.mkdtemp(dir=cache_dir)
+    for i, (name, parts) in enumerate(chunks.items()):
+        np.save(os.path.join(tmp_directory, f'{i}.npy'), downcast(np.concatenate(parts)))
+    with open(os.path.join(tmp_directory, columns_file), 'w') as f:
+        json.dump(list(chunks), f)
+    try:
+        os.rename(tmp_directory, directory)
+    except OSError:
+        # converted by another process in the meantime
+        shutil.rmtree(tmp_directory)
+    return directory
+
+
+def load_population(csv_path, cache_dir=default_cache_dir):
+    """ Columns of the population csv as dict of read-only memory-mapped arrays, converted on first use """
+    directory = convert_population(csv_path, cache_dir)
+    with open(os.path.join(directory, columns_file)) as f:
+        names = json.load(f)
+    return {name: np.load(os.path.join(directory, f'{i}.npy'), mmap_mode='r') for i, name in enumerate(names)}
+
+
+@click.command()
+@click.argument('csv_path', type=click.Path(exists=True))
+@click.option('--cache-dir', type=click.Path(), default=default_cache_dir)
+def main(csv_path, cache_dir):
+    """ Converts the population csv to binary columns used by models with population_cache """
+    logger.info(f'Population columns stored in {convert_population(csv_path, cache_dir)}')
+
+
+if __name__ == '__main__':
+    log_fmt = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    logging.basicConfig(level=logging.INFO, format=log_fmt)
+    main()
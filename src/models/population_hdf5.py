@@ -0,0 +1,69 @@
+"""
+Population columns read from HDF5 files, including JLD2 files of the Julia engine (see julia/src/data_loading.jl),
+so both engines run from one binary population without exporting it to csv.
+
+JLD2 files store the individuals_df data frame as a record with references to its column datasets, plain HDF5 files
+have one 1-D dataset per column in the individuals_df group (or at the top level). Contiguous uncompressed datasets
+are memory-mapped straight from the file, chunked or compressed ones are read into memory.
+
+h5py is needed for these files only:
+    pip install h5py
+"""
+import os
+
+import numpy as np
+
+from src.models.constants import ID
+
+hdf5_extensions = ('.jld2', '.h5', '.hdf5')
+individuals_df = 'individuals_df'
+
+
+def is_hdf5_population(path):
+    return os.path.splitext(path)[1].lower() in hdf5_extensions
+
+
+def load_hdf5_population(path, name=individuals_df):
+    """
+    Columns of the population stored in the HDF5/JLD2 file under name as dict of read-only arrays.
+    Julia numbers people by rows of the data frame, so idx (0, 1, ...) is added when the file has no such column.
+    """
+    try:
+        import h5py
+    except ImportError as e:
+        raise ImportError(f'h5py is required to read population from {path}: pip install h5py') from e
+    with h5py.File(path, 'r') as f:
+        node = f[name] if name in f else f
+        if isinstance(node, h5py.Dataset):
+            datasets = _data_frame_columns(f, node)
+        else:
+            datasets = {key: value for key, value in node.items()
+                        if isinstance(value, h5py.Dataset) and len(value.shape) == 1}
+        columns = {key: _column(path, dataset) for key, dataset in datasets.items()}
+    if ID not in columns:
+        columns = {ID: np.arange(len(next(iter(columns.values())))), **columns}
+    return columns
+
+
+def _data_frame_columns(f, dataset):
+    """ Column datasets of a DataFrame written by JLD2 (columns and colindex.names are references) """
+    record = dataset[()]
+    names = f[f[record['colindex']][()]['names']][()]
+    names = [name.decode() if isinstance(name, bytes) else str(name) for name in names]
+    return dict(zip(names, (f[reference] for reference in f[record['columns']][()])))
+
+
+def _column(path, dataset):
+    offset = dataset.id.get_offset()
+    if offset is None or dataset.chunks is not None:
+        values = dataset[()]
+    else:
+        values = np.memmap(path, mode='r', dtype=dataset.dtype, offset=offset, shape=dataset.shape)
+    if values.dtype.names == ('i',) and values.dtype['i'].kind == 'u':
+        # Normed fixed-point number of FixedPointNumbers.jl (e.g. social_competence), i / typemax(i)
+        return values['i'] / np.iinfo(values.dtype['i']).max
+    if values.dtype.kind == 'b':
+        return values.view(np.uint8)
+    values = values.view()
+    values.setflags(write=False)
+    return values
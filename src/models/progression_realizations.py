@@ -0,0 +1,40 @@
+"""
+Disease progression draws made once for every person and reused across seeds
+"""
+from array import array
+
+import numpy as np
+
+from .constants import (T0, T1, T2, TDEATH)
+
+
+class ProgressionRealizations:
+    """
+    Random parts of disease progression of every person (reuse_time_distribution_realizations): offsets
+    t0 - tminus1, t1 - t0, t2 - t0 and tdeath - t0 drawn from the distributions of the model and uniform numbers
+    deciding recovery time, death and detection of a mild case. Which of them are used depends on expected case
+    severity, so severities can still be drawn anew for every seed.
+    Values are float32 (28 bytes per person) in array.array columns indexed by person index - read one by one
+    from pure Python they are much faster than NumPy arrays, `take` reads them for many people through NumPy views.
+    """
+    def __init__(self, population_size, samplers, seed):
+        """ samplers maps T0, T1, T2 and TDEATH to functions drawing the offsets as sampler(rng, size) """
+        rng = np.random.default_rng(seed)
+        self._columns = [self._column(samplers[t](rng, population_size)) for t in (T0, T1, T2, TDEATH)]
+        self._columns.extend(self._column(rng.random(population_size)) for _ in range(3))
+
+    @staticmethod
+    def _column(values):
+        column = array('f')
+        column.frombytes(np.asarray(values, dtype=np.float32).tobytes())
+        return column
+
+    def get(self, person_id):
+        """ Returns (t0 - tminus1, t1 - t0, t2 - t0, tdeath - t0, recovery, death, detection uniforms) of the person """
+        t0, t1, t2, tdeath, recovery, death, detection = self._columns
+        return (t0[person_id], t1[person_id], t2[person_id], tdeath[person_id], recovery[person_id],
+                death[person_id], detection[person_id])
+
+    def take(self, persons):
+        """ Columns of get for array of person indices, as float64 arrays """
+        return [np.frombuffer(column, dtype=np.float32)[persons].astype(np.float64) for column in self._columns]
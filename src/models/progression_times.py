@@ -0,0 +1,100 @@
+"""
+Columnar storage of disease progression times
+"""
+from array import array
+
+import numpy as np
+import pandas as pd
+
+from .constants import *
+
+progression_columns = (TMINUS1, T0, T1, T2, TDEATH, TRECOVERY, TDETECTION, QUARANTINE)
+progression_column_index = {column: i for i, column in enumerate(progression_columns)}
+
+default_chunk_bits = 14
+
+
+class ProgressionTimes:
+    """
+    Disease progression times of people affected by the epidemic (infected or quarantined).
+    Every person gets one row of float64 values (NaN if the time is not set) when first stored,
+    rows are kept in chunks of 2 ** chunk_bits rows, so the store grows without copying.
+    Row of a person is looked up in int32 array indexed by person index.
+    Chunks are array.array objects - reading single values from pure Python is much faster than from NumPy arrays,
+    while to_frame still gets all values without copying them one by one.
+    """
+    def __init__(self, population_size, chunk_bits=default_chunk_bits):
+        self._row_of_person = array('i', [-1]) * population_size
+        self._chunk_bits = chunk_bits
+        self._chunk_mask = (1 << chunk_bits) - 1
+        self._width = len(progression_columns)
+        self._empty_chunk = array('d', [np.nan]) * ((1 << chunk_bits) * self._width)
+        self._empty_row = array('d', [np.nan]) * self._width
+        self._chunks = []
+        self._persons = array('i')
+
+    def __len__(self):
+        return len(self._persons)
+
+    def __contains__(self, person_id):
+        return self._row_of_person[person_id] >= 0
+
+    def _offset(self, person_id):
+        """ Returns (chunk, offset of the person's row in the chunk), new row is added if needed """
+        row = self._row_of_person[person_id]
+        if row < 0:
+            row = len(self._persons)
+            if row & self._chunk_mask == 0:
+                self._chunks.append(array('d', self._empty_chunk))
+            self._persons.append(person_id)
+            self._row_of_person[person_id] = row
+        return self._chunks[row >> self._chunk_bits], (row & self._chunk_mask) * self._width
+
+    def get(self, person_id, column):
+        """ Returns time stored for the person or None if it is not set """
+        row = self._row_of_person[person_id]
+        if row < 0:
+            return None
+        value = self._chunks[row >> self._chunk_bits][(row & self._chunk_mask) * self._width
+                                                      + progression_column_index[column]]
+        if value != value:
+            return None
+        return value
+
+    def set(self, person_id, column, value) -> None:
+        chunk, offset = self._offset(person_id)
+        chunk[offset + progression_column_index[column]] = np.nan if value is None else value
+
+    def set_progression(self, person_id, tminus1, t0, t1, t2, tdeath, trecovery, tdetection) -> None:
+        """ Stores times drawn at infection, all previously stored times of the person are discarded """
+        chunk, offset = self._offset(person_id)
+        chunk[offset:offset + self._width] = self._empty_row
+        for i, value in enumerate((tminus1, t0, t1, t2, tdeath, trecovery, tdetection)):
+            if value is not None:
+                chunk[offset + i] = value
+
+    def set_progressions(self, person_ids, times) -> None:
+        """ set_progression for many people, times is (n, 7) array in set_progression order with NaN if not set """
+        tail = [np.nan] * (self._width - times.shape[1])
+        for person_id, row in zip(person_ids.tolist(), times.tolist()):
+            chunk, offset = self._offset(person_id)
+            chunk[offset:offset + self._width] = array('d', row + tail)
+
+    def to_frame(self, ids=None) -> pd.DataFrame:
+        """
+        DataFrame indexed by person index, with ID column and one column per progression time.
+        ID is set only for infected people (people that were quarantined only have it empty).
+        If ids (array indexed by person index) is given, person ids from it are used instead of person indices.
+        """
+        size = len(self._persons)
+        if size == 0:
+            return pd.DataFrame(columns=[ID, *progression_columns])
+        values = np.concatenate([np.frombuffer(chunk) for chunk in self._chunks]).reshape(-1, self._width)[:size]
+        persons = np.frombuffer(self._persons, dtype=np.int32)
+        if ids is not None:
+            persons = ids[persons]
+        df = pd.DataFrame(values, index=persons, columns=progression_columns)
+        ids = pd.array(persons, dtype='Int64')
+        ids[np.isnan(values[:, progression_column_index[T0]])] = pd.NA
+        df.insert(0, ID, ids)
+        return df
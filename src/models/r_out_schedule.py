@@ -0,0 +1,65 @@
+"""
+R_out schedule of the constant kernel as a piecewise-constant rate multiplier
+"""
+from bisect import bisect_right
+
+import mocos_helper
+
+from .constants import (MIN_TIME, MAX_TIME, OVERRIDE_R_FRACTION)
+
+
+class ROutSchedule:
+    """
+    Interval index over r_out_schedule entries. Schedule times are split into segments by all MIN_TIME/MAX_TIME
+    values, every segment gets OVERRIDE_R_FRACTION of the first entry covering it (as quick_return_condition
+    scanned the entries in order) or None if no entry covers it. Segment of a time is found by bisection.
+    Times are schedule times, that is simulation time minus the zero time offset.
+    """
+    def __init__(self, schedule):
+        self._bounds = sorted({float(s[MIN_TIME]) for s in schedule} | {float(s[MAX_TIME]) for s in schedule})
+        # fraction of segment i is used for bounds[i - 1] <= time < bounds[i]
+        self._fractions = [None] * (len(self._bounds) + 1)
+        for i in range(1, len(self._bounds)):
+            middle = (self._bounds[i - 1] + self._bounds[i]) / 2
+            for s in schedule:
+                if s[MIN_TIME] <= middle <= s[MAX_TIME]:
+                    self._fractions[i] = s[OVERRIDE_R_FRACTION]
+                    break
+
+    def fraction_at(self, time):
+        """ Override fraction in force at the time or None if the schedule does not cover it """
+        return self._fractions[bisect_right(self._bounds, time)]
+
+    def segments(self, start, end):
+        """
+        Returns (segments, mass) of the rate multiplier over [start, end] - list of (segment start, segment end,
+        multiplier) and its integral - or None if no schedule entry overlaps [start, end] (multiplier is 1 there).
+        """
+        first = bisect_right(self._bounds, start)
+        last = bisect_right(self._bounds, end)
+        if all(self._fractions[i] is None for i in range(first, last + 1)):
+            return None
+        segments = []
+        mass = 0.0
+        segment_start = start
+        for i in range(first, last + 1):
+            segment_end = end if i == last else self._bounds[i]
+            multiplier = 1.0 if self._fractions[i] is None else self._fractions[i]
+            segments.append((segment_start, segment_end, multiplier))
+            mass += (segment_end - segment_start) * multiplier
+            segment_start = segment_end
+        return segments, mass
+
+    @staticmethod
+    def sample(segments, mass, random=mocos_helper):
+        """ Draws a time from [start, end] with density proportional to the multiplier (inverse of its integral) """
+        u = random.uniform(low=0.0, high=mass)
+        for segment_start, segment_end, multiplier in segments:
+            segment_mass = (segment_end - segment_start) * multiplier
+            if u < segment_mass:
+                return segment_start + u / multiplier
+            u -= segment_mass
+        # u == mass up to rounding
+        for segment_start, segment_end, multiplier in reversed(segments):
+            if multiplier > 0:
+                return segment_end
@@ -100,6 +100,13 @@ constant_age_setup_schema = Schema(Or(None, {
     INTER_AGE_CONTACTS: bool,
 }))
 
+population_filter_schema = Schema(Or(None, {
+    COLUMN: str,
+    Optional(VALUES): list,
+    Optional(MIN_VALUE): Or(int, float),
+    Optional(MAX_VALUE): Or(int, float),
+}))
+
 infection_model_schemas = {
     INITIAL_CONDITIONS: Schema(Or(initial_conditions_schema1, initial_conditions_schema2)),
     STOP_SIMULATION_THRESHOLD: Schema(And(Use(int), lambda n: n > 0)),
@@ -152,4 +159,21 @@ infection_model_schemas = {
     STOP_SIMULATION_THRESHOLD_TYPE: Schema(Or(PREVALENCE, DETECTIONS)),
     OLD_IMPLEMENTATION_FOR_HOUSEHOLD_KERNEL: Schema(bool),
     CONSTANT_AGE_SETUP: constant_age_setup_schema,
+    QUEUE_COMPACTION_THRESHOLD: Schema(Or(None, And(Use(float), lambda x: 0.0 < x <= 1.0))),
+    SCHEDULER: Schema(Or(*Schedulers.map())),
+    CALENDAR_BUCKET_WIDTH: Schema(And(Use(float), lambda x: x > 0)),
+    LAZY_PROGRESSION: Schema(bool),
+    PRUNE_DOMINATED_CONTRACTIONS: Schema(bool),
+    ENGINE: Schema(Or(*Engines.map())),
+    TIME_STEP: Schema(And(Use(float), lambda x: x > 0)),
+    RANDOM_BUFFER_SIZE: Schema(Or(None, And(int, lambda x: x > 0))),
+    RANDOM_BUFFER_BACKGROUND: Schema(bool),
+    LAZY_EXPECTED_CASE_SEVERITIES: Schema(bool),
+    COUNTER_BASED_RANDOM: Schema(bool),
+    POPULATION_CACHE: Schema(bool),
+    HOUSEHOLDS_CACHE: Schema(bool),
+    CACHE_DIR: Schema(Or(None, str)),
+    HOUSEHOLD_CONTIGUOUS_INDICES: Schema(bool),
+    POPULATION_COLUMNS: Schema(Or(None, [str])),
+    POPULATION_FILTER: population_filter_schema,
 }
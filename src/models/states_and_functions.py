@@ -1,8 +1,10 @@
 import collections
-from math import exp
+from math import (exp, log, tanh)
 
+import mocos_helper
 import numpy as np
-from .enums import (FearFunctions, InfectionStatus, ImportIntensityFunctions)
+from .enums import (FearFunctions, InfectionStatus, DetectionStatus, QuarantineStatus, ImportIntensityFunctions,
+                    ExpectedCaseSeverity)
 from .constants import *
 
 fear_functions = {
@@ -17,6 +19,50 @@ fear_functions = {
                              -np.tanh(((time * weight_detected + deaths * weight_deaths) - loc) / scale) * ((1 - limit_value) / 2) + (1 - (1 - limit_value) / 2))
 }
 
+
+def _scalar_fear_sigmoid(detected, deaths, time, weight_detected, weight_deaths, loc, scale, limit_value):
+    # exp overflows above ~709.8, the sigmoid is already 1.0 at 700
+    e = exp(min((detected * weight_detected + deaths * weight_deaths - loc) / scale, 700.0))
+    return 1.0 + limit_value - limit_value / 0.5 * e / (1 + e)
+
+
+def _scalar_fear_tanh(detected, deaths, time, weight_detected, weight_deaths, loc, scale, limit_value):
+    return -tanh(((detected * weight_detected + deaths * weight_deaths) - loc) / scale) * ((1 - limit_value) / 2) \
+           + (1 - (1 - limit_value) / 2)
+
+
+def _scalar_fear_tanh_time(detected, deaths, time, weight_detected, weight_deaths, loc, scale, limit_value):
+    return -tanh(((time * weight_detected + deaths * weight_deaths) - loc) / scale) * ((1 - limit_value) / 2) \
+           + (1 - (1 - limit_value) / 2)
+
+
+# fear_functions evaluated on Python floats with math instead of NumPy (used by InfectionModel.fear)
+scalar_fear_functions = {
+    FearFunctions.FearDisabled: (lambda *args, **kwargs: 1),
+    FearFunctions.FearSigmoid: _scalar_fear_sigmoid,
+    FearFunctions.FearTanh: _scalar_fear_tanh,
+    FearFunctions.FearTanhTime: _scalar_fear_tanh_time,
+}
+
+# fear functions whose value changes with simulation time, not only with detected people and deaths
+time_dependent_fear_functions = {_scalar_fear_tanh_time}
+
+def _numpy_poisson(rng, size, lam):
+    """ Poisson draws as float64 array or, with size=None, a single float """
+    if size is None:
+        return float(rng.poisson(lam))
+    return rng.poisson(lam, size).astype(np.float64)
+
+
+# NumPy counterparts of mocos_helper distributions returned by InfectionModel.setup_random_distribution,
+# called as sampler(rng, size, **kwargs)
+numpy_samplers = {
+    mocos_helper.lognormal: lambda rng, size, mean, sigma: rng.lognormal(mean, sigma, size),
+    mocos_helper.gamma: lambda rng, size, alpha, beta: rng.gamma(alpha, beta, size),
+    mocos_helper.exponential: lambda rng, size, scale: rng.exponential(scale, size),
+    mocos_helper.poisson: _numpy_poisson,
+}
+
 active_states = [
     InfectionStatus.Contraction,
     InfectionStatus.Infectious,
@@ -30,10 +76,89 @@ termination_states = [
     InfectionStatus.Recovered
 ]
 
-Event = collections.namedtuple('Event', [TIME, PERSON_INDEX, TYPE, INITIATED_BY, INITIATED_THROUGH, ISSUED_TIME])
+# integer codes of per-person states kept in int8 arrays indexed by person index
+infection_statuses = tuple(status.value for status in [
+    InfectionStatus.Healthy,
+    InfectionStatus.Contraction,
+    InfectionStatus.Infectious,
+    InfectionStatus.StayHome,
+    InfectionStatus.Hospital,
+    InfectionStatus.Recovered,
+    InfectionStatus.Death
+])
+(HEALTHY_STATE, CONTRACTION_STATE, INFECTIOUS_STATE, STAY_HOME_STATE, HOSPITAL_STATE, RECOVERED_STATE,
+ DEATH_STATE) = range(len(infection_statuses))
+infection_status_codes = {status: code for code, status in enumerate(infection_statuses)}
+is_active_state = tuple(status in active_states for status in infection_statuses)
+
+detection_statuses = (DetectionStatus.NotDetected.value, DetectionStatus.Detected.value)
+NOT_DETECTED_STATE, DETECTED_STATE = range(len(detection_statuses))
+# detection status code of people who were never infected (they have no detection status)
+NO_DETECTION_STATE = -1
+
+quarantine_statuses = (QuarantineStatus.NoQuarantine.value, QuarantineStatus.Quarantine.value)
+NO_QUARANTINE_STATE, QUARANTINE_STATE = range(len(quarantine_statuses))
+
+# expected case severity codes are -1 for indices without a person
+case_severities = tuple(severity.value for severity in [
+    ExpectedCaseSeverity.Asymptomatic,
+    ExpectedCaseSeverity.Mild,
+    ExpectedCaseSeverity.Severe,
+    ExpectedCaseSeverity.Critical
+])
+ASYMPTOMATIC_CASE, MILD_CASE, SEVERE_CASE, CRITICAL_CASE = range(len(case_severities))
+case_severity_codes = {severity: code for code, severity in enumerate(case_severities)}
+is_severe_case = tuple(code in (SEVERE_CASE, CRITICAL_CASE) for code in range(len(case_severities)))
+
+Event = collections.namedtuple('Event', [TIME, PERSON_INDEX, TYPE, INITIATED_BY, INITIATED_THROUGH])
+
+# integer codes of event types and kernels (ways of initiating an event) used by packed event records
+event_types = (TMINUS1, T0, T1, T2, TDEATH, TRECOVERY, TDETECTION)
+TMINUS1_CODE, T0_CODE, T1_CODE, T2_CODE, TDEATH_CODE, TRECOVERY_CODE, TDETECTION_CODE = range(len(event_types))
+event_type_codes = {event_type: code for code, event_type in enumerate(event_types)}
+
+
+def _transition_table(rules):
+    """ Tuple indexed by [event type code][infection status code], None where the event has no effect """
+    return tuple(tuple(rules.get(type_code, {}).get(state) for state in range(len(infection_statuses)))
+                 for type_code in range(len(event_types)))
+
+
+_alive_states = [state for state in range(len(infection_statuses)) if state not in (DEATH_STATE, RECOVERED_STATE)]
+
+# infection status after a disease progression (or contraction) event, by event type and current infection status
+state_transitions = _transition_table({
+    TMINUS1_CODE: {HEALTHY_STATE: CONTRACTION_STATE},
+    T0_CODE: {CONTRACTION_STATE: INFECTIOUS_STATE},
+    T1_CODE: {INFECTIOUS_STATE: STAY_HOME_STATE},
+    T2_CODE: {INFECTIOUS_STATE: HOSPITAL_STATE, STAY_HOME_STATE: HOSPITAL_STATE},
+    TDEATH_CODE: {state: DEATH_STATE for state in _alive_states},
+    TRECOVERY_CODE: {state: RECOVERED_STATE for state in _alive_states},
+    TDETECTION_CODE: {state: state for state in range(len(infection_statuses))
+                      if state not in (HEALTHY_STATE, RECOVERED_STATE)},
+})
+
+# infection status of people infected from outside of the population (initial conditions and imports)
+external_infection_transitions = _transition_table({
+    TMINUS1_CODE: {HEALTHY_STATE: CONTRACTION_STATE},
+    T0_CODE: {HEALTHY_STATE: INFECTIOUS_STATE},
+})
+
+kernels = (HOUSEHOLD, CONSTANT, FRIENDSHIP, CONSTANT_AGE, SPORADIC, WORKPLACE, TRANSPORT,
+           IMPORT_INTENSITY, INITIAL_CONDITIONS, DISEASE_PROGRESSION, DETECTION, QUARANTINE_FOLLOWED_DETECTION)
+(HOUSEHOLD_CODE, CONSTANT_CODE, FRIENDSHIP_CODE, CONSTANT_AGE_CODE, SPORADIC_CODE, WORKPLACE_CODE, TRANSPORT_CODE,
+ IMPORT_INTENSITY_CODE, INITIAL_CONDITIONS_CODE, DISEASE_PROGRESSION_CODE, DETECTION_CODE,
+ QUARANTINE_FOLLOWED_DETECTION_CODE) = range(len(kernels))
+kernel_codes = {kernel: code for code, kernel in enumerate(kernels)}
 
 import_intensity_functions = {
     ImportIntensityFunctions.Exponential: (lambda x, rate, multiplier: multiplier*exp(rate * x)),
     ImportIntensityFunctions.Polynomial: (lambda x, rate, multiplier: multiplier*pow(rate, x)),
     ImportIntensityFunctions.NoImport: (lambda _: 0)
 }
+
+# time at which the (increasing) import intensity function reaches the given value
+import_intensity_inverse_functions = {
+    ImportIntensityFunctions.Exponential: (lambda y, rate, multiplier: log(y / multiplier) / rate),
+    ImportIntensityFunctions.Polynomial: (lambda y, rate, multiplier: log(y / multiplier) / log(rate)),
+}
@@ -8,11 +8,11 @@ from src.models.states_and_functions import *
 
 
 class Visualize:
-    def __init__(self, params, df_individuals, expected_case_severity, logger):
+    def __init__(self, params, population, expected_case_severity, logger):
         self._params = params
         self.df_progression_times = None
         self.df_infections = None
-        self.df_individuals = df_individuals
+        self.population = population
         self.serial_interval_median = None
         self.fear = None
         self.active_people = None
@@ -155,15 +155,16 @@ class Visualize:
     def lancet_draw_death_age_cohorts(self, simulation_output_dir):
         df_r1 = self.df_progression_times
         df_r2 = self.df_infections
-        df_in = self.df_individuals
+        population = self.population
+        ages = population.rows(population.age)
         lims = default_age_cohorts_with_descriptions
 
         fig, ax = plt.subplots(nrows=1, ncols=1)
         for limm, limM, descr in lims:
-            cond1 = df_in.age >= limm
-            cond2 = df_in.age < limM
+            cond1 = ages >= limm
+            cond2 = ages < limM
             cond = np.logical_and(cond1, cond2)
-            filtered = df_r1.loc[df_r1.index.isin(df_in[cond].index)]
+            filtered = df_r1.loc[df_r1.index.isin(population.to_external(population.indices[cond]))]
             death_cases = filtered[~filtered.tdeath.isna()].sort_values(by='tdeath').tdeath
             d_cases = death_cases[death_cases <= df_r2.contraction_time.max(axis=0)].sort_values()
             d_times = np.arange(1, 1 + len(d_cases))
@@ -179,15 +180,16 @@ class Visualize:
     def draw_death_age_cohorts(self, simulation_output_dir):
         df_r1 = self.df_progression_times
         df_r2 = self.df_infections
-        df_in = self.df_individuals
+        population = self.population
+        ages = population.rows(population.age)
         lims = default_age_cohorts_with_descriptions
 
         fig, ax = plt.subplots(nrows=1, ncols=1)
         for limm, limM, descr in lims:
-            cond1 = df_in.age >= limm
-            cond2 = df_in.age < limM
+            cond1 = ages >= limm
+            cond2 = ages < limM
             cond = np.logical_and(cond1, cond2)
-            filtered = df_r1.loc[df_r1.index.isin(df_in[cond].index)]
+            filtered = df_r1.loc[df_r1.index.isin(population.to_external(population.indices[cond]))]
             death_cases = filtered[~filtered.tdeath.isna()].sort_values(by='tdeath').tdeath
             d_cases = death_cases[death_cases <= df_r2.contraction_time.max(axis=0)].sort_values()
             d_times = np.arange(1, 1 + len(d_cases))
@@ -761,7 +763,7 @@ class Visualize:
         df_r2 = self.df_infections
 
         fig, ax = plt.subplots(nrows=1, ncols=1)
-        cond = [k for k, v in self._expected_case_severity.items() if v == ExpectedCaseSeverity.Critical]
+        cond = self.population.to_external(np.flatnonzero(self._expected_case_severity == CRITICAL_CASE))
         critical = df_r1.loc[df_r1.index.isin(cond)]
         plus = critical.t2.values
         deceased = critical[~critical.tdeath.isna()]
@@ -811,7 +813,7 @@ class Visualize:
         df_r2 = self.df_infections
 
         fig, ax = plt.subplots(nrows=1, ncols=1)
-        cond = [k for k, v in self._expected_case_severity.items() if v == ExpectedCaseSeverity.Critical]
+        cond = self.population.to_external(np.flatnonzero(self._expected_case_severity == CRITICAL_CASE))
         critical = df_r1.loc[df_r1.index.isin(cond)]
         plus = critical.t2.values
         deceased = critical[~critical.tdeath.isna()]
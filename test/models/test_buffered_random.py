@@ -0,0 +1,20 @@
+from unittest import TestCase
+from src.models.buffered_random import BufferedRandom
+
+
+def _draws(random, count=1000):
+    return [(random.rand(), random.uniform(low=1.0, high=2.0), random.exponential(scale=3.0)) for _ in range(count)]
+
+
+class TestBufferedRandom(TestCase):
+
+    def test_draws_do_not_depend_on_block_size(self):
+        assert _draws(BufferedRandom(7, block_size=1 << 16)) == _draws(BufferedRandom(7, block_size=3))
+
+    def test_background_threads_give_same_draws(self):
+        random = BufferedRandom(7, block_size=5, background=True)
+        assert _draws(BufferedRandom(7)) == _draws(random)
+        random.close()
+
+    def test_seeds_differ(self):
+        assert _draws(BufferedRandom(1), 10) != _draws(BufferedRandom(2), 10)
@@ -0,0 +1,43 @@
+import os
+import tempfile
+from unittest import TestCase
+import numpy as np
+from src.models.cache import (cache_path, file_checksum, load_array, load_arrays, save_array, save_arrays)
+
+
+class TestCache(TestCase):
+
+    def test_array_round_trip(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = cache_path('severity', {'seed': 1}, directory)
+            assert load_array(path) is None
+            values = np.array([0, 3, 1, 2], dtype=np.int8)
+            save_array(path, values)
+            loaded = load_array(path)
+            assert loaded.dtype == np.int8 and loaded.tolist() == values.tolist()
+            # no temporary files are left next to the stored array
+            assert os.listdir(directory) == [os.path.basename(path)]
+
+    def test_arrays_round_trip(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = cache_path('households', [1, 2], directory, suffix='')
+            assert load_arrays(path, ('offsets', 'members')) is None
+            save_arrays(path, {'offsets': np.array([0, 2, 3]), 'members': np.array([4, 5, 6], dtype=np.int32)})
+            # stored by another process in the meantime
+            save_arrays(path, {'offsets': np.array([0, 1]), 'members': np.array([9], dtype=np.int32)})
+            loaded = load_arrays(path, ('offsets', 'members'))
+            assert isinstance(loaded['members'], np.memmap)
+            assert loaded['offsets'].tolist() == [0, 2, 3] and loaded['members'].tolist() == [4, 5, 6]
+            assert os.listdir(directory) == [os.path.basename(path)]
+
+    def test_changed_input_invalidates_cache(self):
+        with tempfile.TemporaryDirectory() as directory:
+            csv_path = os.path.join(directory, 'population.csv')
+            with open(csv_path, 'w') as f:
+                f.write('idx,age\n0,30\n')
+            path = cache_path('severity', [file_checksum(csv_path), 1], directory)
+            assert cache_path('severity', [file_checksum(csv_path), 1], directory) == path
+            assert cache_path('severity', [file_checksum(csv_path), 2], directory) != path
+            with open(csv_path, 'a') as f:
+                f.write('1,40\n')
+            assert cache_path('severity', [file_checksum(csv_path), 1], directory) != path
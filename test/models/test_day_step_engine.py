@@ -0,0 +1,62 @@
+import json
+import os
+import tempfile
+from unittest import TestCase
+import numpy as np
+from src.models import compare_engines
+from src.models.constants import CONTRACTION_TIME
+from src.models.enums import Engines
+from test.models import test_infection_model
+
+# household kernel of the exact engine divides by its probability, so it is negligible rather than 0
+no_transmission = {'sporadic': 0.0, 'transport': 0.0, 'friendship': 0.0, 'household': 1e-12, 'workplace': 0.0,
+                   'constant': 0.0}
+initial_conditions = [{'person_index': person_index, 'contraction_time': 0, 'infection_status': 'contraction'}
+                      for person_index in (0, 7, 31)]
+
+
+def run_engine(directory, engine, **params):
+    """ Contractions of every seed of the small population (see small_inputs) run with the engine """
+    os.makedirs(directory, exist_ok=True)
+    params_path, individuals_path = test_infection_model.small_inputs(directory, **params)
+    with open(params_path) as f:
+        params = json.load(f)
+    output_dir = os.path.join(directory, engine.value)
+    os.makedirs(output_dir)
+    return compare_engines.run_engine(engine, params, output_dir, individuals_path, None)
+
+
+class TestDayStepEngine(TestCase):
+
+    def test_fixed_seed_is_deterministic(self):
+        with tempfile.TemporaryDirectory() as directory:
+            _, first = run_engine(os.path.join(directory, 'first'), Engines.DayStep, random_seed=3)
+            _, second = run_engine(os.path.join(directory, 'second'), Engines.DayStep, random_seed=3)
+            assert len(first[3]) > 1
+            assert first[3].equals(second[3])
+
+    def test_engines_infect_the_same_people_without_transmission(self):
+        infected = {}
+        for engine in Engines:
+            with tempfile.TemporaryDirectory() as directory:
+                model = test_infection_model.small_model(
+                    directory, engine=engine.value, transmission_probabilities=no_transmission,
+                    import_intensity={'function': 'no_import'}, initial_conditions=initial_conditions)
+                model.run_simulation()
+                infected[engine] = set(model.infection_status)
+        assert infected[Engines.Exact] == infected[Engines.DayStep] == {0, 7, 31}
+
+    def test_mean_infections_agree_with_exact_engine(self):
+        with tempfile.TemporaryDirectory() as directory:
+            results = {engine: run_engine(directory, engine, random_seed='range(20)', max_time=60)
+                       for engine in Engines}
+            means = {engine: np.mean([len(contractions) for contractions in results[engine][1].values()])
+                     for engine in Engines}
+            assert abs(means[Engines.DayStep] - means[Engines.Exact]) < 0.25 * means[Engines.Exact]
+            compare_engines.compare(results, directory)
+            assert os.path.exists(os.path.join(directory, 'incidence_comparison.png'))
+            with open(os.path.join(directory, 'incidence_comparison.txt')) as f:
+                assert len(f.readlines()) == 22
+            contractions = results[Engines.Exact][1][0]
+            days = int(np.ceil(contractions[CONTRACTION_TIME].max())) + 1
+            assert compare_engines.daily_incidence(contractions, days).sum() == len(contractions)
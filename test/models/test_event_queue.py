@@ -0,0 +1,126 @@
+from unittest import TestCase
+import random
+from src.models.event_queue import (EventQueue, CalendarEventQueue, event_key, key_time)
+
+
+class TestEventQueue(TestCase):
+
+    def test_time_order(self):
+        queue = EventQueue()
+        for time in [3.0, 1.0, 2.0]:
+            queue.push(time, int(time))
+        assert [1, 2, 3] == [queue.pop() for _ in range(3)]
+        assert queue.empty()
+
+    def test_ties_are_fifo(self):
+        queue = EventQueue()
+        queue.push(1.0, 2)
+        queue.push(1.0, 0)
+        queue.push(1.0, 1)
+        assert [2, 0, 1] == [queue.pop() for _ in range(3)]
+
+    def test_queues_are_independent(self):
+        first = EventQueue()
+        second = EventQueue()
+        first.push(0.0, 0)
+        assert 1 == len(first)
+        assert second.empty()
+
+    def test_invalidated_events_are_dropped(self):
+        queue = EventQueue()
+        queue.push(1.0, 0, owner=7)
+        queue.push(2.0, 1, owner=8)
+        queue.invalidate(7)
+        queue.push(3.0, 2, owner=7)
+        assert 2 == len(queue)
+        assert [1, 2] == [queue.pop() for _ in range(2)]
+        assert queue.empty()
+        assert 1 == queue.dropped
+
+    def test_compaction(self):
+        queue = EventQueue(compaction_threshold=0.5)
+        for owner in range(2000):
+            queue.push(float(owner), owner, owner=owner)
+        for owner in range(1001):
+            queue.invalidate(owner)
+        assert 999 == len(queue._heap)
+        assert 999 == len(queue)
+        assert list(range(1001, 2000)) == [queue.pop() for _ in range(999)]
+
+    def test_calendar_queue_order_matches_heap(self):
+        rng = random.Random(1)
+        heap, calendar = EventQueue(), CalendarEventQueue(bucket_width=0.5)
+        for i in range(500):
+            time = round(rng.uniform(0.0, 30.0), 1)
+            for queue in (heap, calendar):
+                queue.push(time, i, owner=i % 50)
+        for owner in range(10):
+            heap.invalidate(owner)
+            calendar.invalidate(owner)
+        assert len(heap) == len(calendar)
+        assert [heap.pop() for _ in range(len(heap))] == [calendar.pop() for _ in range(len(calendar))]
+
+    def test_calendar_queue_interleaved_with_heap(self):
+        rng = random.Random(2)
+        heap, calendar = EventQueue(), CalendarEventQueue(bucket_width=0.25)
+        now, popped = 0.0, []
+        for slot in range(3000):
+            # mostly near future, some events in the current bucket, in the past or beyond a turn of the ring
+            offset = rng.choice((rng.expovariate(1.0), 0.0, -rng.uniform(0.0, 1.0), rng.uniform(100.0, 1000.0)))
+            for queue in (heap, calendar):
+                queue.push(now + offset, slot, owner=slot % 100)
+            if slot % 3 == 0:
+                now = heap.peek_time()
+                assert now == calendar.peek_time()
+                popped.append((heap.pop(), calendar.pop()))
+            if slot % 7 == 0:
+                heap.invalidate(slot % 100)
+                calendar.invalidate(slot % 100)
+        assert len(heap) == len(calendar)
+        popped.extend((heap.pop(), calendar.pop()) for _ in range(len(heap)))
+        assert all(a == b for a, b in popped)
+        assert calendar.empty()
+
+    def test_reserved_sequence_keeps_push_order(self):
+        queue = EventQueue()
+        first = queue.reserve(2)
+        queue.push(1.0, 0, owner=None)
+        queue.push(1.0, 1, owner=None, sequence=first + 1)
+        assert [1, 0] == [queue.pop() for _ in range(2)]
+
+    def test_keys_are_ordered_by_time_and_sequence(self):
+        times = [-3.5, -1e-300, 0.0, 1e-300, 0.5, 2.0, 1e300]
+        keys = [event_key(time, 0, 7) for time in times]
+        assert keys == sorted(keys)
+        assert event_key(1.0, 1, 0) < event_key(1.0, 2, 0) < event_key(1.5, 0, 0)
+        assert [key_time(key) for key in keys] == times
+        queue = EventQueue()
+        queue.push(0.25, 3)
+        assert 0.25 == queue.peek_time()
+
+    def test_events_of_invalidated_sources_are_dropped(self):
+        queue = EventQueue()
+        queue.push(1.0, 0, owner=7, source=3)
+        queue.push(2.0, 1, owner=8, source=4)
+        queue.push(3.0, 2, owner=7, source=3)
+        queue.invalidate_source(3)
+        queue.invalidate(7)
+        assert [1] == [queue.pop()]
+        assert queue.empty()
+        queue.push(4.0, 3, owner=9, source=4)
+        queue.invalidate_source(4)
+        assert queue.empty()
+        queue.push(5.0, 4, owner=9)
+        assert [4] == [queue.pop()]
+        assert queue.empty() and 0 == len(queue)
+
+    def test_compaction_drops_events_of_invalidated_sources(self):
+        queue = EventQueue(compaction_threshold=0.5)
+        for slot in range(2000):
+            queue.push(float(slot), slot, owner=slot, source=slot % 2)
+        queue.invalidate_source(1)
+        for owner in range(1001):
+            queue.invalidate(owner)
+        assert 499 == len(queue._heap) == len(queue)
+        assert list(range(1002, 2000, 2)) == [queue.pop() for _ in range(499)]
+        assert queue.empty()
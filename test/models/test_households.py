@@ -0,0 +1,44 @@
+import os
+import tempfile
+from unittest import TestCase
+import numpy as np
+from src.models.households import Households
+
+person_ids = np.array([0, 1, 2, 4, 5])
+household_ids = np.array([30, 10, 30, 20, 10])
+
+
+class TestHouseholds(TestCase):
+
+    def test_from_population(self):
+        households = Households.from_population(person_ids, household_ids, 6)
+        assert households.ids.tolist() == [10, 20, 30]
+        assert [households.inhabitants(h) for h in range(len(households))] == [[1, 5], [4], [0, 2]]
+        assert [households.household_of(person_id) for person_id in range(6)] == [2, 0, 2, -1, 1, 0]
+        assert households.capacity(2) == 2
+        assert households.sizes().tolist() == [2, 1, 2]
+
+    def test_csv_and_stored_households_are_the_same(self):
+        households = Households.from_population(person_ids, household_ids, 6)
+        with tempfile.TemporaryDirectory() as directory:
+            csv_path = os.path.join(directory, 'households.csv')
+            households.to_data_frame().to_csv(csv_path)
+            from_csv = Households.from_csv(csv_path, 6)
+            households.save(os.path.join(directory, 'households'))
+            loaded = Households.load(os.path.join(directory, 'households'))
+            assert Households.load(os.path.join(directory, 'missing')) is None
+            for other in (from_csv, loaded):
+                for name in ('ids', 'offsets', 'members', 'household'):
+                    assert (getattr(other, name) == getattr(households, name)).all()
+            assert loaded.inhabitants(0) == [1, 5]
+
+    def test_person_ids_are_mapped(self):
+        households = Households.from_population(np.array([0, 1, 2]), np.array([5, 6, 5]), 3)
+        ids = np.array([10, 11, 12])
+        df = households.to_data_frame(ids)
+        assert df.loc[5, 'idx'] == [10, 12]
+        with tempfile.TemporaryDirectory() as directory:
+            csv_path = os.path.join(directory, 'households.csv')
+            df.to_csv(csv_path)
+            from_csv = Households.from_csv(csv_path, 3, lambda person_ids: person_ids - 10)
+            assert (from_csv.members == households.members).all()
@@ -0,0 +1,41 @@
+from unittest import TestCase
+import numpy as np
+from src.models.constants import (CONTRACTION_TIME, KERNEL, SOURCE, TARGET)
+from src.models.infection_log import InfectionLog
+from src.models.states_and_functions import (CONSTANT_CODE, HOUSEHOLD_CODE, IMPORT_INTENSITY_CODE, kernels)
+
+
+class TestInfectionLog(TestCase):
+
+    def test_appends_across_chunk_boundaries(self):
+        log = InfectionLog(chunk_size=3)
+        for i in range(7):
+            log.append(None if i == 0 else i - 1, i, float(i), HOUSEHOLD_CODE)
+        assert len(log) == 7 and len(log._time_chunks) == 3
+        df = log.to_frame()
+        assert df[TARGET].tolist() == list(range(7))
+        assert df[SOURCE].isna().tolist() == [True] + [False] * 6
+        assert df[SOURCE].tolist()[1:] == list(range(6))
+        assert set(df[KERNEL]) == {kernels[HOUSEHOLD_CODE]}
+
+    def test_extend_fills_chunks_like_append(self):
+        appended, extended = InfectionLog(chunk_size=4), InfectionLog(chunk_size=4)
+        appended.append(None, 0, 0.0, IMPORT_INTENSITY_CODE)
+        extended.append(None, 0, 0.0, IMPORT_INTENSITY_CODE)
+        sources, targets = np.arange(9), np.arange(1, 10)
+        times = np.linspace(1.0, 5.0, 9)
+        for source, target, time in zip(sources, targets, times):
+            appended.append(int(source), int(target), float(time), CONSTANT_CODE)
+        extended.extend(sources, targets, times, np.full(9, CONSTANT_CODE))
+        assert [len(chunk) for chunk in extended._time_chunks] == [4, 4, 2]
+        assert appended.to_frame().equals(extended.to_frame())
+
+    def test_count_and_frame_until(self):
+        log = InfectionLog(chunk_size=2)
+        log.extend(np.full(5, -1), np.arange(5), np.array([0.0, 1.0, 1.0, 2.5, 4.0]), np.full(5, CONSTANT_CODE))
+        assert [log.count_until(time) for time in (-1.0, 0.0, 1.0, 2.0, 2.5, 10.0)] == [0, 1, 3, 3, 4, 5]
+        df = log.to_frame(until=2.0, ids=np.array([10, 11, 12, 13, 14]))
+        assert df[TARGET].tolist() == [10, 11, 12]
+        assert df[CONTRACTION_TIME].tolist() == [0.0, 1.0, 1.0]
+        log.clear()
+        assert len(log) == 0 and log.to_frame().empty
@@ -1,10 +1,38 @@
 from unittest import TestCase
 from src.models import infection_model
+from src.models.enums import (DetectionStatus, SupportedDistributions)
 from collections import defaultdict
+import glob
+import json
 import numpy as np
 import random
 import os
 import pandas as pd
+import tempfile
+import threading
+
+
+def small_inputs(directory, **params):
+    """
+    Paths of params and population of 60 people living in households of 3, with dummy_params.json updated with params
+    """
+    individuals_path = os.path.join(directory, 'individuals.csv')
+    pd.DataFrame({'idx': np.arange(60), 'age': np.arange(60) % 90, 'gender': np.arange(60) % 2,
+                  'household_index': np.arange(60) // 3}).to_csv(individuals_path, index=False)
+    with open(os.path.join('test', 'models', 'assets', 'dummy_params.json')) as f:
+        model_params = json.load(f)
+    model_params.update({'output_root_dir': directory, 'save_input_data': False, 'log_outputs': False,
+                         'max_time': 30}, **params)
+    params_path = os.path.join(directory, 'params.json')
+    with open(params_path, 'w') as f:
+        json.dump(model_params, f)
+    return params_path, individuals_path
+
+
+def small_model(directory, **params):
+    """ Model of the small population (see small_inputs) """
+    params_path, individuals_path = small_inputs(directory, **params)
+    return infection_model.InfectionModel(params_path=params_path, df_individuals_path=individuals_path)
 
 class TestInfectionModel(TestCase):
 
@@ -55,3 +83,102 @@ class TestInfectionModel(TestCase):
         self.__setup_model()
 
         assert 'from_file' == self.model.disease_progression[infection_model.T0][infection_model.DISTRIBUTION]
+
+
+class TestSmallPopulation(TestCase):
+
+    def test_counter_based_random_supports_all_distributions(self):
+        def from_file(approximate_distribution):
+            return {'distribution': 'from_file', 'approximate_distribution': approximate_distribution,
+                    'filepath': '$ROOT_DIR/test/models/assets/incubation_period_distribution.npy'}
+        progressions = {
+            SupportedDistributions.Lognormal: {'distribution': 'lognormal'},
+            SupportedDistributions.Exponential: {'distribution': 'exponential', 'lambda': 0.5},
+            SupportedDistributions.Poisson: {'distribution': 'poisson', 'lambda': 5},
+            SupportedDistributions.Gamma: from_file('gamma'),
+            SupportedDistributions.FromFile: from_file('lognormal'),
+        }
+        assert set(progressions) == set(SupportedDistributions)
+        for distribution, progression in progressions.items():
+            with tempfile.TemporaryDirectory() as directory:
+                model = small_model(directory, counter_based_random=True, disease_progression={'default': {
+                    't0': progression, 't1': progression, 't2': progression, 'tdeath': progression}})
+                model.run_simulation()
+                assert model.affected_people > 0, distribution
+
+    def test_initial_conditions_outside_of_population(self):
+        initial_conditions = [{'person_index': 1000, 'contraction_time': 0, 'infection_status': 'contraction'},
+                              {'person_index': 0, 'contraction_time': 0, 'infection_status': 'contraction'}]
+        with tempfile.TemporaryDirectory() as directory:
+            model = small_model(directory, initial_conditions=initial_conditions)
+            with self.assertRaises(ValueError):
+                model.run_simulation()
+        with tempfile.TemporaryDirectory() as directory:
+            model = small_model(directory, initial_conditions=initial_conditions,
+                                population_filter={'column': 'household_index', 'max': 9})
+            model.run_simulation()
+            assert model.affected_people > 0
+
+    def test_detection_status_of_infected_people_only(self):
+        initial_conditions = {'selection_algorithm': 'random_selection',
+                              'cardinalities': {'contraction': 2, 'immune': 10}}
+        with tempfile.TemporaryDirectory() as directory:
+            model = small_model(directory, initial_conditions=initial_conditions)
+            model.run_simulation()
+            immune = set(model.infection_status) - set(model.detection_status)
+            assert len(immune) == 10
+            assert all(model.get_detection_status_(person_id) == DetectionStatus.NotDetected.value
+                       for person_id in immune)
+
+    def test_background_random_buffer_is_closed(self):
+        threads = threading.active_count()
+        with tempfile.TemporaryDirectory() as directory:
+            model = small_model(directory, random_buffer_size=64, random_buffer_background=True)
+            model.run_simulation()
+            assert model._random is infection_model.mocos_helper
+            assert threading.active_count() == threads
+
+    def test_households_cache_is_opt_in(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache_dir = os.path.join(directory, 'cache')
+            model = small_model(directory, cache_dir=cache_dir)
+            assert os.path.exists(model.df_households_path)
+            assert not os.path.exists(cache_dir)
+            model = small_model(directory, households_cache=True, cache_dir=cache_dir)
+            assert len(os.listdir(cache_dir)) == 1
+            cached = small_model(directory, households_cache=True, cache_dir=cache_dir)
+            assert cached._households.members.tolist() == model._households.members.tolist()
+            assert len(os.listdir(cache_dir)) == 1
+
+    def test_repeated_contacts_draw_independent_contraction_numbers(self):
+        with tempfile.TemporaryDirectory() as directory:
+            model = small_model(directory, counter_based_random=True)
+            model._set_up_random(7)
+            model.setup_simulation()
+            model._infection_status[1] = infection_model.INFECTIOUS_STATE
+            uniforms = []
+
+            def record(kernel, random):
+                uniforms.append(random.random())
+                return True
+            model.quick_return_condition = record
+            for time in (2.0, 3.5, 2.0):
+                model._global_time = time
+                model._handle_tminus1(0, 1, infection_model.HOUSEHOLD_CODE)
+            assert uniforms[0] != uniforms[1]
+            assert uniforms[0] == uniforms[2]
+
+    def test_pruned_contractions_give_the_same_infections(self):
+        infections = {}
+        for prune in (False, True):
+            with tempfile.TemporaryDirectory() as directory:
+                model = small_model(directory, prune_dominated_contractions=prune, max_time=60,
+                                    transmission_probabilities={'household': 1, 'constant': 2.0})
+                model.run_simulation()
+                path, = glob.glob(os.path.join(directory, '*', '*', 'output_df_potential_contractions.csv'))
+                contractions = pd.read_csv(path)
+                infections[prune] = (model.infection_status, contractions)
+                pruned = model._pruned_contractions
+        assert pruned > 0
+        assert infections[True][0] == infections[False][0]
+        assert infections[True][1].equals(infections[False][1])
@@ -0,0 +1,43 @@
+from unittest import TestCase
+import numpy as np
+from src.models.person_random import (CONTACTS_STREAM, CONTRACTION_STREAM, PROGRESSION_STREAM, PersonStreams,
+                                      person_uniform, person_uniforms, sample_few, time_bits)
+
+
+class TestPersonRandom(TestCase):
+
+    def test_scalar_and_vectorized_agree(self):
+        persons = np.array([7, 0, 123456, 3])
+        assert [person_uniform(11, int(p)) for p in persons] == person_uniforms(11, persons).tolist()
+
+    def test_independent_of_order(self):
+        persons = np.arange(100)
+        assert (person_uniforms(11, persons)[::-1] == person_uniforms(11, persons[::-1])).all()
+
+    def test_seeds_differ(self):
+        assert person_uniform(1, 5) != person_uniform(2, 5)
+
+    def test_unit_interval(self):
+        values = person_uniforms(3, np.arange(100000))
+        assert 0.0 <= values.min() and values.max() < 1.0
+        assert abs(values.mean() - 0.5) < 0.01
+
+    def test_stream_depends_on_key_only(self):
+        streams = PersonStreams(5)
+        first = streams.stream(3, PROGRESSION_STREAM).random(4).tolist()
+        streams.stream(8, CONTACTS_STREAM, 2, 1).random(7)
+        assert streams.stream(3, PROGRESSION_STREAM).random(4).tolist() == first
+        assert PersonStreams(5).stream(3, PROGRESSION_STREAM).random(4).tolist() == first
+        assert streams.stream(3, CONTACTS_STREAM).random(4).tolist() != first
+
+    def test_sample_few(self):
+        random = PersonStreams(5).stream(0, CONTACTS_STREAM)
+        selected = sample_few(random, list(range(100)), 10, 7)
+        assert len(set(selected)) == 10 and 7 not in selected
+        assert sample_few(random, [1, 2, 3], 5, 2) == [1, 3]
+
+    def test_time_bits_tell_streams_apart(self):
+        streams = PersonStreams(5)
+        first = streams.stream(3, CONTRACTION_STREAM, 1, 8, time_bits(2.0)).random()
+        assert streams.stream(3, CONTRACTION_STREAM, 1, 8, time_bits(2.5)).random() != first
+        assert streams.stream(3, CONTRACTION_STREAM, 1, 8, time_bits(2.0)).random() == first
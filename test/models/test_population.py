@@ -0,0 +1,85 @@
+import os
+import tempfile
+from unittest import TestCase
+import numpy as np
+import pandas as pd
+from src.models.population import (Population, read_population, row_mask)
+
+columns = {'idx': np.array([2, 0, 3]), 'age': np.array([10, 50, 90], dtype=np.uint8),
+           'gender': np.array([0, 1, 0], dtype=np.uint8), 'household_index': np.array([7, 7, 8])}
+
+
+class TestPopulation(TestCase):
+
+    def test_columns_are_indexed_by_person_index(self):
+        population = Population(columns)
+        assert population.size == 4 and len(population) == 3
+        assert population.age.tolist() == [50, 0, 10, 90]
+        assert population.age.dtype == np.uint8
+        assert population.rows(population.age).tolist() == [10, 50, 90]
+        assert population.age_of(3) == 90 and type(population.age_of(3)) is int
+        assert population.gender_of(0) == 1
+        assert population.social_competence is None
+        assert population.indices_of([2, 4, -1]).tolist() == [2, -1, -1]
+
+    def test_sparse_ids_missing_from_population(self):
+        population = Population(dict(columns, idx=np.array([2, 5, 9])))
+        assert population.indices_of([9, 2, 3, 0, 5, 10]).tolist() == [9, 2, -1, -1, 5, -1]
+
+    def test_columns_are_read_only(self):
+        population = Population(dict(columns, social_competence=np.array([0.5, 0.25, 1.0])))
+        assert population.social_competence_of(2) == 0.5
+        with self.assertRaises(ValueError):
+            population.age[0] = 1
+
+    def test_ordered_indices_keep_arrays(self):
+        ages = np.array([10, 50, 90], dtype=np.uint8)
+        population = Population(dict(columns, idx=np.arange(3), age=ages))
+        assert np.shares_memory(population.age, ages)
+        assert population.to_data_frame().loc[1, 'age'] == 50
+
+    def test_relabelled_households_are_contiguous(self):
+        population = Population(dict(columns, household_index=np.array([8, 7, 7])), relabel=True)
+        # person 0 (age 50) and 3 (age 90) live in household 7, person 2 in household 8
+        assert population.ids.tolist() == [0, 3, 2]
+        assert population.indices.tolist() == [2, 0, 1]
+        assert population.age.tolist() == [50, 90, 10]
+        assert population.household_id.tolist() == [7, 7, 8]
+        assert population.id_of(1) == 3
+        assert population.to_external(np.array([2, 1])).tolist() == [2, 3]
+        assert population.indices_of([3, 2, 1, 4, -1]).tolist() == [1, 2, -1, -1, -1]
+        assert population.to_data_frame().loc[3, 'age'] == 90
+
+
+class TestReadPopulation(TestCase):
+
+    def test_row_mask(self):
+        values = np.array([1, 5, 9])
+        assert row_mask(values, {'column': 'age', 'values': [1, 9]}).tolist() == [True, False, True]
+        assert row_mask(values, {'column': 'age', 'min': 5}).tolist() == [False, True, True]
+        assert row_mask(values, {'column': 'age', 'min': 2, 'max': 5}).tolist() == [False, True, False]
+
+    def test_households_are_not_split(self):
+        df = pd.DataFrame({'idx': [0, 1, 2, 3, 4], 'age': [30, 5, 70, 40, 8], 'gender': [0, 1, 0, 1, 0],
+                           'household_index': [1, 1, 2, 3, 3], 'social_competence': [0.1, 0.2, 0.3, 0.4, 0.5],
+                           'region': ['a', 'a', 'b', 'c', 'b']})
+        with tempfile.TemporaryDirectory() as directory:
+            csv_path = os.path.join(directory, 'population.csv')
+            df.to_csv(csv_path, index=False)
+            for population_filter, ids in (({'column': 'age', 'max': 10}, [0, 1, 3, 4]),
+                                           ({'column': 'household_index', 'values': [2, 3]}, [2, 3, 4]),
+                                           ({'column': 'region', 'values': ['b']}, [2, 3, 4])):
+                csv_columns = read_population(csv_path, population_filter=population_filter)
+                cached_columns = read_population(csv_path, population_filter=population_filter, cached=True,
+                                                 cache_dir=directory)
+                assert list(csv_columns) == list(cached_columns) == list(df.columns)
+                for name in df.columns:
+                    assert csv_columns[name].tolist() == cached_columns[name].tolist()
+                assert csv_columns['idx'].tolist() == ids
+
+    def test_columns_are_projected(self):
+        df = pd.DataFrame({'idx': [0], 'age': [30], 'gender': [0], 'household_index': [1], 'social_competence': [0.1]})
+        with tempfile.TemporaryDirectory() as directory:
+            csv_path = os.path.join(directory, 'population.csv')
+            df.to_csv(csv_path, index=False)
+            assert list(read_population(csv_path, columns=[])) == ['idx', 'age', 'gender', 'household_index']
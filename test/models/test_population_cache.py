@@ -0,0 +1,43 @@
+import os
+import tempfile
+from unittest import TestCase
+import numpy as np
+import pandas as pd
+from src.models.population_cache import (convert_population, downcast, load_population)
+
+
+class TestPopulationCache(TestCase):
+
+    def test_downcast(self):
+        assert downcast(np.array([0, 90])).dtype == np.uint8
+        assert downcast(np.array([-1, 300])).dtype == np.int16
+        assert downcast(np.array([0, 1 << 40])).dtype == np.int64
+        assert downcast(np.array([0.5])).dtype == np.float64
+
+    def test_columns_are_cached_and_invalidated(self):
+        with tempfile.TemporaryDirectory() as directory:
+            csv_path = os.path.join(directory, 'population.csv')
+            df = pd.DataFrame({'idx': [0, 1, 2], 'age': [19, 5, 70], 'household_index': [0, 0, 70000],
+                               'social_competence': [0.25, 0.5, 0.75]})
+            df.to_csv(csv_path, index=False)
+            columns = load_population(csv_path, directory)
+            assert list(columns) == list(df.columns)
+            for name in df.columns:
+                assert (columns[name] == df[name].values).all()
+            assert columns['age'].dtype == np.uint8
+            assert columns['household_index'].dtype == np.uint32
+            assert isinstance(columns['age'], np.memmap)
+            first = convert_population(csv_path, directory)
+
+            df.loc[1, 'age'] = 6
+            df.to_csv(csv_path, index=False)
+            assert convert_population(csv_path, directory) != first
+            assert load_population(csv_path, directory)['age'][1] == 6
+
+    def test_text_columns_are_memory_mapped(self):
+        with tempfile.TemporaryDirectory() as directory:
+            csv_path = os.path.join(directory, 'population.csv')
+            pd.DataFrame({'idx': [0, 1, 2], 'region': ['Wrocław', None, 'Kraków']}).to_csv(csv_path, index=False)
+            columns = load_population(csv_path, directory)
+            assert isinstance(columns['region'], np.memmap)
+            assert columns['region'].tolist() == ['Wrocław', '', 'Kraków']
@@ -0,0 +1,56 @@
+import importlib.util
+import os
+import tempfile
+from unittest import (TestCase, skipUnless)
+import numpy as np
+from src.models.population import read_population
+from src.models.population_hdf5 import (is_hdf5_population, load_hdf5_population)
+
+ages = np.array([30, 5, 70], dtype=np.int8)
+households = np.array([1, 1, 2], dtype=np.int32)
+social_competence = np.array([(0,), (65535,), (32768,)], dtype=[('i', np.uint16)])
+
+
+@skipUnless(importlib.util.find_spec('h5py'), 'h5py is not installed')
+class TestPopulationHdf5(TestCase):
+
+    def test_is_hdf5_population(self):
+        assert is_hdf5_population('data/simulations/poland_v3.jld2')
+        assert not is_hdf5_population('data/processed/population.csv')
+
+    def test_columns_are_memory_mapped(self):
+        import h5py
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'population.h5')
+            with h5py.File(path, 'w') as f:
+                f['individuals_df/age'] = ages
+                f['individuals_df/gender'] = np.array([True, False, True])
+                f.create_dataset('individuals_df/household_index', data=households, chunks=(2,), compression='gzip')
+                f['individuals_df/social_competence'] = social_competence
+            columns = load_hdf5_population(path)
+            assert list(columns) == ['idx', 'age', 'gender', 'household_index', 'social_competence']
+            assert columns['idx'].tolist() == [0, 1, 2]
+            assert isinstance(columns['age'], np.memmap) and columns['age'].tolist() == [30, 5, 70]
+            assert columns['gender'].dtype == np.uint8 and columns['gender'].tolist() == [1, 0, 1]
+            assert columns['household_index'].tolist() == [1, 1, 2]
+            assert np.allclose(columns['social_competence'], [0, 1, 32768 / 65535])
+            filtered = read_population(path, population_filter={'column': 'age', 'min': 60})
+            assert filtered['idx'].tolist() == [2]
+
+    def test_jld2_data_frame(self):
+        import h5py
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'population.jld2')
+            with h5py.File(path, 'w') as f:
+                references = [f.create_dataset(f'_refs/{i}', data=values).ref
+                              for i, values in enumerate((ages, households))]
+                f['_refs/columns'] = np.array(references, dtype=h5py.ref_dtype)
+                f['_refs/names'] = np.array([b'age', b'household_index'], dtype=h5py.string_dtype())
+                index_dtype = np.dtype([('lookup', h5py.ref_dtype), ('names', h5py.ref_dtype)])
+                f['_refs/colindex'] = np.array((f['_refs/names'].ref, f['_refs/names'].ref), dtype=index_dtype)
+                data_frame_dtype = np.dtype([('columns', h5py.ref_dtype), ('colindex', h5py.ref_dtype)])
+                f['individuals_df'] = np.array((f['_refs/columns'].ref, f['_refs/colindex'].ref),
+                                               dtype=data_frame_dtype)
+            columns = load_hdf5_population(path)
+            assert list(columns) == ['idx', 'age', 'household_index']
+            assert columns['household_index'].tolist() == [1, 1, 2]
@@ -0,0 +1,27 @@
+from unittest import TestCase
+import numpy as np
+from src.models.constants import (T0, T1, T2, TDEATH)
+from src.models.progression_realizations import ProgressionRealizations
+
+samplers = {t: (lambda rng, size, scale=scale: rng.exponential(scale, size))
+            for scale, t in enumerate((T0, T1, T2, TDEATH), start=1)}
+
+
+class TestProgressionRealizations(TestCase):
+
+    def test_same_seed_same_realizations(self):
+        first = ProgressionRealizations(100, samplers, 3)
+        second = ProgressionRealizations(100, samplers, 3)
+        assert [first.get(i) for i in range(100)] == [second.get(i) for i in range(100)]
+
+    def test_take_matches_get(self):
+        realizations = ProgressionRealizations(100, samplers, 3)
+        persons = np.array([5, 0, 99])
+        columns = realizations.take(persons)
+        for i, person_id in enumerate(persons):
+            assert realizations.get(person_id) == tuple(column[i] for column in columns)
+
+    def test_uniforms_in_unit_interval(self):
+        columns = ProgressionRealizations(1000, samplers, 3).take(np.arange(1000))
+        for column in columns[4:]:
+            assert ((0.0 <= column) & (column <= 1.0)).all()
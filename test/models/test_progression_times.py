@@ -0,0 +1,42 @@
+from unittest import TestCase
+import numpy as np
+from src.models.constants import (ID, QUARANTINE, T0, T2, TDETECTION, TMINUS1, TRECOVERY)
+from src.models.progression_times import ProgressionTimes
+
+
+class TestProgressionTimes(TestCase):
+
+    def test_rows_across_chunk_boundaries(self):
+        # chunks of 4 rows, 10 people fill two chunks and part of the third
+        times = ProgressionTimes(20, chunk_bits=2)
+        for person_id in range(19, 9, -1):
+            times.set_progression(person_id, person_id, person_id + 1.0, None, None, None, person_id + 14.0, None)
+        assert len(times) == 10 and len(times._chunks) == 3
+        assert times.get(19, T0) == 20.0 and times.get(15, TRECOVERY) == 29.0 and times.get(10, T0) == 11.0
+        assert times.get(12, T2) is None
+        assert times.get(3, T0) is None and 3 not in times and 12 in times
+        df = times.to_frame()
+        assert df.index.tolist() == list(range(19, 9, -1))
+        assert df[T0].tolist() == [person_id + 1.0 for person_id in range(19, 9, -1)]
+
+    def test_set_progressions_matches_set_progression(self):
+        one_by_one, batched = ProgressionTimes(10, chunk_bits=1), ProgressionTimes(10, chunk_bits=1)
+        persons = np.array([4, 0, 9])
+        values = np.array([[0.0, 1.0, np.nan, 5.0, np.nan, 12.0, 5.0],
+                           [1.0, 2.0, 3.0, np.nan, np.nan, 16.0, np.nan],
+                           [2.0, 3.0, np.nan, np.nan, 9.0, np.nan, np.nan]])
+        for person_id, row in zip(persons, values):
+            one_by_one.set_progression(int(person_id), *(None if np.isnan(v) else v for v in row))
+        batched.set_progressions(persons, values)
+        assert one_by_one.to_frame().equals(batched.to_frame())
+        assert batched.get(4, TDETECTION) == 5.0 and batched.get(9, TMINUS1) == 2.0
+
+    def test_quarantined_people_have_no_id(self):
+        times = ProgressionTimes(5, chunk_bits=1)
+        times.set(2, QUARANTINE, 3.0)
+        times.set_progression(4, 0.0, 1.0, None, None, None, 15.0, None)
+        df = times.to_frame(ids=np.array([10, 11, 12, 13, 14]))
+        assert df.index.tolist() == [12, 14]
+        assert df[ID].isna().tolist() == [True, False]
+        assert df[QUARANTINE].tolist()[0] == 3.0
+        assert ProgressionTimes(5).to_frame().empty
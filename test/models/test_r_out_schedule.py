@@ -0,0 +1,34 @@
+from unittest import TestCase
+from src.models.constants import (KERNEL, CONSTANT, MIN_TIME, MAX_TIME, OVERRIDE_R_FRACTION)
+from src.models.r_out_schedule import ROutSchedule
+
+schedule = [
+    {KERNEL: CONSTANT, MIN_TIME: 10.0, MAX_TIME: 20.0, OVERRIDE_R_FRACTION: 0.5},
+    {KERNEL: CONSTANT, MIN_TIME: 15.0, MAX_TIME: 30.0, OVERRIDE_R_FRACTION: 0.0},
+]
+
+
+class TestROutSchedule(TestCase):
+
+    def test_first_matching_entry_wins(self):
+        r_out = ROutSchedule(schedule)
+        assert r_out.fraction_at(5.0) is None
+        assert 0.5 == r_out.fraction_at(12.0)
+        assert 0.5 == r_out.fraction_at(17.0)
+        assert 0.0 == r_out.fraction_at(25.0)
+        assert r_out.fraction_at(31.0) is None
+        assert r_out.fraction_at(float('-inf')) is None
+
+    def test_segments(self):
+        r_out = ROutSchedule(schedule)
+        assert r_out.segments(0.0, 9.0) is None
+        segments, mass = r_out.segments(8.0, 40.0)
+        assert [(8.0, 10.0, 1.0), (10.0, 15.0, 0.5), (15.0, 20.0, 0.5), (20.0, 30.0, 0.0), (30.0, 40.0, 1.0)] \
+            == segments
+        assert 17.0 == mass
+
+    def test_samples_avoid_closed_windows(self):
+        segments, mass = ROutSchedule(schedule).segments(18.0, 32.0)
+        for _ in range(1000):
+            time = ROutSchedule.sample(segments, mass)
+            assert 18.0 <= time <= 20.0 or 30.0 <= time <= 32.0